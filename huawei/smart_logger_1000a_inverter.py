@@ -95,6 +95,7 @@ class SmartLogger1000aInverter(SitModbusDevice):
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
 	_substract_one_to_register_index = False
+	_pipeline_window = SitModbusDevice.GATEWAY_PIPELINE_WINDOW # the gateway accepts several outstanding transactions
 
 	_inverter_indexes_list = None
 
@@ -209,6 +210,21 @@ class SmartLogger1000aInverter(SitModbusDevice):
 		return a_subject, a_body
 
 
+# MODBUS READING
+
+	def poll_sit_modbus_registers(self):
+		"""
+		REDEFINE
+		Reads registers of each inverter of self._inverter_indexes_list
+		"""
+		for l_inverter_index in self._inverter_indexes_list:
+			assert self.valid_inverter_index(l_inverter_index), 'poll_sit_modbus_registers->valid inverter index:{}'.format(l_inverter_index)
+			self.use_sit_modbus_registers_of(l_inverter_index, self._init_sit_modbus_registers, self._slave_address, l_inverter_index)
+			self.read_all_sit_modbus_registers()
+			if not self.is_data_unchanged():
+				yield self._slave_address
+
+
 # ACCESS
 
 
@@ -229,19 +245,7 @@ class SmartLogger1000aInverter(SitModbusDevice):
 				self._logger.setLevel(logging.INFO)
 			if self._args.store_values or self._args.display_all or self._args.test or self._args.raise_event:
 				assert self.valid_slave_address(self._slave_address), 'Invalid slave address {}'.format(self._slave_address)
-				for l_inverter_index in self._inverter_indexes_list:
-					assert self.valid_inverter_index(l_inverter_index), 'execute_corresponding_args->valid inverter index:{}'.format(l_inverter_index)
-					self._init_sit_modbus_registers(self._slave_address, l_inverter_index)
-					self.read_all_sit_modbus_registers()
-					if self._args.store_values:
-						self.store_values_into_csv(self._sit_modbus_registers, self._slave_address)
-					if self._args.display_all:
-						print(self.out_human_readable(a_with_description=self._args.long))
-					if self._args.raise_event:
-						assert len(self._sit_modbus_registers) > 0, 'modbus_registers_not_empty'
-						self.call_sit_modbus_registers_events()
-					if self._args.test:
-						self.test()
+				self.execute_cycles()
 #			if self._args.manual_restart:
 #				self.manual_restart()
 		except Exception as l_e:
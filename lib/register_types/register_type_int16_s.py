@@ -59,6 +59,8 @@ class RegisterTypeInt16s(SitModbusRegister):
 	_words_count = 1
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
+	_struct_format = 'h'
+	_sentinel_registers = (0x8000,)
 
 # SETTERS AND GETTERS
 
@@ -59,6 +59,8 @@ class RegisterTypeInt16uScaleFactor(SitModbusRegister):
 	_words_count = 1
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
+	_struct_format = 'H'
+	_sentinel_registers = (0xFFFF,)
 
 	_scale_factor = None
 
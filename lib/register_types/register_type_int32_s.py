@@ -59,6 +59,8 @@ class RegisterTypeInt32s(SitModbusRegister):
 	_words_count = 2
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
+	_struct_format = 'i'
+	_sentinel_registers = (0x8000, 0x0000)
 
 # SETTERS AND GETTERS
 
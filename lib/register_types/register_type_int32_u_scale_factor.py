@@ -59,6 +59,8 @@ class RegisterTypeInt32uScaleFactor(SitModbusRegister):
 	_words_count = 2
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
+	_struct_format = 'I'
+	_sentinel_registers = (0xFFFF, 0xFFFF)
 
 	_scale_factor = None
 
@@ -59,6 +59,8 @@ class RegisterTypeInt64u(SitModbusRegister):
 	_words_count = 4
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
+	_struct_format = 'Q'
+	_sentinel_registers = (0xFFFF, 0xFFFF, 0xFFFF, 0xFFFF)
 
 # SETTERS AND GETTERS
 
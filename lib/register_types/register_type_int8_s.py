@@ -59,6 +59,7 @@ class RegisterTypeInt8s(SitModbusRegister):
 	_words_count = 1
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
+	_struct_format = 'Bx' # decode_8bit_uint reads the high byte
 
 # SETTERS AND GETTERS
 
@@ -59,6 +59,8 @@ class RegisterTypeSmaCCDeviceClass(SitModbusRegister):
 	_words_count = 2
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
+	_struct_format = 'I'
+	_sentinel_registers = (0xFFFF, 0xFFFF)
 
 # SETTERS AND GETTERS
 
@@ -89,7 +91,13 @@ class RegisterTypeSmaCCDeviceClass(SitModbusRegister):
 		#self._logger.debug("set_value_with_raw->before decoder:{}".format(a_register_read_res.registers))
 		decoder = BinaryPayloadDecoder.fromRegisters(a_register_read_res.registers, byteorder=self._byte_order, wordorder=self._word_order) #https://pymodbus.readthedocs.io/en/latest/source/example/modbus_payload.html
 		#https://pymodbus.readthedocs.io/en/v1.3.2/library/payload.html?highlight=binarypayloaddecoder#pymodbus.payload.BinaryPayloadDecoder
-		l_v = decoder.decode_32bit_uint()
+		self.set_value_with_unpacked(decoder.decode_32bit_uint())
+
+	def set_value_with_unpacked(self, an_unpacked):
+		"""
+		Sets value with the device class name of the int decoded by set_value_with_raw or by SitModbusBlockDecoder
+		"""
+		l_v = an_unpacked
 		#self._logger.debug("set_value_with_raw->after decoder:{}".format(l_v))
 		if l_v == 8000:
 			l_v = 'All devices'
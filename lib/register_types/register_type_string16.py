@@ -59,6 +59,7 @@ class RegisterTypeString16(SitModbusRegister):
 	_words_count = 16
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
+	_struct_format = '16s16x' # decode_string(16) reads the first 16 bytes
 
 # SETTERS AND GETTERS
 
@@ -89,7 +90,13 @@ class RegisterTypeString16(SitModbusRegister):
 		#self._logger.debug("set_value_with_raw->before decoder:{}".format(a_register_read_res.registers))
 		decoder = BinaryPayloadDecoder.fromRegisters(a_register_read_res.registers, byteorder=self._byte_order, wordorder=self._word_order) #https://pymodbus.readthedocs.io/en/latest/source/example/modbus_payload.html
 		#https://pymodbus.readthedocs.io/en/v1.3.2/library/payload.html?highlight=binarypayloaddecoder#pymodbus.payload.BinaryPayloadDecoder
-		l_result = decoder.decode_string(16) 
+		self.set_value_with_unpacked(decoder.decode_string(16))
+
+	def set_value_with_unpacked(self, an_unpacked):
+		"""
+		Sets value with the bytes decoded by set_value_with_raw or by SitModbusBlockDecoder
+		"""
+		l_result = an_unpacked
 		#self._logger.debug("register_values_string16->before decode utf=8:'{}'".format(l_result))
 		if len (l_result) > 0 and str(l_result[0]) == '0':
 			l_result = ''
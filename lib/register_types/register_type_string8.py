@@ -60,6 +60,7 @@ class RegisterTypeString8(SitModbusRegister):
 	_words_count = 8
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
+	_struct_format = '8s8x' # decode_string(8) reads the first 8 bytes
 
 # SETTERS AND GETTERS
 
@@ -90,7 +91,13 @@ class RegisterTypeString8(SitModbusRegister):
 		#self._logger.debug("set_value_with_raw->before decoder:{}".format(a_register_read_res.registers))
 		decoder = BinaryPayloadDecoder.fromRegisters(a_register_read_res.registers, byteorder=self._byte_order, wordorder=self._word_order) #https://pymodbus.readthedocs.io/en/latest/source/example/modbus_payload.html
 		#https://pymodbus.readthedocs.io/en/v1.3.2/library/payload.html?highlight=binarypayloaddecoder#pymodbus.payload.BinaryPayloadDecoder
-		l_result = decoder.decode_string(8) 
+		self.set_value_with_unpacked(decoder.decode_string(8))
+
+	def set_value_with_unpacked(self, an_unpacked):
+		"""
+		Sets value with the bytes decoded by set_value_with_raw or by SitModbusBlockDecoder
+		"""
+		l_result = an_unpacked
 		if len (l_result) > 0 and str(l_result[0]) == '0':
 			l_result = ''
 		else:
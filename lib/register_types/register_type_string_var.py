@@ -59,6 +59,7 @@ class RegisterTypeStringVar(SitModbusRegister):
 	_words_count = 15
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
+	_struct_format = None # set by __init__ with the words count
 
 # SETTERS AND GETTERS
 
@@ -72,6 +73,7 @@ class RegisterTypeStringVar(SitModbusRegister):
 		try:
 			super().__init__(a_short_description, a_description, a_register_index, a_slave_address, an_access_mode, a_value_unit, a_scale_factor_register_index, an_event, an_is_metadata, a_post_set_value_call)
 			self._words_count = a_word_count
+			self._struct_format = '{0}s{0}x'.format(a_word_count) # decode_string(words_count) reads the first words_count bytes
 			#*** Logger
 			self._logger = SitLogger().new_logger(__name__)
 			self.invariants()
@@ -90,7 +92,13 @@ class RegisterTypeStringVar(SitModbusRegister):
 		#self._logger.debug("set_value_with_raw->before decoder:{}".format(a_register_read_res.registers))
 		decoder = BinaryPayloadDecoder.fromRegisters(a_register_read_res.registers, byteorder=self._byte_order, wordorder=self._word_order) #https://pymodbus.readthedocs.io/en/latest/source/example/modbus_payload.html
 		#https://pymodbus.readthedocs.io/en/v1.3.2/library/payload.html?highlight=binarypayloaddecoder#pymodbus.payload.BinaryPayloadDecoder
-		l_result = decoder.decode_string(self._words_count) 
+		self.set_value_with_unpacked(decoder.decode_string(self._words_count))
+
+	def set_value_with_unpacked(self, an_unpacked):
+		"""
+		Sets value with the bytes decoded by set_value_with_raw or by SitModbusBlockDecoder
+		"""
+		l_result = an_unpacked
 		#self._logger.debug("register_values_string16->before decode utf=8:'{}'".format(l_result))
 		if len (l_result) > 0 and str(l_result[0]) == '0':
 			l_result = ''
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Applies active power limits (curtailment orders of grid operators and direct marketers) to all
+#			devices of sites at once, writes being fanned out on worker threads with a cap on concurrent targets
+#			overall and per gateway, retried, verified by reading back and reported with their latency
+#
+#       CALL SAMPLE:
+#			python3 lib/sit_curtailment_dispatcher.py -m b8:27:eb:00:00:01 -f /etc/opt/solarity/curtailment.json --setpoint site_a=60 --setpoint site_b=0
+#			with curtailment.json:
+#				{"targets": [
+#					{"site": "site_a", "driver": "sma/data_manager.py", "class": "DataManager", "host_ip": "192.168.0.10"},
+#					{"site": "site_b", "driver": "sma/data_manager.py", "class": "DataManager", "host_ip": "192.168.1.10"}
+#				]}
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import logging # http://www.onlamp.com/pub/a/python/2005/06/02/logging.html
+	import argparse
+	import json
+	import math
+	import threading
+	import time
+	from collections import OrderedDict, namedtuple
+	from concurrent.futures import ThreadPoolExecutor
+	from pymodbus.exceptions import ModbusException, ConnectionException
+	from sit_logger import SitLogger
+	from sit_constants import SitConstants
+	from sit_modbus_device import SitModbusDevice
+	from sit_site_poller import SitSitePoller
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+# Outcome of a setpoint on one target (unit of a gateway), slave_address None for the registers of the device,
+#	latency in seconds from the dispatch call until verified or given up
+SitCurtailmentResult = namedtuple('SitCurtailmentResult', ['site', 'sit_modbus_device', 'slave_address', 'percent', 'is_applied', 'attempts_count', 'latency', 'error'])
+
+class SitCurtailmentDispatcher(object):
+
+# CONSTANTS
+	DEFAULT_MAX_CONCURRENCY = 32 # targets written at the same time, all gateways together
+	DEFAULT_GATEWAY_CONCURRENCY = 1 # targets of the same gateway written at the same time, most gateways serialize their units
+	DEFAULT_MAX_ATTEMPTS = 3 # per target, each attempt reconnecting and writing with the retries of write_register_values
+	DEFAULT_RETRY_DELAY = 0.5 # seconds between two attempts on a target
+	DEFAULT_SLA_SECONDS = 5 # seconds in which DEFAULT_SLA_PERCENTILE % of the targets have to be applied
+	DEFAULT_SLA_PERCENTILE = 95
+	PARSER_DESCRIPTION = 'Applies active power limits to all devices of sites. ' + SitConstants.DEFAULT_HELP_LICENSE_NOTICE
+
+# VARIABLES
+	_logger = None
+	_sites = None # OrderedDict site => list of SitModbusDevice
+	_gateway_semaphores = None # dict gateway key => threading.BoundedSemaphore of DEFAULT_GATEWAY_CONCURRENCY
+	_device_locks = None # dict id(device) => threading.Lock, units of a device are written one after the other with its registers and connection
+	_executor = None
+	_max_attempts = DEFAULT_MAX_ATTEMPTS
+	_retry_delay = DEFAULT_RETRY_DELAY
+
+# SETTERS AND GETTERS
+
+	@property
+	def sites(self):
+		return self._sites
+
+# INITIALIZE
+
+	def __init__(self, some_sites, a_max_concurrency=DEFAULT_MAX_CONCURRENCY, a_gateway_concurrency=DEFAULT_GATEWAY_CONCURRENCY, a_max_attempts=DEFAULT_MAX_ATTEMPTS, a_retry_delay=DEFAULT_RETRY_DELAY):
+		"""
+			Initialize
+			@param some_sites: OrderedDict site => list of SitModbusDevice having a curtailment setpoint register, each owning its connection
+			@param a_max_concurrency: targets written at the same time
+			@param a_gateway_concurrency: targets of the same gateway written at the same time
+		"""
+		assert len(some_sites) > 0, 'some_sites not empty'
+		assert a_max_concurrency > 0 and a_gateway_concurrency > 0, 'invalid concurrency:{} gateway:{}'.format(a_max_concurrency, a_gateway_concurrency)
+		assert a_max_attempts > 0, 'a_max_attempts > 0:{}'.format(a_max_attempts)
+		self._logger = SitLogger().new_logger(__name__)
+		self._sites = some_sites
+		self._gateway_semaphores = {}
+		self._device_locks = {}
+		for l_devices in some_sites.values():
+			for l_device in l_devices:
+				assert isinstance(l_device, SitModbusDevice), 'l_device is a SitModbusDevice but {}'.format(l_device.__class__.__name__)
+				self._gateway_semaphores.setdefault(self.gateway_key(l_device), threading.BoundedSemaphore(a_gateway_concurrency))
+				self._device_locks[id(l_device)] = threading.Lock()
+		self._max_attempts = a_max_attempts
+		self._retry_delay = a_retry_delay
+		self._executor = ThreadPoolExecutor(max_workers=a_max_concurrency, thread_name_prefix='curtailment')
+
+		self.invariants()
+
+	@classmethod
+	def new_with_targets(cls, some_targets, a_host_mac, **some_kwargs):
+		"""
+		Returns a new dispatcher, devices being created from given targets
+		@param some_targets: list of (site, driver class, ip, unit ids as in --slave_address or None[, list of other script arguments])
+		"""
+		l_sites = OrderedDict()
+		for l_target in some_targets:
+			l_site, l_driver_class, l_ip, l_slave_address = l_target[0:4]
+			l_script_arguments = ['-i', l_ip, '-m', a_host_mac]
+			if l_slave_address is not None:
+				l_script_arguments += ['-c', l_slave_address]
+			if len(l_target) > 4:
+				l_script_arguments += l_target[4]
+			l_sites.setdefault(l_site, []).append(l_driver_class.new_with_script_arguments(l_script_arguments))
+
+		return cls(l_sites, **some_kwargs)
+
+	@staticmethod
+	def gateway_key(a_sit_modbus_device):
+		"""
+		(ip, port) of a tcp device, port of a rtu one
+		"""
+		if a_sit_modbus_device.target_mode == SitModbusDevice.TARGET_MODE_TCP:
+			return (a_sit_modbus_device.target_ip, str(a_sit_modbus_device.target_port))
+		return (None, str(a_sit_modbus_device.target_port))
+
+# DISPATCHING
+
+	def dispatch(self, some_setpoints):
+		"""
+		Applies the setpoint of each given site to every unit of all its devices (see SitModbusDevice.curtailment_slave_addresses)
+			concurrently, returns when all are applied or given up
+			returns the list of SitCurtailmentResult ordered by site, device then unit
+		@param some_setpoints: dict site => active power limit in % of the nominal power
+		"""
+		l_start = time.monotonic()
+		l_futures = []
+		for l_site, l_percent in some_setpoints.items():
+			assert l_site in self._sites, 'unknown site:{}'.format(l_site)
+			for l_device in self._sites[l_site]:
+				for l_slave_address in l_device.curtailment_slave_addresses():
+					l_futures.append(self._executor.submit(self._apply_setpoint, l_site, l_device, l_slave_address, l_percent, l_start))
+		l_res = [l_future.result() for l_future in l_futures]
+		l_failed_count = sum(1 for l_result in l_res if not l_result.is_applied)
+		self._logger.info('dispatch-> {} target(s) of {} site(s) in {:.3f}s, {} failed, p{} latency:{}'.format(len(l_res), len(some_setpoints), time.monotonic() - l_start, l_failed_count, self.DEFAULT_SLA_PERCENTILE, self.completion_percentile(l_res, self.DEFAULT_SLA_PERCENTILE)))
+
+		return l_res
+
+	def _apply_setpoint(self, a_site, a_sit_modbus_device, a_slave_address, a_percent, a_start):
+		"""
+		Writes given setpoint to given unit of given device and reads it back, on a worker thread
+			retried max_attempts times reconnecting, returns the SitCurtailmentResult
+		"""
+		l_gateway_semaphore = self._gateway_semaphores[self.gateway_key(a_sit_modbus_device)]
+		l_target_description = self.target_description(a_sit_modbus_device, a_slave_address)
+		l_error = None
+		l_attempts_count = 0
+		while l_attempts_count < self._max_attempts:
+			l_attempts_count += 1
+			try:
+				with l_gateway_semaphore, self._device_locks[id(a_sit_modbus_device)]:
+					try:
+						if not a_sit_modbus_device.is_connected():
+							a_sit_modbus_device.connect()
+						if not a_sit_modbus_device.is_connected():
+							raise ConnectionException('_apply_setpoint-> could not connect to {}'.format(l_target_description))
+						a_sit_modbus_device.write_sit_modbus_register_values(a_sit_modbus_device.curtailment_setpoint_values(a_percent, a_slave_address), an_is_read_back=True)
+					except ModbusException:
+						self._disconnect(a_sit_modbus_device)
+						raise
+				l_latency = time.monotonic() - a_start
+				self._logger.info('_apply_setpoint-> site:{} target:{} {}% applied in {:.3f}s, attempt {}'.format(a_site, l_target_description, a_percent, l_latency, l_attempts_count))
+
+				return SitCurtailmentResult(a_site, a_sit_modbus_device, a_slave_address, a_percent, True, l_attempts_count, l_latency, None)
+			except ModbusException as l_e:
+				l_error = l_e
+				self._logger.error('_apply_setpoint-> site:{} target:{} attempt {}/{} failed:{}'.format(a_site, l_target_description, l_attempts_count, self._max_attempts, l_e))
+				if l_attempts_count < self._max_attempts:
+					time.sleep(self._retry_delay)
+			except Exception as l_e:
+				l_error = l_e
+				self._logger.exception('_apply_setpoint-> site:{} target:{} Exception:{}'.format(a_site, l_target_description, l_e))
+				break
+
+		return SitCurtailmentResult(a_site, a_sit_modbus_device, a_slave_address, a_percent, False, l_attempts_count, time.monotonic() - a_start, str(l_error))
+
+# REPORT
+
+	@staticmethod
+	def completion_percentile(some_results, a_percentile):
+		"""
+		Seconds after which a_percentile % of given results were applied (nearest rank), None if they never were
+		"""
+		if len(some_results) == 0:
+			return None
+		l_latencies = sorted(l_result.latency if l_result.is_applied else math.inf for l_result in some_results)
+		l_res = l_latencies[max(1, math.ceil(a_percentile / 100 * len(l_latencies))) - 1]
+
+		return None if l_res == math.inf else l_res
+
+	@classmethod
+	def report(cls, some_results, a_sla_seconds=DEFAULT_SLA_SECONDS, a_sla_percentile=DEFAULT_SLA_PERCENTILE):
+		"""
+		Returns an OrderedDict with counts, latency percentiles, whether the SLA is met and the result of each target
+		"""
+		l_applied_latencies = sorted(l_result.latency for l_result in some_results if l_result.is_applied)
+		l_percentile = cls.completion_percentile(some_results, a_sla_percentile)
+		l_res = OrderedDict()
+		l_res['targets'] = len(some_results)
+		l_res['applied'] = len(l_applied_latencies)
+		l_res['failed'] = len(some_results) - len(l_applied_latencies)
+		l_res['p50'] = cls.completion_percentile(some_results, 50)
+		l_res['p{}'.format(a_sla_percentile)] = l_percentile
+		l_res['max'] = l_applied_latencies[-1] if len(l_applied_latencies) > 0 else None
+		l_res['sla_seconds'] = a_sla_seconds
+		l_res['is_sla_met'] = l_percentile is not None and l_percentile <= a_sla_seconds
+		l_res['results'] = [OrderedDict([('site', l_result.site), ('target', cls.target_description(l_result.sit_modbus_device, l_result.slave_address)), ('percent', l_result.percent),
+				('is_applied', l_result.is_applied), ('attempts', l_result.attempts_count), ('latency', round(l_result.latency, 4)), ('error', l_result.error)]) for l_result in some_results]
+
+		return l_res
+
+	@staticmethod
+	def target_description(a_sit_modbus_device, a_slave_address=None):
+		l_res = '{} {}:{}'.format(a_sit_modbus_device.__class__.__name__, a_sit_modbus_device.target_ip or '', a_sit_modbus_device.target_port)
+		if a_slave_address is not None:
+			l_res += ' unit:{}'.format(a_slave_address)
+
+		return l_res
+
+# CONNECTION
+
+	def _disconnect(self, a_sit_modbus_device):
+		try:
+			if a_sit_modbus_device.is_connected():
+				a_sit_modbus_device.disconnect()
+		except Exception as l_e:
+			self._logger.error('_disconnect-> target:{} msg:{}'.format(self.target_description(a_sit_modbus_device), l_e))
+
+	def close(self):
+		"""
+		Disconnects all devices and stops worker threads
+		"""
+		for l_devices in self._sites.values():
+			for l_device in l_devices:
+				self._disconnect(l_device)
+		self._executor.shutdown(wait=True)
+
+# SITE CONFIGURATION
+
+	@classmethod
+	def targets_from_site_conf(cls, a_site_conf_file_path):
+		"""
+		Returns targets for new_with_targets from given json file, see CALL SAMPLE
+		"""
+		with open(a_site_conf_file_path, 'r') as l_file:
+			l_site_conf = json.load(l_file)
+		l_res = []
+		for l_target_conf in l_site_conf['targets']:
+			l_driver_class = SitSitePoller.driver_class(l_target_conf['driver'], l_target_conf['class'])
+			l_res.append((l_target_conf['site'], l_driver_class, l_target_conf['host_ip'], l_target_conf.get('slave_address'), l_target_conf.get('script_arguments', [])))
+
+		return l_res
+
+# INVARIANTS
+
+	def invariants(self):
+		assert len(self._sites) > 0, 'sites not empty'
+		assert self._executor is not None, 'executor not None'
+
+#################### END CLASS ######################
+
+def setpoints_from_args(some_setpoint_args):
+	"""
+	Returns an OrderedDict site => percent from given list of 'site=percent'
+	"""
+	l_res = OrderedDict()
+	for l_arg in some_setpoint_args:
+		l_site, l_sep, l_percent = l_arg.rpartition('=')
+		if l_sep == '' or l_site == '':
+			raise argparse.ArgumentTypeError('setpoint is not site=percent:{}'.format(l_arg))
+		l_res[l_site] = float(l_percent)
+
+	return l_res
+
+def main():
+	"""
+	Main method
+	"""
+	logger = logging.getLogger(__name__)
+	l_parser = argparse.ArgumentParser(description=SitCurtailmentDispatcher.PARSER_DESCRIPTION)
+	l_parser.add_argument('--setpoint', help='Active power limit of a site as site=percent, repeated for each site', action='append', required=True)
+	l_parser.add_argument('--concurrency', help='Targets written at the same time', type=int, default=SitCurtailmentDispatcher.DEFAULT_MAX_CONCURRENCY)
+	l_parser.add_argument('--gateway_concurrency', help='Targets of the same gateway written at the same time', type=int, default=SitCurtailmentDispatcher.DEFAULT_GATEWAY_CONCURRENCY)
+	l_parser.add_argument('--attempts', help='Attempts per target', type=int, default=SitCurtailmentDispatcher.DEFAULT_MAX_ATTEMPTS)
+	l_parser.add_argument('--sla', help='Seconds in which --sla_percentile %% of targets have to be applied', type=float, default=SitCurtailmentDispatcher.DEFAULT_SLA_SECONDS)
+	l_parser.add_argument('--sla_percentile', type=int, default=SitCurtailmentDispatcher.DEFAULT_SLA_PERCENTILE)
+	l_required_named = l_parser.add_argument_group('required named arguments')
+	l_required_named.add_argument('-m', '--host_mac', help='Host MAC', nargs='?', required=True)
+	l_required_named.add_argument('-f', '--site_conf', help='Json configuration file of the targets of each site', nargs='?', required=True)
+	l_args = l_parser.parse_args()
+
+	l_setpoints = setpoints_from_args(l_args.setpoint)
+	l_dispatcher = SitCurtailmentDispatcher.new_with_targets(SitCurtailmentDispatcher.targets_from_site_conf(l_args.site_conf), l_args.host_mac,
+			a_max_concurrency=l_args.concurrency, a_gateway_concurrency=l_args.gateway_concurrency, a_max_attempts=l_args.attempts)
+	l_report = None
+	try:
+		l_report = SitCurtailmentDispatcher.report(l_dispatcher.dispatch(l_setpoints), l_args.sla, l_args.sla_percentile)
+		print(json.dumps(l_report, indent=2))
+	except KeyboardInterrupt:
+		logger.exception("Keyboard interruption")
+	finally:
+		l_dispatcher.close()
+	sys.exit(0 if l_report is not None and l_report['is_sla_met'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Latency benchmark of SitCurtailmentDispatcher without hardware, against Modbus TCP gateway emulators
+#			listening on their own loopback address (127.0.x.y, as gateways have their own ip). Each emulated gateway keeps the holding registers of its units, answers read holding
+#			registers and write multiple registers requests after a delay and ignores a ratio of requests
+#			so that retries are exercised
+#
+#       CALL SAMPLE:
+#			python3 lib/sit_curtailment_dispatcher_benchmark.py --sites 3 --gateways 10 --units 1-4 --response_delay 0.05 --drop_ratio 0.02
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/register_types'))
+	import argparse
+	import json
+	import random
+	import socket
+	import struct
+	import threading
+	import time
+	from collections import OrderedDict
+	from sit_logger import SitLogger
+	from sit_utils import SitUtils
+	from sit_modbus_device import SitModbusDevice
+	from sit_modbus_register import SitModbusRegister
+	from sit_curtailment_dispatcher import SitCurtailmentDispatcher
+	from register_type_int16_u import RegisterTypeInt16u
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusTcpGatewayEmulator(object):
+
+# CONSTANTS
+	MBAP_HEADER = struct.Struct('>HHHB') # transaction id, protocol id, length, unit id
+	READ_HOLDING_REGISTERS = 0x03
+	WRITE_MULTIPLE_REGISTERS = 0x10
+	EXCEPTION_FLAG = 0x80
+	ILLEGAL_FUNCTION = 0x01
+	GATEWAY_NO_RESPONSE = 0x0B
+	DEFAULT_RESPONSE_DELAY = 0.02 # seconds the gateway takes to answer
+
+# VARIABLES
+	_logger = None
+	_server_socket = None
+	_units = None # set of unit ids answering
+	_registers = None # dict (unit, address) => word, 0 if never written
+	_lock = None
+	_response_delay = DEFAULT_RESPONSE_DELAY
+	_drop_ratio = 0 # ratio of requests not answered
+	_requests_count = 0
+	_dropped_count = 0
+	_stop_event = None
+
+# SETTERS AND GETTERS
+
+	@property
+	def host(self):
+		return self._server_socket.getsockname()[0]
+
+	@property
+	def port(self):
+		return self._server_socket.getsockname()[1]
+
+	@property
+	def requests_count(self):
+		return self._requests_count
+
+	@property
+	def dropped_count(self):
+		return self._dropped_count
+
+# INITIALIZE
+
+	def __init__(self, some_units, a_response_delay=DEFAULT_RESPONSE_DELAY, a_drop_ratio=0, a_host='127.0.0.1'):
+		"""
+			Initialize, listening on a free port of a_host
+		"""
+		assert 0 <= a_drop_ratio < 1, 'invalid a_drop_ratio:{}'.format(a_drop_ratio)
+		self._logger = SitLogger().new_logger(__name__)
+		self._units = set(some_units)
+		self._registers = {}
+		self._lock = threading.Lock()
+		self._response_delay = a_response_delay
+		self._drop_ratio = a_drop_ratio
+		self._stop_event = threading.Event()
+		self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		self._server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		self._server_socket.bind((a_host, 0))
+		self._server_socket.listen(16)
+		self._server_socket.settimeout(0.2)
+
+	def start(self):
+		threading.Thread(target=self._accept_loop, name='gateway_emulator_{}'.format(self.port), daemon=True).start()
+
+	def stop(self):
+		self._stop_event.set()
+		self._server_socket.close()
+
+# EMULATION
+
+	def register_value(self, a_unit, an_address):
+		with self._lock:
+			return self._registers.get((a_unit, an_address), 0)
+
+	def set_register_values(self, a_unit, an_address, some_words):
+		"""
+		Sets the words of given unit from given address, as a write_registers request would
+		"""
+		with self._lock:
+			for l_index, l_word in enumerate(some_words):
+				self._registers[(a_unit, an_address + l_index)] = l_word
+
+	def _accept_loop(self):
+		while not self._stop_event.is_set():
+			try:
+				l_connection, l_address = self._server_socket.accept()
+			except socket.timeout:
+				continue
+			except OSError:
+				break
+			threading.Thread(target=self._serve_connection, args=(l_connection,), daemon=True).start()
+
+	def _serve_connection(self, a_connection):
+		with a_connection:
+			while not self._stop_event.is_set():
+				l_header = self._received(a_connection, self.MBAP_HEADER.size)
+				if l_header is None:
+					return
+				l_transaction_id, l_protocol_id, l_length, l_unit = self.MBAP_HEADER.unpack(l_header)
+				l_pdu = self._received(a_connection, l_length - 1)
+				if l_pdu is None:
+					return
+				self._requests_count += 1
+				if random.random() < self._drop_ratio:
+					self._dropped_count += 1
+					continue
+				l_response_pdu = self.response_pdu(l_unit, l_pdu)
+				time.sleep(self._response_delay)
+				a_connection.sendall(self.MBAP_HEADER.pack(l_transaction_id, l_protocol_id, len(l_response_pdu) + 1, l_unit) + l_response_pdu)
+
+	@staticmethod
+	def _received(a_connection, a_size):
+		"""
+		Returns a_size bytes received from given connection, None if it is closed
+		"""
+		l_res = b''
+		while len(l_res) < a_size:
+			try:
+				l_chunk = a_connection.recv(a_size - len(l_res))
+			except OSError:
+				return None
+			if not l_chunk:
+				return None
+			l_res += l_chunk
+
+		return l_res
+
+	def response_pdu(self, a_unit, a_pdu):
+		"""
+		Returns the pdu answering given request pdu of given unit
+		"""
+		l_function_code = a_pdu[0]
+		if a_unit not in self._units:
+			return bytes([l_function_code | self.EXCEPTION_FLAG, self.GATEWAY_NO_RESPONSE])
+		if l_function_code == self.READ_HOLDING_REGISTERS:
+			l_address, l_count = struct.unpack_from('>HH', a_pdu, 1)
+			with self._lock:
+				l_words = [self._registers.get((a_unit, l_address + l_index), 0) for l_index in range(l_count)]
+			return struct.pack('>BB{}H'.format(l_count), l_function_code, l_count * 2, *l_words)
+		if l_function_code == self.WRITE_MULTIPLE_REGISTERS:
+			l_address, l_count = struct.unpack_from('>HH', a_pdu, 1)
+			l_words = struct.unpack_from('>{}H'.format(l_count), a_pdu, 6)
+			with self._lock:
+				for l_index, l_word in enumerate(l_words):
+					self._registers[(a_unit, l_address + l_index)] = l_word
+			return struct.pack('>BHH', l_function_code, l_address, l_count)
+
+		return bytes([l_function_code | self.EXCEPTION_FLAG, self.ILLEGAL_FUNCTION])
+
+#################### END CLASS ######################
+
+class SitCurtailmentEmulatedDevice(SitModbusDevice):
+
+# CONSTANTS
+	SETPOINT_REGISTER_INDEX = 40349
+
+# CLASS ATTRIBUTES
+	_tcp_timeout = 1
+	_curtailment_setpoint_short_description = 'WMaxLimPct'
+	_curtailment_setpoint_value_per_percent = 100
+
+# INITIALIZE
+
+	def __init__(self, a_slave_address, an_ip_address, a_port):
+		"""
+			Initialize, a device per unit of an emulated gateway
+		"""
+		super().__init__(a_slave_address, self.TARGET_MODE_TCP, a_port, an_ip_address)
+		self.add_modbus_register(RegisterTypeInt16u('WMaxLimPct', 'Active power limit in 0.01% of nominal power', self.SETPOINT_REGISTER_INDEX, a_slave_address, SitModbusRegister.ACCESS_MODE_RW, '%'))
+
+#################### END CLASS ######################
+
+def main():
+	"""
+	Main method
+	"""
+	l_parser = argparse.ArgumentParser(description='Latency of SitCurtailmentDispatcher against Modbus TCP gateway emulators')
+	l_parser.add_argument('--sites', type=int, default=3)
+	l_parser.add_argument('--gateways', help='Gateways per site', type=int, default=10)
+	l_parser.add_argument('--units', help='Unit ids behind each gateway as 1-4 or 1,3', default='1-4')
+	l_parser.add_argument('--response_delay', help='Seconds a gateway takes to answer', type=float, default=SitModbusTcpGatewayEmulator.DEFAULT_RESPONSE_DELAY)
+	l_parser.add_argument('--drop_ratio', help='Ratio of requests not answered by gateways', type=float, default=0.02)
+	l_parser.add_argument('--concurrency', type=int, default=SitCurtailmentDispatcher.DEFAULT_MAX_CONCURRENCY)
+	l_parser.add_argument('--gateway_concurrency', type=int, default=SitCurtailmentDispatcher.DEFAULT_GATEWAY_CONCURRENCY)
+	l_parser.add_argument('--sla', type=float, default=SitCurtailmentDispatcher.DEFAULT_SLA_SECONDS)
+	l_args = l_parser.parse_args()
+
+	l_units = SitUtils.args_to_list(l_args.units)
+	l_emulators = []
+	l_sites = OrderedDict()
+	for l_site_index in range(l_args.sites):
+		for l_gateway_index in range(l_args.gateways):
+			l_emulator = SitModbusTcpGatewayEmulator(l_units, l_args.response_delay, l_args.drop_ratio, '127.0.{}.{}'.format(l_site_index + 1, l_gateway_index + 1))
+			l_emulator.start()
+			l_emulators.append((l_site_index, l_emulator))
+			l_sites.setdefault('site_{}'.format(l_site_index), []).extend(SitCurtailmentEmulatedDevice(l_unit, l_emulator.host, l_emulator.port) for l_unit in l_units)
+	l_setpoints = OrderedDict((l_site, random.choice([0, 30, 60, 100])) for l_site in l_sites.keys())
+
+	l_dispatcher = SitCurtailmentDispatcher(l_sites, a_max_concurrency=l_args.concurrency, a_gateway_concurrency=l_args.gateway_concurrency)
+	try:
+		l_report = SitCurtailmentDispatcher.report(l_dispatcher.dispatch(l_setpoints), l_args.sla)
+	finally:
+		l_dispatcher.close()
+		for l_site_index, l_emulator in l_emulators:
+			l_emulator.stop()
+	l_mismatches_count = sum(1 for l_site_index, l_emulator in l_emulators for l_unit in l_units
+			if l_emulator.register_value(l_unit, SitCurtailmentEmulatedDevice.SETPOINT_REGISTER_INDEX) != l_setpoints['site_{}'.format(l_site_index)] * SitCurtailmentEmulatedDevice._curtailment_setpoint_value_per_percent)
+	l_report['setpoints'] = l_setpoints
+	l_report['requests'] = sum(l_emulator.requests_count for l_site_index, l_emulator in l_emulators)
+	l_report['dropped'] = sum(l_emulator.dropped_count for l_site_index, l_emulator in l_emulators)
+	l_report['mismatches'] = l_mismatches_count # emulated registers not holding the setpoint of their site
+	del l_report['results']
+	print(json.dumps(l_report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -61,10 +61,10 @@ class SitEvent(object):
 
 	@property
 	def method_to_call(self):
-		return self._logger
+		return self._method_to_call
 
 	@method_to_call.setter
-	def logger(self, v):
+	def method_to_call(self, v):
 		self._method_to_call = v
 
 
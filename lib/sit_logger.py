@@ -56,6 +56,7 @@ class SitLogger(object):
 # VARIABLES
 	__logger = None
 	__log_directory = DEFAULT_LOG_DIRECTORY
+	__is_log_directory_checked = False # the directory is checked once per process, not by each register or event
 
 
 # FUNCTIONS DEFINITION 
@@ -65,10 +66,12 @@ class SitLogger(object):
 			Initialize
 		"""
 		try:
-			if not os.path.isdir(self.__log_directory):
-				l_msg = 'log file path not found, check if it has been created -%s-' % self.__log_directory
-				print(l_msg)
-				exit(1)
+			if not SitLogger.__is_log_directory_checked:
+				if not os.path.isdir(self.__log_directory):
+					l_msg = 'log file path not found, check if it has been created -%s-' % self.__log_directory
+					print(l_msg)
+					exit(1)
+				SitLogger.__is_log_directory_checked = True
 			#*** Logger
 			#self.__logger = self.new_logger(__name__)
 		except OSError as l_e:
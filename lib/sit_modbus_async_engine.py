@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Asyncio engine reading many SitModbusDevice (ip, unit) targets concurrently over
+#			SitModbusAsyncTcpClient connections, with a limit of outstanding requests per (ip, port).
+#			Reuses SitModbusDevice.read_all_sit_modbus_registers_steps so register maps and decoding are the same
+#			as the blocking API, read_all_devices_blocking is the blocking entry point
+#			SitModbusDevice.read_all_sit_modbus_registers is not routed through this engine, it also serves rtu, broker,
+#			pipelined and pooled connections which SitModbusAsyncTcpClient does not speak, both share the read steps instead
+#			retries, circuit breaker and learned timeouts are the ones of SitModbusDevice.register_value (SitModbusSlaveHealth)
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import asyncio
+	import time
+	from pymodbus.exceptions import ModbusException, ConnectionException
+	from pymodbus.pdu import ExceptionResponse
+	from sit_logger import SitLogger
+	from sit_modbus_device import SitModbusDevice
+	from sit_modbus_async_tcp_client import SitModbusAsyncTcpClient
+	from sit_modbus_exception_response_error import SitModbusExceptionResponseError
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusAsyncEngine(object):
+
+# CONSTANTS
+	DEFAULT_MAX_REQUESTS_PER_TARGET = 1 # outstanding requests per (ip, port), most gateways answer one at a time
+
+# VARIABLES
+	_logger = None
+	_max_requests_per_target = DEFAULT_MAX_REQUESTS_PER_TARGET
+	_timeout = SitModbusAsyncTcpClient.DEFAULT_TIMEOUT # seconds, connect timeout, requests use the timeout learned per slave
+	_clients = None # dict (ip, port) => SitModbusAsyncTcpClient
+	_semaphores = None # dict (ip, port) => asyncio.Semaphore
+
+# SETTERS AND GETTERS
+
+	@property
+	def max_requests_per_target(self):
+		return self._max_requests_per_target
+
+# INITIALIZE
+
+	def __init__(self, a_max_requests_per_target=DEFAULT_MAX_REQUESTS_PER_TARGET, a_timeout=SitModbusAsyncTcpClient.DEFAULT_TIMEOUT):
+		"""
+			Initialize
+		"""
+		assert a_max_requests_per_target > 0, 'a_max_requests_per_target > 0:{}'.format(a_max_requests_per_target)
+		self._logger = SitLogger().new_logger(__name__)
+		self._max_requests_per_target = a_max_requests_per_target
+		self._timeout = a_timeout
+		self._clients = {}
+		self._semaphores = {}
+
+# CONNECTION
+
+	def target_key(self, a_sit_modbus_device):
+		assert isinstance(a_sit_modbus_device, SitModbusDevice), 'a_sit_modbus_device is a SitModbusDevice'
+		assert a_sit_modbus_device.target_mode == SitModbusDevice.TARGET_MODE_TCP, 'only tcp targets are read asynchronously'
+		return (a_sit_modbus_device.target_ip, int(a_sit_modbus_device.target_port))
+
+	async def client(self, a_sit_modbus_device):
+		"""
+		Returns the connected client of the target of given device, one per (ip, port)
+		"""
+		l_key = self.target_key(a_sit_modbus_device)
+		if l_key not in self._clients:
+			self._clients[l_key] = SitModbusAsyncTcpClient(l_key[0], l_key[1], self._timeout)
+			self._semaphores[l_key] = asyncio.Semaphore(self._max_requests_per_target)
+		l_client = self._clients[l_key]
+		await l_client.ensure_connected()
+
+		return l_client
+
+	async def reconnect(self, a_sit_modbus_device):
+		"""
+		Asynchronous SitModbusDevice.reconnect, after a ConnectionException the next try connects again
+			a failing connect is only logged, the next try raises it
+		"""
+		l_client = self._clients.get(self.target_key(a_sit_modbus_device))
+		if l_client is None:
+			return
+		try:
+			await l_client.ensure_connected()
+		except ConnectionException as l_e:
+			self._logger.error('reconnect-> could not reconnect {}:{} msg:{}'.format(l_client.host, l_client.port, l_e))
+
+	async def close(self):
+		"""
+		Closes all clients
+		"""
+		for l_client in self._clients.values():
+			await l_client.close()
+		self._clients = {}
+		self._semaphores = {}
+
+# READ
+
+	async def register_value(self, a_sit_modbus_device, a_register_index, a_register_length, a_slave_address):
+		"""
+		Asynchronous SitModbusDevice.register_value, same retry policy and timeouts
+		"""
+		assert a_sit_modbus_device.valid_slave_address(a_slave_address), 'register_value->Slave address is not valid:' + str(a_slave_address)
+		l_register_index = a_sit_modbus_device.modbus_register_index(a_register_index)
+		l_slave_health = a_sit_modbus_device.slave_health(a_slave_address)
+		l_max_retries_count = l_slave_health.start_request(a_sit_modbus_device.MAX_MODBUS_REGISTER_RETRIES_COUNT)
+		l_retries_count = 0
+		while True:
+			try:
+				l_client = await self.client(a_sit_modbus_device)
+				l_timeout = a_sit_modbus_device.learned_request_timeout(l_slave_health, l_retries_count)
+				async with self._semaphores[self.target_key(a_sit_modbus_device)]:
+					l_start_time = time.monotonic()
+					l_result = await l_client.read_holding_registers(l_register_index, a_register_length, unit=a_slave_address, a_timeout=l_timeout)
+					l_slave_health.record_round_trip(time.monotonic() - l_start_time)
+				if isinstance(l_result, ExceptionResponse):
+					raise SitModbusExceptionResponseError(l_result.exception_code, a_register_index, a_slave_address)
+				if not hasattr(l_result, 'registers') or len(l_result.registers) != a_register_length:
+					raise ModbusException('register_value-> invalid response slave:{} register:{} length:{}'.format(a_slave_address, l_register_index, a_register_length))
+				l_slave_health.record_success()
+				return l_result
+			except ModbusException as l_e:
+				l_retries_count += 1
+				if not l_slave_health.is_retry_after(l_e, l_retries_count, l_max_retries_count):
+					self._logger.error('register_value-> error with ModbusException not retrying but raising, msg:{}'.format(l_e))
+					raise l_e
+				self._logger.error('register_value-> error with ModbusException retrying {} msg:{}'.format(l_retries_count, l_e))
+				if isinstance(l_e, ConnectionException):
+					await self.reconnect(a_sit_modbus_device)
+				await asyncio.sleep(l_slave_health.retry_delay(l_retries_count))
+
+	async def read_block_result(self, a_sit_modbus_device, a_read_block):
+		"""
+		Asynchronous SitModbusDevice.read_block_result
+		"""
+		try:
+			return await self.register_value(a_sit_modbus_device, a_read_block.register_index, a_read_block.words_count, a_read_block.slave_address)
+		except ModbusException as l_e:
+			return l_e
+
+	async def run_read_steps(self, a_sit_modbus_device, a_read_steps):
+		"""
+		Asynchronous SitModbusDevice.run_read_steps, the blocks of a step are read concurrently
+		"""
+		l_results = None
+		try:
+			while True:
+				l_read_blocks = a_read_steps.send(l_results)
+				l_results = await asyncio.gather(*[self.read_block_result(a_sit_modbus_device, l_read_block) for l_read_block in l_read_blocks])
+		except StopIteration:
+			pass
+
+	async def read_all(self, a_sit_modbus_device):
+		"""
+		Asynchronous SitModbusDevice.read_all_sit_modbus_registers
+		"""
+		await self.run_read_steps(a_sit_modbus_device, a_sit_modbus_device.read_all_sit_modbus_registers_steps())
+
+	async def read_all_devices(self, some_sit_modbus_devices):
+		"""
+		Reads concurrently all given devices, returns a list with None or the raised exception for each device
+		"""
+		l_res = await asyncio.gather(*[self.read_all(l_device) for l_device in some_sit_modbus_devices], return_exceptions=True)
+		for l_device, l_result in zip(some_sit_modbus_devices, l_res):
+			if isinstance(l_result, Exception):
+				self._logger.error('read_all_devices-> error reading {} {}:{} msg:{}'.format(l_device.__class__.__name__, l_device.target_ip, l_device.target_port, l_result))
+
+		return l_res
+
+	def read_all_devices_blocking(self, some_sit_modbus_devices):
+		"""
+		Blocking read_all_devices, closes clients at the end
+		"""
+		async def l_read_and_close():
+			try:
+				return await self.read_all_devices(some_sit_modbus_devices)
+			finally:
+				await self.close()
+
+		return asyncio.run(l_read_and_close())
+
+#################### END CLASS ######################
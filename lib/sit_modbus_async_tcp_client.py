@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Modbus TCP client on asyncio streams, several requests can be outstanding on the
+#			connection, responses are matched by transaction id. Used by sit_modbus_async_engine.py
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import asyncio
+	import struct
+	from pymodbus.factory import ClientDecoder
+	from pymodbus.exceptions import ConnectionException, ModbusIOException
+	from pymodbus.register_read_message import ReadHoldingRegistersRequest
+	from sit_logger import SitLogger
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusAsyncTcpClient(object):
+
+# CONSTANTS
+	MBAP_HEADER = struct.Struct('>HHHB') # transaction id, protocol id, length, unit id
+	MAX_TRANSACTION_ID = 0xFFFF
+	DEFAULT_TIMEOUT = 3 # seconds
+
+# VARIABLES
+	_logger = None
+	_host = None
+	_port = None
+	_timeout = DEFAULT_TIMEOUT
+	_reader = None
+	_writer = None
+	_reader_task = None
+	_connect_lock = None # asyncio.Lock, created into the running loop
+	_decoder = None
+	_transaction_id = 0
+	_pending_futures = None # dict transaction_id => asyncio.Future
+
+# SETTERS AND GETTERS
+
+	@property
+	def host(self):
+		return self._host
+
+	@property
+	def port(self):
+		return self._port
+
+	@property
+	def timeout(self):
+		return self._timeout
+
+# INITIALIZE
+
+	def __init__(self, a_host, a_port, a_timeout=DEFAULT_TIMEOUT):
+		"""
+			Initialize, connect() has to be awaited before reading
+		"""
+		assert a_timeout > 0, 'a_timeout > 0:{}'.format(a_timeout)
+		self._logger = SitLogger().new_logger(__name__)
+		self._host = a_host
+		self._port = int(a_port)
+		self._timeout = a_timeout
+		self._decoder = ClientDecoder()
+		self._pending_futures = {}
+
+# CONNECTION
+
+	def is_connected(self):
+		return self._writer is not None and not self._writer.is_closing()
+
+	async def connect(self):
+		"""
+		Opens the connection and starts reading responses
+		"""
+		assert not self.is_connected(), 'not connected'
+		try:
+			self._reader, self._writer = await asyncio.wait_for(asyncio.open_connection(self._host, self._port), self._timeout)
+		except (OSError, asyncio.TimeoutError) as l_e:
+			raise ConnectionException('connect-> could not connect to {}:{} msg:{}'.format(self._host, self._port, l_e))
+		self._reader_task = asyncio.ensure_future(self._read_responses())
+		self._logger.info('connect-> Connection success {}:{}'.format(self._host, self._port))
+
+	async def ensure_connected(self):
+		"""
+		Connects if not connected, concurrent callers wait for the same connection
+		"""
+		if self._connect_lock is None:
+			self._connect_lock = asyncio.Lock()
+		async with self._connect_lock:
+			if not self.is_connected():
+				await self.close()
+				await self.connect()
+
+	async def close(self):
+		"""
+		Closes the connection, pending requests get a ConnectionException
+		"""
+		if self._reader_task is not None:
+			self._reader_task.cancel()
+			try:
+				await self._reader_task
+			except asyncio.CancelledError:
+				pass
+			self._reader_task = None
+		if self._writer is not None:
+			self._writer.close()
+			self._writer = None
+		self._fail_pending_futures(ConnectionException('close-> connection closed {}:{}'.format(self._host, self._port)))
+
+# READ
+
+	async def read_holding_registers(self, an_address, a_count, unit, a_timeout=None):
+		"""
+		Returns the ReadHoldingRegistersResponse (or ExceptionResponse) of given request
+			raises ConnectionException if not connected or the connection is lost, ModbusIOException on timeout
+			@param a_timeout: seconds, self._timeout if None
+		"""
+		if a_timeout is None:
+			a_timeout = self._timeout
+		if not self.is_connected():
+			raise ConnectionException('read_holding_registers-> not connected to {}:{}'.format(self._host, self._port))
+		l_request = ReadHoldingRegistersRequest(an_address, a_count, unit=unit)
+		l_transaction_id = self._next_transaction_id()
+		l_pdu = struct.pack('>B', l_request.function_code) + l_request.encode()
+		l_future = asyncio.get_event_loop().create_future()
+		self._pending_futures[l_transaction_id] = l_future
+		self._writer.write(self.MBAP_HEADER.pack(l_transaction_id, 0, len(l_pdu) + 1, unit) + l_pdu)
+		try:
+			await self._writer.drain()
+			return await asyncio.wait_for(l_future, a_timeout)
+		except OSError as l_e:
+			self._writer.close() # is_connected is False, ensure_connected connects again
+			raise ConnectionException('read_holding_registers-> connection lost {}:{} msg:{}'.format(self._host, self._port, l_e))
+		except asyncio.TimeoutError:
+			raise ModbusIOException('read_holding_registers-> no response in {}s from {}:{} unit:{} address:{}'.format(a_timeout, self._host, self._port, unit, an_address))
+		finally:
+			self._pending_futures.pop(l_transaction_id, None)
+
+	def _next_transaction_id(self):
+		self._transaction_id = self._transaction_id % self.MAX_TRANSACTION_ID + 1
+		return self._transaction_id
+
+	async def _read_responses(self):
+		"""
+		Reads responses until the connection is closed and resolves the futures waiting for them
+		"""
+		try:
+			while True:
+				l_header = await self._reader.readexactly(self.MBAP_HEADER.size)
+				l_transaction_id, l_protocol_id, l_length, l_unit = self.MBAP_HEADER.unpack(l_header)
+				l_pdu = await self._reader.readexactly(l_length - 1)
+				l_response = self._decoder.decode(l_pdu)
+				l_future = self._pending_futures.get(l_transaction_id)
+				if l_response is None or l_future is None or l_future.done():
+					self._logger.warning('_read_responses-> ignoring unexpected response transaction_id:{} from {}:{}'.format(l_transaction_id, self._host, self._port))
+					continue
+				l_response.transaction_id = l_transaction_id
+				l_response.unit_id = l_unit
+				l_future.set_result(l_response)
+		except (asyncio.IncompleteReadError, OSError) as l_e:
+			self._logger.error('_read_responses-> connection lost {}:{} msg:{}'.format(self._host, self._port, l_e))
+			if self._writer is not None:
+				self._writer.close()
+			self._fail_pending_futures(ConnectionException('_read_responses-> connection lost {}:{}'.format(self._host, self._port)))
+
+	def _fail_pending_futures(self, an_exception):
+		for l_future in self._pending_futures.values():
+			if not l_future.done():
+				l_future.set_exception(an_exception)
+
+#################### END CLASS ######################
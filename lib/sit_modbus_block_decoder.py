@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Block decoder, compiles the registers of a SitModbusReadBlock into struct.Struct layouts
+#			so that one unpack_from decodes all registers of a response instead of one BinaryPayloadDecoder
+#			per register
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import struct
+	from pymodbus.constants import Endian
+	from sit_modbus_read_block import SitModbusReadBlock
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusBlockDecoder(object):
+
+# CONSTANTS
+	WORDS_STRUCT_FORMAT = '>{}H' # modbus words as sent on the wire
+
+# VARIABLES
+	_compiled_layouts = {} # layout key => (list of (struct.Struct, register positions, sentinel values)), fallback positions), shared by all instances
+	_read_block = None
+	_struct_passes = None # list of (struct.Struct, list of register positions into the block, list of unpacked sentinel or None)
+	_fallback_positions = None # positions of registers without struct_format, decoded by set_value_with_raw
+
+# SETTERS AND GETTERS
+
+	@property
+	def read_block(self):
+		return self._read_block
+
+	@property
+	def fallback_sit_modbus_registers(self):
+		"""
+		Registers of the block the decoder can not unpack, to decode with their set_value_with_raw
+		"""
+		return [self._read_block.sit_modbus_registers[l_pos] for l_pos in self._fallback_positions]
+
+# INITIALIZE
+
+	def __init__(self, a_read_block):
+		"""
+			Initialize with the layout of given block, compiled on first use of the same layout
+		"""
+		assert isinstance(a_read_block, SitModbusReadBlock), 'a_read_block is a SitModbusReadBlock'
+		self._read_block = a_read_block
+		l_key = self.layout_key(a_read_block)
+		if l_key not in self._compiled_layouts:
+			self._compiled_layouts[l_key] = self.compiled_layout(a_read_block)
+		self._struct_passes, self._fallback_positions = self._compiled_layouts[l_key]
+
+	@staticmethod
+	def layout_key(a_read_block):
+		"""
+		Key of the compiled layout, the same for blocks with registers of same types at same offsets
+		"""
+		return (a_read_block.words_count,) + tuple((a_read_block.register_offset(l_reg), l_reg.struct_format, l_reg.words_count, l_reg.byte_order, l_reg.word_order, l_reg.__class__) for l_reg in a_read_block.sit_modbus_registers)
+
+	@classmethod
+	def compiled_layout(cls, a_read_block):
+		"""
+		Returns (struct passes, fallback positions) of given block
+			registers are laid out in offset order into one struct.Struct, padding gaps with 'x',
+			a register overlapping the previous one (same index i.e.) goes into a further struct
+			only big endian byte and word orders are compiled, other registers fall back to set_value_with_raw
+		"""
+		l_passes = [] # list of [end offset in bytes, format, positions, sentinels]
+		l_fallback_positions = []
+		for l_pos, l_reg in enumerate(a_read_block.sit_modbus_registers):
+			if l_reg.struct_format is None or l_reg.byte_order != Endian.Big or l_reg.word_order != Endian.Big:
+				l_fallback_positions.append(l_pos)
+				continue
+			l_reg_struct = struct.Struct('>' + l_reg.struct_format)
+			assert l_reg_struct.size == l_reg.words_count * 2, 'struct_format of {} is {} bytes, not {} words'.format(l_reg.short_description, l_reg_struct.size, l_reg.words_count)
+			l_offset = a_read_block.register_offset(l_reg) * 2
+			l_pass = next((l_pass for l_pass in l_passes if l_pass[0] <= l_offset), None)
+			if l_pass is None:
+				l_pass = [0, '>', [], []]
+				l_passes.append(l_pass)
+			if l_offset > l_pass[0]:
+				l_pass[1] += '{}x'.format(l_offset - l_pass[0])
+			l_pass[1] += l_reg.struct_format
+			l_pass[0] = l_offset + l_reg_struct.size
+			l_pass[2].append(l_pos)
+			l_pass[3].append(cls.unpacked_sentinel(l_reg, l_reg_struct))
+
+		return [(struct.Struct(l_format), l_positions, l_sentinels) for l_end, l_format, l_positions, l_sentinels in l_passes], l_fallback_positions
+
+	@classmethod
+	def layout_data(cls, a_read_block):
+		"""
+		Returns the compiled layout of given block as json serializable data, see add_layout_data
+		"""
+		l_key = cls.layout_key(a_read_block)
+		if l_key not in cls._compiled_layouts:
+			cls._compiled_layouts[l_key] = cls.compiled_layout(a_read_block)
+		l_struct_passes, l_fallback_positions = cls._compiled_layouts[l_key]
+
+		return [[[l_struct.format, l_positions, l_sentinels] for l_struct, l_positions, l_sentinels in l_struct_passes], l_fallback_positions]
+
+	@classmethod
+	def add_layout_data(cls, a_read_block, some_layout_data):
+		"""
+		Sets the compiled layout of given block from data returned by layout_data (i.e. read from SitModbusReadPlanCache)
+		"""
+		l_key = cls.layout_key(a_read_block)
+		if l_key not in cls._compiled_layouts:
+			l_passes_data, l_fallback_positions = some_layout_data
+			cls._compiled_layouts[l_key] = ([(struct.Struct(l_format), l_positions, l_sentinels) for l_format, l_positions, l_sentinels in l_passes_data], l_fallback_positions)
+
+	@classmethod
+	def unpacked_sentinel(cls, a_sit_modbus_register, a_struct):
+		"""
+		Value unpacked from the sentinel words of given register, None if it has none
+		"""
+		l_sentinel_registers = a_sit_modbus_register.sentinel_registers
+		if l_sentinel_registers is None:
+			return None
+		return a_struct.unpack(struct.pack(cls.WORDS_STRUCT_FORMAT.format(len(l_sentinel_registers)), *l_sentinel_registers))[0]
+
+# DECODING
+
+	def unpacked_values(self, some_registers):
+		"""
+		Returns a list of (register, unpacked value, is sentinel) for each register of the block having a struct_format
+		@param some_registers: list of words of the read_holding_registers response of the block
+		"""
+		assert len(some_registers) >= self._read_block.words_count, 'response has {} words, block {}'.format(len(some_registers), self._read_block.words_count)
+		return self.unpacked_values_from_payload(memoryview(struct.pack(self.WORDS_STRUCT_FORMAT.format(len(some_registers)), *some_registers)))
+
+	def unpacked_values_from_payload(self, a_payload):
+		"""
+		Same as unpacked_values from the bytes of the registers as received (i.e. SitModbusFramedResponse.payload)
+		"""
+		assert len(a_payload) >= self._read_block.words_count * 2, 'payload has {} bytes, block {} words'.format(len(a_payload), self._read_block.words_count)
+		l_sit_regs = self._read_block.sit_modbus_registers
+		l_res = []
+		for l_struct, l_positions, l_sentinels in self._struct_passes:
+			for l_pos, l_sentinel, l_value in zip(l_positions, l_sentinels, l_struct.unpack_from(a_payload)):
+				l_res.append((l_sit_regs[l_pos], l_value, l_sentinel is not None and l_value == l_sentinel))
+
+		return l_res
+
+#################### END CLASS ######################
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: pymodbus TCP client whose socket is a Unix socket to SitModbusConnectionBroker, which relays
+#			the Modbus TCP frames to its persistent connection to the target (gateway or serial port),
+#			see SitModbusDevice.broker_modbus_client
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import socket
+	import json
+	from pymodbus.client.sync import ModbusTcpClient
+	from sit_logger import SitLogger
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusBrokerClient(ModbusTcpClient):
+
+# CONSTANTS
+	DEFAULT_SOCKET_PATH = '/var/run/solarity/modbus_broker.sock'
+	HANDSHAKE_OK = b'OK'
+	MAX_HANDSHAKE_ANSWER_SIZE = 1024
+	PRIORITY_PROTOCOL_ID_OFFSET = 1 # MBAP protocol id sent to the broker is the request priority + 1, 0 (modbus) meaning none
+
+# VARIABLES
+	_logger = None
+	_socket_path = None
+	_target = None # dict sent to the broker on connection, see SitModbusConnectionBroker.target_key
+	_request_priority = None # SitModbusRequestPriority.PRIORITY_* of the next requests, None to let the broker classify them
+
+# SETTERS AND GETTERS
+
+	@property
+	def socket_path(self):
+		return self._socket_path
+
+	@property
+	def target(self):
+		return self._target
+
+	@property
+	def request_priority(self):
+		return self._request_priority
+
+	@request_priority.setter
+	def request_priority(self, v):
+		self._request_priority = v
+
+# INITIALIZE
+
+	def __init__(self, a_socket_path, a_target, **some_kwargs):
+		"""
+			Initialize
+			@param a_target: dict with target_mode (tcp or rtu) and the parameters of the connection of the broker to the target
+		"""
+		self._logger = SitLogger().new_logger(__name__)
+		self._socket_path = a_socket_path
+		self._target = a_target
+		super().__init__('localhost', **some_kwargs) # host is only used by pymodbus into messages
+
+# CONNECTION
+
+	def connect(self):
+		"""
+		Connects to the broker and sends it the target, returns True if the broker accepted it
+		"""
+		if self.socket:
+			return True
+		l_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		try:
+			l_socket.settimeout(self.timeout)
+			l_socket.connect(self._socket_path)
+			l_socket.sendall((json.dumps(self._target) + '\n').encode())
+			l_answer = self._handshake_answer(l_socket)
+			if l_answer != self.HANDSHAKE_OK:
+				self._logger.warning('connect-> broker {} refused target:{} answer:{}'.format(self._socket_path, self._target, l_answer))
+				l_socket.close()
+				return False
+		except OSError as l_e:
+			self._logger.warning('connect-> could not connect to broker {}:{}'.format(self._socket_path, l_e))
+			l_socket.close()
+			return False
+		self.socket = l_socket
+
+		return True
+
+	def _handshake_answer(self, a_socket):
+		"""
+		Returns the line answered by the broker to the target, without line feed
+		"""
+		l_res = b''
+		while not l_res.endswith(b'\n') and len(l_res) < self.MAX_HANDSHAKE_ANSWER_SIZE:
+			l_data = a_socket.recv(self.MAX_HANDSHAKE_ANSWER_SIZE - len(l_res))
+			if l_data == b'':
+				break
+			l_res += l_data
+
+		return l_res.rstrip(b'\n')
+
+# REQUESTS
+
+	def execute(self, request=None):
+		"""
+		Sends given request with request_priority into its MBAP protocol id, the broker being the only reader of it
+		"""
+		if request is not None and self._request_priority is not None:
+			request.protocol_id = self._request_priority + self.PRIORITY_PROTOCOL_ID_OFFSET
+		return super().execute(request)
+
+# OUTPUT
+
+	def __str__(self):
+		return 'SitModbusBrokerClient({} {})'.format(self._socket_path, self._target)
+
+#################### END CLASS ######################
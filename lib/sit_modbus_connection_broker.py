@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Local broker keeping one persistent modbus connection per target (tcp ip and port or rtu serial
+#			port) for drivers invoked by cron. Drivers connect to its Unix socket, send their target as a json
+#			line, then speak Modbus TCP, each request is executed on the connection of the target, one at a time.
+#			A serial port is owned by one SitModbusRtuBus queuing the requests of all drivers using it.
+#			SitModbusDevice.connect uses it when its socket exists and connects directly otherwise.
+#
+#       CALL SAMPLE:
+#			sudo python3 lib/sit_modbus_connection_broker.py --socket_path /var/run/solarity/modbus_broker.sock
+#			python3 lib/sit_modbus_connection_broker.py --status # utilisation of the rtu buses of the running broker
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import logging # http://www.onlamp.com/pub/a/python/2005/06/02/logging.html
+	import argparse
+	import json
+	import signal
+	import socket
+	import struct
+	import threading
+	import serial
+	from pymodbus.client.sync import ModbusTcpClient
+	from pymodbus.exceptions import ModbusException
+	from pymodbus.factory import ServerDecoder
+	from pymodbus.pdu import ExceptionResponse
+	from sit_logger import SitLogger
+	from sit_constants import SitConstants
+	from sit_modbus_broker_client import SitModbusBrokerClient
+	from sit_modbus_exception_response_error import SitModbusExceptionResponseError
+	from sit_modbus_rtu_bus import SitModbusRtuBus
+	from sit_modbus_priority_lock import SitModbusPriorityLock
+	from sit_modbus_request_priority import SitModbusRequestPriority
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusConnectionBroker(object):
+
+# CONSTANTS
+	MBAP_HEADER = struct.Struct('>HHHB') # transaction id, protocol id, length, unit id
+	MAX_HANDSHAKE_SIZE = 1024
+	TARGET_MODE_STATUS = 'status' # sent instead of a target to get the status of the broker
+	PARSER_DESCRIPTION = 'Keeps modbus connections open for drivers invoked by cron. ' + SitConstants.DEFAULT_HELP_LICENSE_NOTICE
+
+# VARIABLES
+	_logger = None
+	_socket_path = None
+	_server_socket = None
+	_stop_event = None
+	_targets = None # dict target key => [ModbusTcpClient, SitModbusPriorityLock of its requests] or [SitModbusRtuBus, None]
+	_targets_lock = None
+
+# SETTERS AND GETTERS
+
+	@property
+	def socket_path(self):
+		return self._socket_path
+
+	@property
+	def target_keys(self):
+		return list(self._targets.keys())
+
+# INITIALIZE
+
+	def __init__(self, a_socket_path=SitModbusBrokerClient.DEFAULT_SOCKET_PATH):
+		"""
+			Initialize
+		"""
+		self._logger = SitLogger().new_logger(__name__)
+		self._socket_path = a_socket_path
+		self._stop_event = threading.Event()
+		self._targets = {}
+		self._targets_lock = threading.Lock()
+
+		self.invariants()
+
+	@staticmethod
+	def target_key(a_target):
+		"""
+		Key of the connection of given target sent by SitModbusBrokerClient, all devices of a gateway or serial port share it
+		"""
+		if a_target['target_mode'] == 'tcp':
+			return ('tcp', a_target['ip'], int(a_target['port']))
+		assert a_target['target_mode'] == 'rtu', 'target_mode tcp or rtu:{}'.format(a_target['target_mode'])
+		return ('rtu', str(a_target['port']))
+
+	@staticmethod
+	def line_settings(a_target):
+		"""
+		(baudrate, parity, stopbits, bytesize) of given rtu target
+		"""
+		return (int(a_target['baudrate']), a_target['parity'], a_target['stopbits'], int(a_target['bytesize']))
+
+	def _target(self, a_target):
+		"""
+		Returns [modbus client, lock] of given tcp target, the client is created on first use and connected by execute,
+			or [SitModbusRtuBus, None] of given rtu target, the serial port is opened on first use
+		"""
+		l_key = self.target_key(a_target)
+		with self._targets_lock:
+			if l_key not in self._targets:
+				if l_key[0] == 'tcp':
+					self._targets[l_key] = [ModbusTcpClient(a_target['ip'], port=int(a_target['port']), timeout=a_target['timeout']), SitModbusPriorityLock()]
+				else:
+					l_baudrate, l_parity, l_stopbits, l_bytesize = self.line_settings(a_target)
+					l_serial = serial.Serial(port=a_target['port'], baudrate=l_baudrate, parity=l_parity, stopbits=l_stopbits, bytesize=l_bytesize, timeout=a_target['timeout'])
+					self._targets[l_key] = [SitModbusRtuBus(a_target['port'], l_serial), None]
+				self._logger.info('_target-> new connection to {}'.format(l_key))
+
+			return self._targets[l_key]
+
+	def status(self):
+		"""
+		Returns a json serializable dict with the connected targets with their queueing delays per priority and the status of each rtu bus
+		"""
+		with self._targets_lock:
+			l_entries = list(self._targets.items())
+
+		return {'tcp_targets': {'{}:{}'.format(l_key[1], l_key[2]): l_entry[1].status() for l_key, l_entry in l_entries if l_key[0] == 'tcp'},
+				'rtu_buses': [l_entry[0].status() for l_key, l_entry in l_entries if l_key[0] == 'rtu']}
+
+	@classmethod
+	def running_status(cls, a_socket_path=SitModbusBrokerClient.DEFAULT_SOCKET_PATH):
+		"""
+		Returns the status of the broker listening on given socket
+		"""
+		l_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		try:
+			l_socket.connect(a_socket_path)
+			l_socket.sendall((json.dumps({'target_mode': cls.TARGET_MODE_STATUS}) + '\n').encode())
+			l_res = b''
+			while not l_res.endswith(b'\n'):
+				l_data = l_socket.recv(4096)
+				if l_data == b'':
+					break
+				l_res += l_data
+		finally:
+			l_socket.close()
+
+		return json.loads(l_res.decode())
+
+# SERVING
+
+	def serve(self):
+		"""
+		Accepts drivers on the Unix socket until stop(), one thread per driver connection
+		"""
+		if os.path.exists(self._socket_path):
+			os.remove(self._socket_path) # left by a broker which did not stop cleanly
+		os.makedirs(os.path.dirname(self._socket_path), exist_ok=True)
+		self._server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self._server_socket.bind(self._socket_path)
+		self._server_socket.listen()
+		self._server_socket.settimeout(1) # to check _stop_event
+		self._logger.info('serve-> listening on {}'.format(self._socket_path))
+		try:
+			while not self._stop_event.is_set():
+				try:
+					l_connection, l_address = self._server_socket.accept()
+				except socket.timeout:
+					continue
+				threading.Thread(target=self._serve_connection, args=(l_connection,), name='broker_connection', daemon=True).start()
+		finally:
+			self._server_socket.close()
+			os.remove(self._socket_path)
+			self.close_targets()
+			self._logger.info('serve-> stopped')
+
+	def stop(self):
+		"""
+		Makes serve return within a second
+		"""
+		self._stop_event.set()
+
+	def close_targets(self):
+		with self._targets_lock:
+			for l_client, l_lock in self._targets.values():
+				if l_lock is None:
+					l_client.close()
+					continue
+				with l_lock.lane(SitModbusRequestPriority.PRIORITY_CONTROL):
+					l_client.close()
+
+	def _serve_connection(self, a_connection):
+		"""
+		Reads the target of the driver, then executes its requests until it disconnects
+		"""
+		try:
+			a_connection.settimeout(None)
+			try:
+				l_target = json.loads(self._recv_line(a_connection).decode())
+				if l_target.get('target_mode') == self.TARGET_MODE_STATUS:
+					a_connection.sendall((json.dumps(self.status()) + '\n').encode())
+					return
+				l_target_entry = self._target(l_target)
+			except (ValueError, KeyError, AssertionError) as l_e:
+				self._logger.warning('_serve_connection-> invalid target:{}'.format(l_e))
+				a_connection.sendall('ERROR {}\n'.format(l_e).encode())
+				return
+			a_connection.sendall(SitModbusBrokerClient.HANDSHAKE_OK + b'\n')
+			while True:
+				l_header = self._recv_exactly(a_connection, self.MBAP_HEADER.size)
+				if l_header is None:
+					break
+				l_transaction_id, l_protocol_id, l_length, l_unit = self.MBAP_HEADER.unpack(l_header)
+				l_pdu = self._recv_exactly(a_connection, l_length - 1)
+				if l_pdu is None:
+					break
+				l_priority = self.request_priority(l_pdu, l_protocol_id)
+				if l_target_entry[1] is None:
+					l_response_pdu = l_target_entry[0].execute(l_unit, l_pdu, self.line_settings(l_target), l_target['timeout'], l_priority)
+					if l_response_pdu is None:
+						l_response_pdu = self._exception_pdu(l_pdu[0], SitModbusExceptionResponseError.GATEWAY_NO_RESPONSE)
+				else:
+					l_response_pdu = self._response_pdu(l_target_entry, l_unit, l_pdu, l_priority)
+				a_connection.sendall(self.MBAP_HEADER.pack(l_transaction_id, l_protocol_id, len(l_response_pdu) + 1, l_unit) + l_response_pdu)
+		except OSError as l_e:
+			self._logger.warning('_serve_connection-> driver connection closed:{}'.format(l_e))
+		finally:
+			a_connection.close()
+
+	@staticmethod
+	def request_priority(a_pdu, a_protocol_id):
+		"""
+		SitModbusRequestPriority.PRIORITY_* of given request: control for writes, else the one sent by SitModbusBrokerClient
+			into the MBAP protocol id, fast read if none
+		"""
+		l_read_priority = a_protocol_id - SitModbusBrokerClient.PRIORITY_PROTOCOL_ID_OFFSET
+		if not SitModbusRequestPriority.valid_priority(l_read_priority):
+			l_read_priority = SitModbusRequestPriority.PRIORITY_FAST_READ
+
+		return SitModbusRequestPriority.pdu_priority(a_pdu, l_read_priority)
+
+	def _response_pdu(self, a_target_entry, a_unit, a_pdu, a_priority=SitModbusRequestPriority.PRIORITY_FAST_READ):
+		"""
+		Executes the request of given pdu on the tcp connection of the target once requests of higher priority are done,
+			returns the pdu of its response
+			an exception response GATEWAY_NO_RESPONSE is returned if the target does not answer, as a modbus gateway would
+		"""
+		l_request = ServerDecoder().decode(a_pdu)
+		if l_request is None:
+			return self._exception_pdu(a_pdu[0], SitModbusExceptionResponseError.ILLEGAL_FUNCTION)
+		l_request.unit_id = a_unit
+		l_client, l_lock = a_target_entry
+		with l_lock.lane(a_priority):
+			try:
+				if l_client.socket is None and not l_client.connect():
+					raise ModbusException('could not connect to {}'.format(l_client))
+				l_response = l_client.execute(l_request)
+			except (ModbusException, OSError) as l_e:
+				self._logger.error('_response_pdu-> request to {} failed, closing connection:{}'.format(l_client, l_e))
+				l_client.close()
+				l_response = None
+		if l_response is None or not hasattr(l_response, 'function_code'):
+			return self._exception_pdu(l_request.function_code, SitModbusExceptionResponseError.GATEWAY_NO_RESPONSE)
+
+		return struct.pack('>B', l_response.function_code) + l_response.encode()
+
+	@staticmethod
+	def _exception_pdu(a_function_code, an_exception_code):
+		l_response = ExceptionResponse(a_function_code, an_exception_code)
+		return struct.pack('>B', l_response.function_code) + l_response.encode()
+
+	def _recv_line(self, a_connection):
+		l_res = b''
+		while not l_res.endswith(b'\n'):
+			l_data = a_connection.recv(1)
+			if l_data == b'' or len(l_res) >= self.MAX_HANDSHAKE_SIZE:
+				raise ValueError('no target line received')
+			l_res += l_data
+
+		return l_res
+
+	@staticmethod
+	def _recv_exactly(a_connection, a_size):
+		"""
+		Returns a_size bytes received, None if the driver disconnected
+		"""
+		l_res = b''
+		while len(l_res) < a_size:
+			l_data = a_connection.recv(a_size - len(l_res))
+			if l_data == b'':
+				return None
+			l_res += l_data
+
+		return l_res
+
+# INVARIANTS
+
+	def invariants(self):
+		assert self._socket_path is not None, 'socket_path not None'
+
+#################### END CLASS ######################
+
+def main():
+	"""
+	Main method
+	"""
+	logger = logging.getLogger(__name__)
+	l_parser = argparse.ArgumentParser(description=SitModbusConnectionBroker.PARSER_DESCRIPTION)
+	l_parser.add_argument('--socket_path', help='Unix socket of the broker, default:{}'.format(SitModbusBrokerClient.DEFAULT_SOCKET_PATH), default=SitModbusBrokerClient.DEFAULT_SOCKET_PATH)
+	l_parser.add_argument('--status', help='Prints the status of the running broker and exits', action='store_true')
+	l_args = l_parser.parse_args()
+	if l_args.status:
+		print(json.dumps(SitModbusConnectionBroker.running_status(l_args.socket_path), indent=2))
+		return
+
+	l_broker = SitModbusConnectionBroker(l_args.socket_path)
+	for l_signal in (signal.SIGTERM, signal.SIGINT):
+		signal.signal(l_signal, lambda a_signal_number, a_frame: l_broker.stop())
+	try:
+		l_broker.serve()
+	except Exception as l_e:
+		logger.exception('broker stopped on exception:{}'.format(l_e))
+		raise l_e
+
+
+if __name__ == '__main__':
+    main()
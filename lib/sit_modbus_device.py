@@ -44,6 +44,7 @@ try:
 	import os.path
 	import os, errno
 	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib')) #the way to import directories
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/register_types'))
 	import logging # http://www.onlamp.com/pub/a/python/2005/06/02/logging.html
 	from logging import handlers
 	import csv
@@ -55,20 +56,45 @@ try:
 	from pymodbus.client.sync import ModbusTcpClient # FOR TCP
 	from pymodbus.transaction import ModbusRtuFramer
 	from pymodbus.exceptions import ModbusException, ConnectionException
+	from pymodbus.register_read_message import ReadHoldingRegistersResponse
+	from pymodbus.register_write_message import WriteMultipleRegistersResponse
+	from pymodbus.pdu import ExceptionResponse
 	import time
+	import signal
+	import threading
 	import requests
 	import argparse
 	from datetime import datetime
 	import struct
+	import copy
+	import weakref
 	import json  #for pretty printing in log
+	from contextlib import contextmanager
 
-	from pymodbus.constants import Endian
+	from pymodbus.constants import Endian, Defaults
 	from pymodbus.payload import BinaryPayloadBuilder
 	from pymodbus.payload import BinaryPayloadDecoder
 	from collections import OrderedDict
 
 	from sit_logger import SitLogger
 	from sit_modbus_register import SitModbusRegister
+	from sit_modbus_read_planner import SitModbusReadPlanner
+	from sit_modbus_read_block import SitModbusReadBlock
+	from sit_modbus_block_decoder import SitModbusBlockDecoder
+	from sit_modbus_read_plan_cache import SitModbusReadPlanCache
+	from sit_modbus_exception_response_error import SitModbusExceptionResponseError
+	from sit_modbus_slave_health import SitModbusSlaveHealth
+	from sit_modbus_slave_unavailable_error import SitModbusSlaveUnavailableError
+	from sit_modbus_write_verification_error import SitModbusWriteVerificationError
+	from sit_modbus_pipelined_tcp_client import SitModbusPipelinedTcpClient
+	from sit_modbus_tcp_framer import SitModbusTcpFramer
+	from sit_modbus_framed_response import SitModbusFramedResponse
+	from sit_modbus_broker_client import SitModbusBrokerClient
+	from sit_modbus_tcp_connection_pool import SitModbusTcpConnectionPool
+	from sit_modbus_priority_lock import SitModbusPriorityLock
+	from sit_modbus_request_priority import SitModbusRequestPriority
+	from sit_unsupported_register_registry import SitUnsupportedRegisterRegistry
+	from register_type_int16_s import RegisterTypeInt16s
 	from sit_json_conf import SitJsonConf
 	from sit_constants import SitConstants
 
@@ -90,6 +116,17 @@ class SitModbusDevice (object):
 	DEFAULT_TARGET_PORT = 502
 	MAX_CONNECT_RETRIES_COUNT = 3
 	MAX_MODBUS_REGISTER_RETRIES_COUNT = 3
+	MAX_WRITE_BLOCK_WORDS_COUNT = 123 # Max registers count of a write_registers (FC16) request
+	DEFAULT_DAEMON_INTERVAL = 60 # seconds between two cycles of --daemon mode
+	DEFAULT_SLOW_POLL_PERIOD = 10 # cycles between two reads of slowly changing registers (counters, setpoints), see set_poll_period
+	DEFAULT_SCALE_FACTOR_TTL = 3600 # seconds a read scale factor is used before reading it again, 0 reads it every cycle
+	DEFAULT_MAX_UNCHANGED_DATA_AGE = 900 # seconds a change gated device skips cycles with an unchanged data sequence before reading all registers anyway
+	DEFAULT_MIN_REQUEST_TIMEOUT = 0.5 # seconds, lower bound of the timeout learned per slave, see SitModbusSlaveHealth.request_timeout
+	DEFAULT_MAX_REQUEST_TIMEOUT = 10 # seconds, upper bound, slow sensors behind serial gateways
+	DEFAULT_PIPELINE_WINDOW = 1 # requests outstanding on a TCP connection, 1 sends them one after the other
+	GATEWAY_PIPELINE_WINDOW = SitModbusPipelinedTcpClient.DEFAULT_WINDOW # for gateways accepting several outstanding transactions
+	DEFAULT_TCP_CONNECTION_POOL_SIZE = 1 # TCP connections to the target, 1 reads slaves one after the other
+	GATEWAY_TCP_CONNECTION_POOL_SIZE = SitModbusTcpConnectionPool.DEFAULT_SIZE # for gateways accepting several TCP clients
 
 	LOG_FILE_PATH = '/var/log/solarity'
 	DEFAULT_CSV_FILE_LOCATION = '/var/solarity' #without ending slash
@@ -98,6 +135,10 @@ class SitModbusDevice (object):
 # VARIABLES
 	_logger = None
 	_args = None
+	_forced_script_arguments = None # list parsed instead of sys.argv, see new_with_script_arguments
+	_sit_modbus_registers_by_key = None # dict slave address (or inverter index) => OrderedDict of registers, see use_sit_modbus_registers_of
+	_sit_modbus_register_templates = {} # shared by all instances: driver class => OrderedDict of template registers, see _init_sit_modbus_registers_from_template
+	_daemon_stop_event = None # threading.Event set by SIGTERM/SIGINT in --daemon mode
 	_console_handler = None
 	_file_handler = None
 
@@ -112,7 +153,10 @@ class SitModbusDevice (object):
 	_target_mode = DEFAULT_TARGET_MODE
 	_slave_address = None 
 	_client_connect_retries = 3
-	_rtu_timeout = 1 #seconds
+	_rtu_timeout = 1 #seconds, timeout of the first requests to a slave, then learned see request_timeout
+	_tcp_timeout = Defaults.Timeout #seconds, same as _rtu_timeout for TCP
+	_min_request_timeout = DEFAULT_MIN_REQUEST_TIMEOUT
+	_max_request_timeout = DEFAULT_MAX_REQUEST_TIMEOUT
 	_rtu_stopbits = 1
 	_rtu_bytesize = 8
 	_rtu_parity = 'E'
@@ -120,11 +164,74 @@ class SitModbusDevice (object):
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
 	_substract_one_to_register_index = False
-
+	_read_block_max_gap = SitModbusReadPlanner.DEFAULT_MAX_GAP # 0 to merge only adjacent registers
+	_read_planner = None
+	_write_planner = None
+	_read_plan_caches = {} # shared by all instances: driver class name => SitModbusReadPlanCache, see planned_read_blocks
+	_unsupported_register_registries = None # dict device_key => SitUnsupportedRegisterRegistry
+	_unsupported_register_registry = None # registry of the registers being read
+	_scale_factor_sit_modbus_registers = None # OrderedDict (slave_address, register_index) => RegisterTypeInt16s
+	_scale_factor_ttl = DEFAULT_SCALE_FACTOR_TTL
+	_pipeline_window = DEFAULT_PIPELINE_WINDOW # overriden by --pipeline_window
+	_pipelined_tcp_clients = {} # shared by all instances: ((ip, port), connection index) => SitModbusPipelinedTcpClient, see read_block_results
+	_is_tcp_framer_used = False # overriden by --tcp_framer
+	_tcp_framers = {} # shared by all instances: ((ip, port), connection index) => SitModbusTcpFramer, see framed_read_block_results
+	_broker_socket_path = SitModbusBrokerClient.DEFAULT_SOCKET_PATH # overriden by --broker_socket_path, see broker_modbus_client
+	_tcp_connection_pool_size = DEFAULT_TCP_CONNECTION_POOL_SIZE # overriden by --tcp_connections
+	_tcp_connection_pool = None # see tcp_connection_pool
+	_connection_index = 0 # index of self._modbus_client into the tcp_connection_pool, see pool_worker
+	_is_pool_worker = False # _post_poll_sit_modbus_register is called by the device yielding the slave, see poll_slaves_sit_modbus_registers
+	_slave_healths = {} # shared by all instances: (target ip or port, slave_address) => SitModbusSlaveHealth, see register_value
+	_request_locks = weakref.WeakKeyDictionary() # shared by all instances: modbus client => SitModbusPriorityLock, see request_lane
+	_request_locks_lock = threading.Lock()
+	_curtailment_setpoint_short_description = None # register limiting the active power of the device, see curtailment_setpoint_values
+	_curtailment_setpoint_value_per_percent = 1 # value of the register for 1% of nominal power, as read i.e. scale factor applied
+	_data_sequence_short_description = None # register changed by the device when new data is available (SMA NewData i.e.), see is_change_gated
+	_is_change_gated = False # overriden by --change_gated
+	_max_unchanged_data_age = DEFAULT_MAX_UNCHANGED_DATA_AGE
+	_data_sequence_full_reads = None # dict data sequence register => (its value, time.monotonic()) of the last cycle reading all registers
 
 
 	_sit_modbus_registers = OrderedDict() # OrderedDict
 
+# SETTERS AND GETTERS
+
+	@property
+	def sit_modbus_registers(self):
+		"""
+		OrderedDict short_description => SitModbusRegister of the slave (or inverter) being read
+		"""
+		return self._sit_modbus_registers
+
+	@property
+	def target_ip(self):
+		return self._target_ip
+
+	@property
+	def target_port(self):
+		return self._target_port
+
+	@property
+	def target_mode(self):
+		return self._target_mode
+
+	@property
+	def scale_factor_ttl(self):
+		return self._scale_factor_ttl
+
+	@scale_factor_ttl.setter
+	def scale_factor_ttl(self, v):
+		assert v >= 0, 'scale_factor_ttl >= 0:{}'.format(v)
+		self._scale_factor_ttl = v
+
+	def modbus_register_index(self, a_register_index):
+		"""
+		Returns the register index sent into requests for given documented register index
+		"""
+		if self._substract_one_to_register_index:
+			return a_register_index - 1
+		return a_register_index
+
 # FUNCTIONS DEFINITION 
 
 	def __init__(self, a_slave_address, a_target_mode=DEFAULT_TARGET_MODE, a_port=DEFAULT_PORT, an_ip_address=None):
@@ -140,6 +247,7 @@ class SitModbusDevice (object):
 		self._target_port = a_port
 		self._slave_address = a_slave_address
 		self._target_ip = an_ip_address
+		self._sit_modbus_registers = OrderedDict() # not the class attribute, shared by all instances
 
 		self._logger = SitLogger().new_logger(self.__class__.__name__)
 		self._sit_json_conf = SitJsonConf(__name__)
@@ -149,6 +257,18 @@ class SitModbusDevice (object):
 			assert self.valid_ip(self._target_ip), 'valid ip address'
 		self.invariants()
 
+	@classmethod
+	def new_with_script_arguments(cls, some_script_arguments, *some_args, **some_kwargs):
+		"""
+		Returns a new instance whose init_arg_parse parses given list instead of sys.argv
+			i.e. InverterManager.new_with_script_arguments(['-i', '192.168.0.10', '-m', 'b8:27:eb:00:00:01', '-c', '3-10'])
+		"""
+		l_res = cls.__new__(cls)
+		l_res._forced_script_arguments = [str(l_arg) for l_arg in some_script_arguments]
+		l_res.__init__(*some_args, **some_kwargs)
+
+		return l_res
+
 
 	def process_script_arguments(self):
 		"""
@@ -175,7 +295,10 @@ class SitModbusDevice (object):
 		self._logger.debug('connect-> with args target_mode:{} port:{} rtu_timeout:{} baudrate:{}'.format(self._target_mode, self._target_port, self._rtu_timeout, self._rtu_baudrate))
 		while l_retries_count < self.MAX_CONNECT_RETRIES_COUNT and not self._is_connected:
 			try:
-				if self._target_mode == self.TARGET_MODE_RTU:
+				self._modbus_client = self.broker_modbus_client()
+				if self._modbus_client is not None:
+					self._logger.info('connect->Broker Client Mode:{} broker:{}'.format(self._target_mode, self._modbus_client.socket_path))
+				elif self._target_mode == self.TARGET_MODE_RTU:
 					assert os.geteuid() == 0, 'user must be root for RTU mode'
 					# DOC: https://github.com/riptideio/pymodbus/blob/8ef32997ee1da1cd465f2e19ff3b54b93d38728c/pymodbus/repl/main.py
 					self._modbus_client = ModbusSerialClient(method=self._target_mode, port=str(self._target_port), timeout=self._rtu_timeout, stopbits=self._rtu_stopbits, bytesize=self._rtu_bytesize, parity=self._rtu_parity, baudrate=self._rtu_baudrate)
@@ -184,17 +307,19 @@ class SitModbusDevice (object):
 					self._logger.info('connect->RTU Client Mode:{}'.format(self._target_mode))
 				else:
 					assert self._target_mode == self.TARGET_MODE_TCP
-					self._modbus_client = ModbusTcpClient(self._target_ip, port=str(self._target_port), retries=self._client_connect_retries, retry_on_empty=True)
+					self._modbus_client = self.new_tcp_modbus_client()
 					self._logger.info('connect->TCP Client Mode:{}'.format(self._target_mode))
 
 				#Connect to the serial modbus server
 				connection = self._modbus_client.connect()
-				if self._modbus_client.connect:
+				if connection:
 					#self._logger.debug("Client is connected")
 					self._is_connected = True
+					self.reset_polls()
 					self._logger.info('connect -> Connection success')
 				else:
 					self._is_connected = False
+					self._modbus_client.close()
 					raise ConnectionException("connect->Could not connect to _modbus_client")
 			except ConnectionException as l_e:
 				l_retries_count += 1
@@ -204,6 +329,43 @@ class SitModbusDevice (object):
 				self._logger.exception("connect->Exception occured during connection:{}".format(l_e))
 				raise l_e
 
+	def new_tcp_modbus_client(self):
+		"""
+		Returns a new ModbusTcpClient to the target, not connected
+		"""
+		return ModbusTcpClient(self._target_ip, port=str(self._target_port), timeout=self._tcp_timeout, retries=self._client_connect_retries, retry_on_empty=True)
+
+	def broker_modbus_client(self):
+		"""
+		Returns a SitModbusBrokerClient connected to the SitModbusConnectionBroker of broker_socket_path() for the target,
+			None if no broker is running (its socket does not exist) or it refuses the connection, to connect directly
+		"""
+		l_socket_path = self.broker_socket_path()
+		if l_socket_path is None or not os.path.exists(l_socket_path):
+			return None
+		if self._target_mode == self.TARGET_MODE_RTU:
+			l_target = {'target_mode': self._target_mode, 'port': str(self._target_port), 'timeout': self._rtu_timeout, 'stopbits': self._rtu_stopbits, 'bytesize': self._rtu_bytesize, 'parity': self._rtu_parity, 'baudrate': self._rtu_baudrate}
+		else:
+			l_target = {'target_mode': self._target_mode, 'ip': self._target_ip, 'port': int(self._target_port), 'timeout': self._tcp_timeout}
+		l_res = SitModbusBrokerClient(l_socket_path, l_target, timeout=max(self._tcp_timeout, self._rtu_timeout), retries=self._client_connect_retries, retry_on_empty=True)
+		if not l_res.connect():
+			self._logger.warning('broker_modbus_client-> broker {} not available, connecting directly'.format(l_socket_path))
+			return None
+
+		return l_res
+
+	def broker_socket_path(self):
+		"""
+		Returns the socket path of the connection broker, --broker_socket_path if given, None if --no_broker
+		"""
+		if self._args is not None and getattr(self._args, 'no_broker', False):
+			return None
+		l_res = getattr(self._args, 'broker_socket_path', None) if self._args is not None else None
+		if l_res is None:
+			l_res = self._broker_socket_path
+
+		return l_res
+
 # HIGH LEVEL FUNCTIONS
 
 	def _header_rows (self):
@@ -230,6 +392,18 @@ class SitModbusDevice (object):
 		for l_short_desc, l_reg in an_ordered_dict.items():
 			self.add_modbus_register(l_reg)
 
+	def append_sit_modbus_registers_from_map(self, a_map_file_path, a_slave_address):
+		"""
+		add_modbus_register with each register of given JSON map file compiled for a_slave_address, see SitModbusRegisterMap
+		returns the SitModbusRegisterTable
+		"""
+		from sit_modbus_register_map import SitModbusRegisterMap # register types import sit_modbus_device
+		l_table = SitModbusRegisterMap.new_from_file(a_map_file_path).compiled_table(self, a_slave_address)
+		for l_reg in l_table.by_name.values():
+			self.add_modbus_register(l_reg)
+
+		return l_table
+
 	def read_register_from_short_description(self, a_short_description, a_slave_address):
 		"""
 		returns a read register
@@ -246,18 +420,28 @@ class SitModbusDevice (object):
 		assert isinstance(a_sit_modbus_register, SitModbusRegister), 'given argument must be a SitModbusRegister'
 		assert self.is_connected(), 'Not connected'
 
-		l_val = self.register_value(a_sit_modbus_register.register_index, a_sit_modbus_register.words_count, a_sit_modbus_register.slave_address)
-
-		a_sit_modbus_register.set_value_with_raw(l_val)
+		l_now = time.monotonic()
+		l_read_blocks = [SitModbusReadBlock(a_sit_modbus_register)]
+		l_sf_regs = self.due_scale_factor_sit_modbus_registers([a_sit_modbus_register], l_now)
+		l_read_blocks.extend(SitModbusReadBlock(l_sf_reg) for l_sf_reg in l_sf_regs)
+		self.run_read_steps(self.read_sit_modbus_read_blocks_steps(l_read_blocks))
+		for l_sf_reg in l_sf_regs:
+			l_sf_reg.set_polled(True, l_now)
 
 		self.set_value_with_scale_factor(a_sit_modbus_register)
 
 	def set_value_with_scale_factor(self, a_sit_modbus_register):
 		"""
 		set a_sit_modbus_register value with read scale_factor read from scale_factor_register_index
-		"""
-		if a_sit_modbus_register.scale_factor_register_index is not None:
-			l_scale_factor = self.register_values_int_16_s(a_sit_modbus_register.scale_factor_register_index, a_sit_modbus_register.slave_address)
+			the scale factor is the one of scale_factor_sit_modbus_register() read by read_all_sit_modbus_registers_steps,
+			value is None if the scale factor is not available
+		"""
+		if a_sit_modbus_register.scale_factor_register_index is not None and a_sit_modbus_register.value is not None:
+			l_scale_factor = self.scale_factor_sit_modbus_register(a_sit_modbus_register).value
+			if l_scale_factor is None:
+				self._logger.warning('set_value_with_scale_factor-> scale factor not available, setting None to register:{}'.format(a_sit_modbus_register.out_short()))
+				a_sit_modbus_register.value = None
+				return
 			l_val = a_sit_modbus_register.value
 			l_val = l_val * 10 ** l_scale_factor
 			self._logger.debug('set_value_with_scale_factor-> old_val:%s scale_factor:%s new_val:%s' % (a_sit_modbus_register.value, l_scale_factor, l_val))
@@ -265,18 +449,780 @@ class SitModbusDevice (object):
 #		else:
 #			self._logger.debug('read_sit_modbus_register-> scale_factor_index should be None:%s' % (a_sit_modbus_register.scale_factor_register_index))
 
+	def write_sit_modbus_register_values(self, some_values, an_is_read_back=False):
+		"""
+		Writes given values with one write_registers (FC16) request per run of adjacent registers of a slave
+			and sets the value of the registers with them, returns the list of written SitModbusReadBlock
+		@param some_values: dict SitModbusRegister => value as read i.e. scale factor applied, ordered by request
+		@param an_is_read_back: reads the written registers back with the blocks of read_planner()
+			and raises SitModbusWriteVerificationError if one of them differs from the written words
+		"""
+		assert self.is_connected(), 'Not connected'
+		l_sit_regs = list(some_values.keys())
+		for l_sit_reg in l_sit_regs:
+			assert isinstance(l_sit_reg, SitModbusRegister), 'l_sit_reg is a SitModbusRegister but {}'.format(l_sit_reg.__class__.__name__)
+			assert l_sit_reg.is_access_mode_rw(), 'register is not writable:{}'.format(l_sit_reg.out_short())
+
+		l_now = time.monotonic()
+		l_sf_regs = self.due_scale_factor_sit_modbus_registers(l_sit_regs, l_now)
+		if len(l_sf_regs) > 0:
+			self.run_read_steps(self.read_sit_modbus_read_blocks_steps(self.read_planner().read_blocks(l_sf_regs)))
+			for l_sf_reg in l_sf_regs:
+				l_sf_reg.set_polled(True, l_now)
+		l_raw_registers = OrderedDict((l_sit_reg, l_sit_reg.raw_registers_of(self.raw_value_of(l_sit_reg, l_value))) for l_sit_reg, l_value in some_values.items())
+
+		l_write_blocks = self.write_planner().read_blocks(l_sit_regs)
+		for l_write_block in l_write_blocks:
+			l_words = [None] * l_write_block.words_count
+			for l_sit_reg in l_write_block.sit_modbus_registers:
+				l_offset = l_write_block.register_offset(l_sit_reg)
+				assert l_words[l_offset:l_offset + l_sit_reg.words_count] == [None] * l_sit_reg.words_count, 'overlapping registers written:{}'.format(l_write_block.out_short())
+				l_words[l_offset:l_offset + l_sit_reg.words_count] = l_raw_registers[l_sit_reg]
+			self.write_register_values(l_write_block.register_index, l_words, l_write_block.slave_address)
+			for l_sit_reg in l_write_block.sit_modbus_registers:
+				l_sit_reg.value = some_values[l_sit_reg]
+		self._logger.debug('write_sit_modbus_register_values-> wrote {} register(s) with {} request(s)'.format(len(l_sit_regs), len(l_write_blocks)))
+
+		if an_is_read_back:
+			self.verify_written_raw_registers(l_raw_registers)
+
+		return l_write_blocks
+
+	def curtailment_slave_addresses(self):
+		"""
+		Returns the slave addresses curtailment_setpoint_values is called with, each slave of _slave_addresses_list
+			for drivers reading several slaves, [None] for the registers of the device otherwise
+		"""
+		l_slave_addresses_list = getattr(self, '_slave_addresses_list', None)
+		if not l_slave_addresses_list:
+			return [None]
+
+		return list(l_slave_addresses_list)
+
+	def curtailment_setpoint_values(self, a_percent, a_slave_address=None):
+		"""
+		Returns the dict register => value for write_sit_modbus_register_values limiting the active power of given slave
+			(the device if None) to a_percent of its nominal power, see SitCurtailmentDispatcher
+			the registers of a_slave_address are used as by poll_slaves_sit_modbus_registers
+			the scale factor of the register if any is read and removed by write_sit_modbus_register_values (raw_value_of)
+		"""
+		assert self._curtailment_setpoint_short_description is not None, '{} has no curtailment setpoint register'.format(self.__class__.__name__)
+		assert 0 <= a_percent <= 100, 'invalid a_percent:{}'.format(a_percent)
+		if a_slave_address is not None:
+			self.use_sit_modbus_registers_of(a_slave_address, self._init_sit_modbus_registers_from_template, a_slave_address)
+		l_sit_reg = self._sit_modbus_registers[self._curtailment_setpoint_short_description]
+
+		l_value = a_percent * self._curtailment_setpoint_value_per_percent
+		if l_sit_reg.scale_factor_register_index is None:
+			l_value = int(round(l_value))
+
+		return {l_sit_reg: l_value}
+
+	def raw_value_of(self, a_sit_modbus_register, a_value):
+		"""
+		Returns given value without the scale factor of given register, reverse of set_value_with_scale_factor
+		"""
+		if a_sit_modbus_register.scale_factor_register_index is None:
+			return a_value
+		l_scale_factor = self.scale_factor_sit_modbus_register(a_sit_modbus_register).value
+		if l_scale_factor is None:
+			raise ModbusException('raw_value_of-> scale factor not available, not writing register:{}'.format(a_sit_modbus_register.out_short()))
+
+		return int(round(a_value / 10 ** l_scale_factor))
+
+	def verify_written_raw_registers(self, some_raw_registers):
+		"""
+		Reads back the registers of given dict register => written words with one request per block of read_planner()
+			and raises SitModbusWriteVerificationError with the registers whose words differ
+		"""
+		l_read_blocks = self.read_planner().read_blocks(list(some_raw_registers.keys()))
+		l_mismatches = []
+		for l_read_block, l_result in zip(l_read_blocks, self.read_block_results(l_read_blocks, SitModbusRequestPriority.PRIORITY_CONTROL)):
+			if isinstance(l_result, ModbusException):
+				raise l_result
+			for l_sit_reg in l_read_block.sit_modbus_registers:
+				l_offset = l_read_block.register_offset(l_sit_reg)
+				l_read_words = list(l_result.registers[l_offset:l_offset + l_sit_reg.words_count])
+				if l_read_words != some_raw_registers[l_sit_reg]:
+					l_mismatches.append((l_sit_reg, some_raw_registers[l_sit_reg], l_read_words))
+		if len(l_mismatches) > 0:
+			l_error = SitModbusWriteVerificationError(l_mismatches)
+			self._logger.error('verify_written_raw_registers-> {}'.format(l_error))
+			raise l_error
+		self._logger.debug('verify_written_raw_registers-> {} register(s) verified with {} request(s)'.format(len(some_raw_registers), len(l_read_blocks)))
+
+	def scale_factor_sit_modbus_register(self, a_sit_modbus_register):
+		"""
+		Returns the RegisterTypeInt16s of the scale factor of given register, one per (slave_address, register_index)
+		"""
+		assert a_sit_modbus_register.scale_factor_register_index is not None, 'register has a scale factor'
+		if self._scale_factor_sit_modbus_registers is None:
+			self._scale_factor_sit_modbus_registers = OrderedDict()
+		l_key = (a_sit_modbus_register.slave_address, a_sit_modbus_register.scale_factor_register_index)
+		if l_key not in self._scale_factor_sit_modbus_registers:
+			self._scale_factor_sit_modbus_registers[l_key] = RegisterTypeInt16s('SF{}'.format(l_key[1]), 'Scale factor of {}'.format(a_sit_modbus_register.short_description), l_key[1], l_key[0], SitModbusRegister.ACCESS_MODE_R, 'SF')
+
+		return self._scale_factor_sit_modbus_registers[l_key]
+
+	def due_scale_factor_sit_modbus_registers(self, some_sit_modbus_registers, a_monotonic_time):
+		"""
+		Returns the scale factor registers of given registers which have to be read, i.e. never read,
+			not available or read more than scale_factor_ttl seconds ago, each one once
+		"""
+		l_res = []
+		for l_sit_reg in some_sit_modbus_registers:
+			if l_sit_reg.scale_factor_register_index is None:
+				continue
+			l_sf_reg = self.scale_factor_sit_modbus_register(l_sit_reg)
+			if l_sf_reg in l_res:
+				continue
+			if l_sf_reg.value is None or l_sf_reg.read_monotonic_time is None or a_monotonic_time - l_sf_reg.read_monotonic_time >= self._scale_factor_ttl:
+				l_res.append(l_sf_reg)
+
+		return l_res
+
 	def read_all_sit_modbus_registers(self):
 		"""
-			Reads all registers and print result as debug
+			Reads all registers with one request per SitModbusReadBlock and print result as debug
+				see read_all_sit_modbus_registers_steps
+		"""
+		self.run_read_steps(self.read_all_sit_modbus_registers_steps())
+
+	def read_all_sit_modbus_registers_steps(self):
+		"""
+		Generator of the reading of all registers, yields lists of SitModbusReadBlock to read and
+			is sent back the list of corresponding results (response with registers or ModbusException),
+			see run_read_steps (blocking) and SitModbusAsyncEngine.run_read_steps (asyncio)
+			only registers whose poll_period is due are read, the others keep their last value
+			scale factors not cached (see due_scale_factor_sit_modbus_registers) are read within the same blocks as the registers
+			identification registers (Md, SN) are read first to get the unsupported_register_registry,
+			registers it skips are not read and their value is None
+			if is_change_gated(), the data sequence register is read first and the cycle stops there when it did not change
+			since the last cycle reading all registers, see is_data_unchanged
+		"""
+		l_now = time.monotonic()
+		l_polled_regs = [l_sit_reg for l_sit_reg in self._sit_modbus_registers.values() if l_sit_reg.is_poll_due(l_now)]
+		l_seq_reg = self.data_sequence_sit_modbus_register()
+		if l_seq_reg is not None:
+			yield from self.read_sit_modbus_read_blocks_steps(self.planned_read_blocks([l_seq_reg]))
+			if self._data_sequence_full_reads is None:
+				self._data_sequence_full_reads = {}
+			l_full_read = self._data_sequence_full_reads.get(l_seq_reg)
+			if (l_full_read is not None and l_seq_reg.value is not None and
+					l_seq_reg.value == l_full_read[0] and l_now - l_full_read[1] < self._max_unchanged_data_age):
+				self._logger.debug('read_all_sit_modbus_registers-> data sequence unchanged, skipping cycle register:{}'.format(l_seq_reg.out_short()))
+				l_seq_reg.set_polled(True, l_now)
+				return
+			if l_seq_reg not in l_polled_regs:
+				l_polled_regs.append(l_seq_reg)
+		self._logger.debug('read_all_sit_modbus_registers-> registers to read count({}/{}) start --------------------------------------------------'.format(len(l_polled_regs), len(self._sit_modbus_registers)))
+
+		self._unsupported_register_registry = None
+		l_identification_regs = self.identification_sit_modbus_registers()
+		l_polled_identification_regs = [l_sit_reg for l_sit_reg in l_identification_regs if l_sit_reg in l_polled_regs]
+		if len(l_polled_identification_regs) > 0:
+			yield from self.read_sit_modbus_read_blocks_steps(self.planned_read_blocks(l_polled_identification_regs))
+
+		self._unsupported_register_registry = self.unsupported_register_registry()
+		l_sit_regs = [l_sit_reg for l_sit_reg in l_polled_regs if l_sit_reg not in l_identification_regs and l_sit_reg is not l_seq_reg]
+		l_sf_regs = self.due_scale_factor_sit_modbus_registers(l_sit_regs, l_now)
+		l_sit_regs += l_sf_regs
+		l_skipped_regs = self._unsupported_register_registry.skipped_registers(l_sit_regs)
+		for l_sit_reg in l_skipped_regs:
+			self._logger.debug('read_all_sit_modbus_registers-> skipping unsupported register:{}'.format(l_sit_reg.out_short()))
+			l_sit_reg.value = None
+		l_sit_regs = [l_sit_reg for l_sit_reg in l_sit_regs if l_sit_reg not in l_skipped_regs]
+		try:
+			yield from self.read_sit_modbus_read_blocks_steps(self.planned_read_blocks(l_sit_regs, l_skipped_regs))
+		finally:
+			self._unsupported_register_registry.save()
+		for l_sf_reg in l_sf_regs:
+			l_sf_reg.set_polled(True, l_now)
+
+		for l_short_desc, l_sit_reg in self._sit_modbus_registers.items():
+			l_is_read = l_sit_reg in l_polled_regs
+			if l_is_read:
+				self.set_value_with_scale_factor(l_sit_reg)
+				self._post_read_sit_modbus_register(l_sit_reg)
+			l_sit_reg.set_polled(l_is_read, l_now)
+			if not self._is_pool_worker:
+				self._post_poll_sit_modbus_register(l_sit_reg)
+		if l_seq_reg is not None:
+			self._data_sequence_full_reads[l_seq_reg] = (l_seq_reg.value, l_now)
+
+	def is_change_gated(self):
+		"""
+		True if cycles read the data sequence register first and skip unchanged data, --change_gated if given
+			only for drivers having a _data_sequence_short_description
+		"""
+		l_res = getattr(self._args, 'change_gated', None) if self._args is not None else None
+		if l_res is None:
+			l_res = self._is_change_gated
+
+		return l_res and self._data_sequence_short_description is not None
+
+	def data_sequence_sit_modbus_register(self):
+		"""
+		Returns the data sequence register of self._sit_modbus_registers if is_change_gated(), None otherwise
+		"""
+		if not self.is_change_gated():
+			return None
+
+		return self._sit_modbus_registers.get(self._data_sequence_short_description)
+
+	def is_data_unchanged(self):
+		"""
+		True if the last read_all_sit_modbus_registers of self._sit_modbus_registers only read the data sequence register,
+			registers keep the values of the previous cycle and have not to be stored nor raise events again
+		"""
+		l_seq_reg = self.data_sequence_sit_modbus_register()
+		if l_seq_reg is None or l_seq_reg.read_monotonic_time is None:
+			return False
+		l_full_read = (self._data_sequence_full_reads or {}).get(l_seq_reg)
+
+		return l_full_read is not None and l_full_read[1] != l_seq_reg.read_monotonic_time
+
+	def run_read_steps(self, a_read_steps):
+		"""
+		Runs given read steps generator (see read_all_sit_modbus_registers_steps), reading blocks one after the other
+		"""
+		l_results = None
+		try:
+			while True:
+				l_read_blocks = a_read_steps.send(l_results)
+				l_results = self.read_block_results(l_read_blocks)
+		except StopIteration:
+			pass
+
+	def read_block_results(self, some_read_blocks, a_priority=None):
+		"""
+		Returns the list of read_block_result of given blocks, their requests are pipelined on the TCP connection
+			if pipeline_window() > 1, a block not answered by the pipeline is read again by read_block_result
+			and the target falls back to one request at a time if it answers alone
+		@param a_priority: SitModbusRequestPriority.PRIORITY_* of the requests, read_block_priority of each block if None
+		"""
+		l_pipelined_client = self.pipelined_tcp_client()
+		l_blocks = [l_read_block for l_read_block in some_read_blocks if self.slave_health(l_read_block.slave_address).is_healthy()]
+		if l_pipelined_client is None or not l_pipelined_client.is_pipelining() or len(l_blocks) < 2:
+			return self.framed_read_block_results(some_read_blocks, a_priority)
+
+		l_requests = [(self.modbus_register_index(l_read_block.register_index), l_read_block.words_count, l_read_block.slave_address) for l_read_block in l_blocks]
+		l_priority = min(self.read_block_priority(l_read_block) for l_read_block in l_blocks) if a_priority is None else a_priority
+		try:
+			with self.request_lane(l_priority): # the window of pipelined requests is the frame boundary
+				l_timeout = max(self.request_timeout(self.slave_health(l_read_block.slave_address)) for l_read_block in l_blocks)
+				l_responses = l_pipelined_client.read_holding_registers(self._modbus_client, l_requests, l_timeout)
+		except ConnectionException as l_e:
+			self._logger.error('read_block_results-> pipelined requests failed, reading blocks one by one:{}'.format(l_e))
+			l_responses = [(None, None)] * len(l_blocks)
+		l_answered_results = {}
+		for l_read_block, (l_response, l_round_trip) in zip(l_blocks, l_responses):
+			if l_response is None:
+				continue
+			l_slave_health = self.slave_health(l_read_block.slave_address)
+			l_slave_health.record_round_trip(l_round_trip)
+			if isinstance(l_response, ExceptionResponse):
+				l_error = SitModbusExceptionResponseError(l_response.exception_code, l_read_block.register_index, l_read_block.slave_address)
+				if l_error.is_register_unsupported():
+					l_slave_health.record_success()
+					l_answered_results[id(l_read_block)] = l_error
+			elif len(l_response.registers) == l_read_block.words_count:
+				l_slave_health.record_success()
+				l_answered_results[id(l_read_block)] = l_response
+		self._logger.debug('read_block_results-> {} block(s) pipelined, {} answered, window:{}'.format(len(l_blocks), len(l_answered_results), l_pipelined_client.window))
+
+		l_res = []
+		l_pipelined_ids = set(id(l_read_block) for l_read_block in l_blocks)
+		for l_read_block in some_read_blocks:
+			if id(l_read_block) in l_answered_results:
+				l_res.append(l_answered_results[id(l_read_block)])
+				continue
+			l_result = self.read_block_result(l_read_block, a_priority)
+			if id(l_read_block) in l_pipelined_ids and not isinstance(l_result, ModbusException):
+				l_pipelined_client.fall_back_to_single_request('block answered alone but not pipelined:{}'.format(l_read_block.out_short()))
+			l_res.append(l_result)
+
+		return l_res
+
+	def pipeline_window(self):
+		"""
+		Returns the window of requests outstanding on the TCP connection, --pipeline_window if given
+		"""
+		l_res = getattr(self._args, 'pipeline_window', None) if self._args is not None else None
+		if l_res is None:
+			l_res = self._pipeline_window
+
+		return l_res
+
+	def pipelined_tcp_client(self):
+		"""
+		Returns the SitModbusPipelinedTcpClient of the target shared by its devices, None for RTU or a pipeline_window() of 1
+		"""
+		if self._target_mode != self.TARGET_MODE_TCP or self.pipeline_window() <= 1:
+			return None
+		l_target_key = (self._target_ip, str(self._target_port))
+		l_key = (l_target_key, self._connection_index)
+		if l_key not in SitModbusDevice._pipelined_tcp_clients:
+			SitModbusDevice._pipelined_tcp_clients[l_key] = SitModbusPipelinedTcpClient(l_target_key, self.pipeline_window())
+
+		return SitModbusDevice._pipelined_tcp_clients[l_key]
+
+	def framed_read_block_results(self, some_read_blocks, a_priority=None):
+		"""
+		Returns the list of read_block_result of given blocks, read one after the other by tcp_framer() if any,
+			a block it does not read (slave not healthy, exception response, timeout or unusual answer) is read
+			again by read_block_result with pymodbus
+		"""
+		l_framer = self.tcp_framer()
+		l_blocks = [] if l_framer is None else [l_read_block for l_read_block in some_read_blocks if l_framer.can_read(l_read_block.words_count) and self.slave_health(l_read_block.slave_address).is_healthy()]
+		l_answered_results = {}
+		if len(l_blocks) > 0:
+			l_responses = []
+			for l_read_block in l_blocks:
+				try:
+					with self.request_lane(self.read_block_priority(l_read_block) if a_priority is None else a_priority):
+						l_request = (self.modbus_register_index(l_read_block.register_index), l_read_block.words_count, l_read_block.slave_address, self.request_timeout(self.slave_health(l_read_block.slave_address)))
+						l_responses.extend(l_framer.read_holding_registers(self._modbus_client, [l_request]))
+				except ConnectionException as l_e:
+					self._logger.error('framed_read_block_results-> framed requests failed, reading blocks with pymodbus:{}'.format(l_e))
+					break
+			l_responses.extend([(None, None)] * (len(l_blocks) - len(l_responses)))
+			for l_read_block, (l_response, l_round_trip) in zip(l_blocks, l_responses):
+				if l_response is not None:
+					l_slave_health = self.slave_health(l_read_block.slave_address)
+					l_slave_health.record_round_trip(l_round_trip)
+					l_slave_health.record_success()
+					l_answered_results[id(l_read_block)] = l_response
+
+		return [l_answered_results[id(l_read_block)] if id(l_read_block) in l_answered_results else self.read_block_result(l_read_block, a_priority) for l_read_block in some_read_blocks]
+
+	def is_tcp_framer_used(self):
+		"""
+		True if blocks are read by SitModbusTcpFramer, --tcp_framer if given
+		"""
+		l_res = getattr(self._args, 'tcp_framer', None) if self._args is not None else None
+		if l_res is None:
+			l_res = self._is_tcp_framer_used
+
+		return l_res
+
+	def tcp_framer(self):
+		"""
+		Returns the SitModbusTcpFramer of the target shared by its devices, None for RTU, if not is_tcp_framer_used()
+			or if it fell back to pymodbus
+		"""
+		if self._target_mode != self.TARGET_MODE_TCP or not self.is_tcp_framer_used():
+			return None
+		l_target_key = (self._target_ip, str(self._target_port))
+		l_key = (l_target_key, self._connection_index)
+		if l_key not in SitModbusDevice._tcp_framers:
+			SitModbusDevice._tcp_framers[l_key] = SitModbusTcpFramer(l_target_key)
+		l_res = SitModbusDevice._tcp_framers[l_key]
+
+		return l_res if l_res.is_enabled() else None
+
+	def read_block_result(self, a_read_block, a_priority=None):
+		"""
+		Returns the response of the read of given SitModbusReadBlock or the ModbusException raised by it
+		@param a_priority: SitModbusRequestPriority.PRIORITY_* of the request, read_block_priority if None
+		"""
+		assert self.is_connected(), 'Not connected'
+		try:
+			with self.request_lane(self.read_block_priority(a_read_block) if a_priority is None else a_priority):
+				return self.register_value(a_read_block.register_index, a_read_block.words_count, a_read_block.slave_address)
+		except ModbusException as l_e:
+			return l_e
+
+	@staticmethod
+	def read_block_priority(a_read_block):
+		"""
+		PRIORITY_SLOW_READ if no register of given block is read every cycle (metadata i.e.), else PRIORITY_FAST_READ
+		"""
+		if all(l_sit_reg.poll_period != SitModbusRegister.POLL_PERIOD_EVERY_CYCLE for l_sit_reg in a_read_block.sit_modbus_registers):
+			return SitModbusRequestPriority.PRIORITY_SLOW_READ
+		return SitModbusRequestPriority.PRIORITY_FAST_READ
+
+	def request_lock(self):
+		"""
+		Returns the SitModbusPriorityLock of the modbus client of the device, shared by the devices (see share_modbus_client) and threads using it
+		"""
+		with SitModbusDevice._request_locks_lock:
+			l_res = SitModbusDevice._request_locks.get(self._modbus_client)
+			if l_res is None:
+				l_res = SitModbusPriorityLock()
+				SitModbusDevice._request_locks[self._modbus_client] = l_res
+
+		return l_res
+
+	@contextmanager
+	def request_lane(self, a_priority):
+		"""
+		Context holding the connection for one request of given SitModbusRequestPriority.PRIORITY_*,
+			a control write waits for the request being sent only, then reads by priority,
+			the priority is forwarded to the connection broker which orders requests of all drivers the same way
+		"""
+		with self.request_lock().lane(a_priority):
+			if isinstance(self._modbus_client, SitModbusBrokerClient):
+				self._modbus_client.request_priority = a_priority
+			yield
+
+	def request_lane_status(self):
+		"""
+		Returns the queueing delays per priority of the requests on the connection of the device, see SitModbusPriorityLock.status
+		"""
+		return self.request_lock().status()
+
+	def poll_sit_modbus_registers(self):
+		"""
+		Generator reading all registers of each slave (or inverter) of the device, yields the slave address
+			once self._sit_modbus_registers are read, redefine for devices reading several slaves
+			a slave whose data is unchanged (see is_data_unchanged) is not yielded
+		"""
+		self.read_all_sit_modbus_registers()
+		if not self.is_data_unchanged():
+			yield self._slave_address
+
+	def poll_slaves_sit_modbus_registers(self, some_slave_addresses):
+		"""
+		Generator reading all registers of each given slave, built from the template of the driver class, yields each read slave,
+			a slave with a modbus error or unchanged data (see is_data_unchanged) is skipped
+			if tcp_connection_pool() has several connections, slaves are spread over them and read concurrently,
+			one thread per connection, then yielded in given order
+		"""
+		l_pool = self.tcp_connection_pool()
+		l_connection_indexes = [] if l_pool is None or len(some_slave_addresses) < 2 else l_pool.available_connection_indexes()
+		if len(l_connection_indexes) < 2:
+			for l_slave in some_slave_addresses:
+				try:
+					self.use_sit_modbus_registers_of(l_slave, self._init_sit_modbus_registers_from_template, l_slave)
+					self.read_all_sit_modbus_registers()
+				except ModbusException as l_e:
+					self._logger.error('Modbus error on slave {}, msg:{}'.format(l_slave, l_e))
+					continue
+				if not self.is_data_unchanged():
+					yield l_slave
+			return
+
+		l_slaves_by_connection = OrderedDict()
+		for l_slave in some_slave_addresses:
+			l_slaves_by_connection.setdefault(l_pool.connection_index(l_slave, l_connection_indexes), []).append(l_slave)
+		# shared with the workers, registers of each slave are built here so that their events and post set value calls
+		#	are bound to this device and not to a worker, see SitModbusRegister.new_for_slave
+		for l_slave in some_slave_addresses:
+			self.use_sit_modbus_registers_of(l_slave, self._init_sit_modbus_registers_from_template, l_slave)
+		if self._scale_factor_sit_modbus_registers is None:
+			self._scale_factor_sit_modbus_registers = OrderedDict()
+		if self._unsupported_register_registries is None:
+			self._unsupported_register_registries = {}
+		if self._data_sequence_full_reads is None:
+			self._data_sequence_full_reads = {}
+		l_futures = [(l_index, l_pool.executor.submit(self.pool_worker(l_pool, l_index).read_slaves_sit_modbus_registers, l_slaves)) for l_index, l_slaves in l_slaves_by_connection.items()]
+		l_errors = {}
+		for l_index, l_future in l_futures:
+			l_connection_errors = l_future.result()
+			if any(isinstance(l_e, ConnectionException) for l_e in l_connection_errors.values()):
+				l_pool.record_failure(l_index)
+			l_errors.update(l_connection_errors)
+		self._logger.debug('poll_slaves_sit_modbus_registers-> {} slave(s) read over {} connection(s), {} error(s)'.format(len(some_slave_addresses), len(l_slaves_by_connection), len(l_errors)))
+
+		for l_slave in some_slave_addresses:
+			if l_slave in l_errors:
+				self._logger.error('Modbus error on slave {}, msg:{}'.format(l_slave, l_errors[l_slave]))
+				continue
+			self.use_sit_modbus_registers_of(l_slave, self._init_sit_modbus_registers_from_template, l_slave)
+			if self.is_data_unchanged():
+				continue
+			for l_sit_reg in self._sit_modbus_registers.values():
+				self._post_poll_sit_modbus_register(l_sit_reg)
+			yield l_slave
+
+	def read_slaves_sit_modbus_registers(self, some_slave_addresses):
+		"""
+		Reads all registers of given slaves one after the other, returns a dict slave address => ModbusException of failed ones
+			called on a pool_worker, registers of the slaves are already built by poll_slaves_sit_modbus_registers
+		"""
+		l_res = {}
+		for l_slave in some_slave_addresses:
+			try:
+				self.use_sit_modbus_registers_of(l_slave, self._init_sit_modbus_registers_from_template, l_slave)
+				self.read_all_sit_modbus_registers()
+			except ModbusException as l_e:
+				l_res[l_slave] = l_e
+
+		return l_res
+
+	def pool_worker(self, a_tcp_connection_pool, a_connection_index):
+		"""
+		Returns a shallow copy of the device reading with given connection of the pool,
+			registers dicts, registries and caches are shared with the device
+		"""
+		l_res = copy.copy(self)
+		l_res._modbus_client = a_tcp_connection_pool.connection(a_connection_index)
+		l_res._connection_index = a_connection_index
+		l_res._is_pool_worker = True
+		assert l_res._modbus_client is not None, 'connection {} available'.format(a_connection_index)
+
+		return l_res
+
+	def tcp_connection_pool_size(self):
+		"""
+		Returns the count of TCP connections to the target, --tcp_connections if given
+		"""
+		l_res = getattr(self._args, 'tcp_connections', None) if self._args is not None else None
+		if l_res is None:
+			l_res = self._tcp_connection_pool_size
+
+		return l_res
+
+	def tcp_connection_pool(self):
+		"""
+		Returns the SitModbusTcpConnectionPool of the connected device, its connection 0 being self._modbus_client,
+			None for RTU, a connection through the broker or a tcp_connection_pool_size() of 1
 		"""
-		self._logger.debug('read_all_sit_modbus_registers-> registers to read count({}) start --------------------------------------------------'.format(len(self._sit_modbus_registers)))
+		if self._target_mode != self.TARGET_MODE_TCP or self.tcp_connection_pool_size() < 2 or not self.is_connected() or isinstance(self._modbus_client, SitModbusBrokerClient):
+			return None
+		if self._tcp_connection_pool is None or self._tcp_connection_pool.primary_client is not self._modbus_client:
+			self.close_tcp_connection_pool()
+			self._tcp_connection_pool = SitModbusTcpConnectionPool((self._target_ip, str(self._target_port)), self._modbus_client, self.new_tcp_modbus_client, self.tcp_connection_pool_size())
+
+		return self._tcp_connection_pool
 
+	def close_tcp_connection_pool(self):
+		if self._tcp_connection_pool is not None:
+			self._tcp_connection_pool.close()
+			self._tcp_connection_pool = None
+
+	def use_sit_modbus_registers_of(self, a_key, an_init_method, *some_init_args):
+		"""
+		Sets self._sit_modbus_registers to the registers of given key (slave address or inverter index),
+			built with an_init_method(*some_init_args) on first use only, so that a daemon reuses them every cycle
+		"""
+		if self._sit_modbus_registers_by_key is None:
+			self._sit_modbus_registers_by_key = {}
+		if a_key in self._sit_modbus_registers_by_key:
+			self._sit_modbus_registers = self._sit_modbus_registers_by_key[a_key]
+		else:
+			self._sit_modbus_registers = OrderedDict()
+			an_init_method(*some_init_args)
+			self._sit_modbus_registers_by_key[a_key] = self._sit_modbus_registers
+
+	def read_fleet_table(self, some_slave_addresses, some_sit_modbus_registers=None):
+		"""
+		Reads the layout of given registers (self._sit_modbus_registers by default) from each given slave and
+			returns a SitModbusFleetTable decoded with NumPy (optional dependency, imported on first call),
+			see SitModbusFleetDecoder, a block refused by a slave masks its registers for that slave only
+		"""
+		from sit_modbus_fleet_decoder import SitModbusFleetDecoder
+		assert self.is_connected(), 'Not connected'
+		l_template_regs = list(some_sit_modbus_registers or self._sit_modbus_registers.values())
+		l_fleet_decoder = SitModbusFleetDecoder(l_template_regs)
+		l_sf_regs = [self.scale_factor_sit_modbus_register(l_sit_reg) for l_sit_reg in l_template_regs if l_sit_reg.scale_factor_register_index is not None]
+		l_read_blocks = self.read_planner().read_blocks(list(OrderedDict.fromkeys(l_template_regs + l_sf_regs)))
+		l_words_by_slave = OrderedDict()
+		for l_slave in some_slave_addresses:
+			l_words = [SitModbusFleetDecoder.MISSING_WORD] * l_fleet_decoder.words_count
+			for l_read_block in l_read_blocks:
+				try:
+					l_result = self.register_value(l_read_block.register_index, l_read_block.words_count, l_slave)
+				except ModbusException as l_e:
+					self._logger.warning('read_fleet_table-> slave:{} block:{} not read:{}'.format(l_slave, l_read_block.out_short(), l_e))
+					continue
+				l_offset = l_read_block.register_index - l_fleet_decoder.register_index
+				for l_index, l_word in enumerate(l_result.registers[:l_read_block.words_count]):
+					if 0 <= l_offset + l_index < len(l_words):
+						l_words[l_offset + l_index] = l_word
+			l_words_by_slave[l_slave] = l_words
+
+		return l_fleet_decoder.decode(l_words_by_slave)
+
+	def _init_sit_modbus_registers_from_template(self, a_slave_address):
+		"""
+		Fills self._sit_modbus_registers with registers of given slave copied from the template of the driver class,
+			the template is built once per class by _init_sit_modbus_registers, for drivers whose slaves share one layout
+			i.e. self.use_sit_modbus_registers_of(l_slave, self._init_sit_modbus_registers_from_template, l_slave)
+		"""
+		l_templates = SitModbusDevice._sit_modbus_register_templates
+		if self.__class__ not in l_templates:
+			self._init_sit_modbus_registers(a_slave_address)
+			l_templates[self.__class__] = OrderedDict((l_short_desc, l_sit_reg.new_for_slave(a_slave_address)) for l_short_desc, l_sit_reg in self._sit_modbus_registers.items())
+			return
+		for l_short_desc, l_template_reg in l_templates[self.__class__].items():
+			self._sit_modbus_registers[l_short_desc] = l_template_reg.new_for_slave(a_slave_address, self)
+
+	def sit_modbus_registers_snapshot(self):
+		"""
+		Returns an OrderedDict with a copy of each read register (values are kept when the device reads again)
+		"""
+		l_res = OrderedDict()
 		for l_short_desc, l_sit_reg in self._sit_modbus_registers.items():
-			self.read_sit_modbus_register(l_sit_reg)
-			if l_sit_reg.has_post_set_value_call():
-				l_sit_reg.call_post_set_value()
-			#self._logger.debug('read_all_registers-> sit_register.out():%s' % (l_sit_reg.out()))
-			self._logger.debug('read_all_registers-> sit_register.out_short():%s' % (l_sit_reg.out_short()))
+			l_res[l_short_desc] = copy.copy(l_sit_reg)
+
+		return l_res
+
+	def _post_read_sit_modbus_register(self, a_sit_modbus_register):
+		"""
+		Called by read_all_sit_modbus_registers for each register read by the cycle once its value is set, redefine if necessary
+		"""
+		if a_sit_modbus_register.has_post_set_value_call() and a_sit_modbus_register.value is not None:
+			a_sit_modbus_register.call_post_set_value()
+		#self._logger.debug('read_all_registers-> sit_register.out():%s' % (a_sit_modbus_register.out()))
+		self._logger.debug('read_all_registers-> sit_register.out_short():%s' % (a_sit_modbus_register.out_short()))
+
+	def _post_poll_sit_modbus_register(self, a_sit_modbus_register):
+		"""
+		Called by read_all_sit_modbus_registers for each register after each cycle, read by it or not (see SitModbusRegister.poll_period),
+			redefine to keep state depending on register values
+		"""
+		pass
+
+	def set_poll_period(self, a_poll_period, some_short_descriptions):
+		"""
+		Sets poll_period of self._sit_modbus_registers having given short descriptions
+		"""
+		for l_short_desc in some_short_descriptions:
+			assert l_short_desc in self._sit_modbus_registers, 'set_poll_period-> no register {}'.format(l_short_desc)
+			self._sit_modbus_registers[l_short_desc].poll_period = a_poll_period
+
+	def reset_polls(self):
+		"""
+		Makes all registers and scale factors due for next cycle, called on connection
+			change gated devices read all registers whatever their data sequence
+		"""
+		if self._data_sequence_full_reads is not None:
+			self._data_sequence_full_reads.clear()
+		l_reg_dicts = [self._sit_modbus_registers, self._scale_factor_sit_modbus_registers or {}] + list((self._sit_modbus_registers_by_key or {}).values())
+		for l_reg_dict in l_reg_dicts:
+			for l_sit_reg in l_reg_dict.values():
+				l_sit_reg.reset_poll()
+
+	def read_planner(self):
+		"""
+		Returns the SitModbusReadPlanner, created with self._read_block_max_gap on first call
+		"""
+		if self._read_planner is None:
+			self._read_planner = SitModbusReadPlanner(self._read_block_max_gap)
+		return self._read_planner
+
+	def write_planner(self):
+		"""
+		Returns the SitModbusReadPlanner merging only adjacent registers into blocks of MAX_WRITE_BLOCK_WORDS_COUNT words, created on first call
+		"""
+		if self._write_planner is None:
+			self._write_planner = SitModbusReadPlanner(0, self.MAX_WRITE_BLOCK_WORDS_COUNT)
+		return self._write_planner
+
+	def read_plan_cache(self):
+		"""
+		Returns the SitModbusReadPlanCache of the driver class, shared by its instances, created on first call
+		"""
+		l_caches = SitModbusDevice._read_plan_caches
+		if self.__class__.__name__ not in l_caches:
+			l_caches[self.__class__.__name__] = SitModbusReadPlanCache(self.__class__.__name__)
+		return l_caches[self.__class__.__name__]
+
+	def planned_read_blocks(self, some_sit_modbus_registers, some_barrier_registers=None):
+		"""
+		Returns read_planner().read_blocks of given registers, planned once and cached on disk by read_plan_cache()
+		"""
+		l_key_values = [self.__class__.__module__, self.__class__.__name__, self._substract_one_to_register_index, self._byte_order, self._word_order]
+
+		return self.read_plan_cache().read_blocks(self.read_planner(), some_sit_modbus_registers, some_barrier_registers, l_key_values)
+
+	def read_sit_modbus_read_block(self, a_read_block):
+		"""
+		Reads given SitModbusReadBlock with one request and sets raw value of each of its registers
+			see read_sit_modbus_read_blocks_steps
+		"""
+		self.run_read_steps(self.read_sit_modbus_read_blocks_steps([a_read_block]))
+
+	def read_sit_modbus_read_blocks_steps(self, some_read_blocks):
+		"""
+		Generator yielding given SitModbusReadBlock list and setting values of their registers with sent results
+			falls back to one request per register if the device refuses a block (i.e. unmapped gap)
+			a register refused by the device is set to None and recorded into self._unsupported_register_registry
+		"""
+		for l_read_block in some_read_blocks:
+			self._logger.debug('read_sit_modbus_read_block-> block:{}'.format(l_read_block.out_short()))
+		l_results = yield some_read_blocks
+		assert len(l_results) == len(some_read_blocks), 'one result per block'
+
+		l_retry_blocks = []
+		for l_read_block, l_result in zip(some_read_blocks, l_results):
+			if not isinstance(l_result, ModbusException):
+				l_block_decoder = SitModbusBlockDecoder(l_read_block)
+				if isinstance(l_result, SitModbusFramedResponse):
+					l_unpacked_values = l_block_decoder.unpacked_values_from_payload(l_result.payload)
+				else:
+					l_unpacked_values = l_block_decoder.unpacked_values(l_result.registers)
+				for l_sit_reg, l_unpacked, l_is_sentinel in l_unpacked_values:
+					self._set_value_with_unpacked(l_sit_reg, l_unpacked, l_is_sentinel)
+				for l_sit_reg in l_block_decoder.fallback_sit_modbus_registers:
+					l_offset = l_read_block.register_offset(l_sit_reg)
+					self._set_value_with_raw_registers(l_sit_reg, l_result.registers[l_offset:l_offset + l_sit_reg.words_count])
+			elif isinstance(l_result, SitModbusSlaveUnavailableError):
+				raise l_result
+			elif len(l_read_block.sit_modbus_registers) > 1:
+				self._logger.warning('read_sit_modbus_read_block-> block refused, reading registers one by one, block:{} msg:{}'.format(l_read_block.out_short(), l_result))
+				l_retry_blocks.extend(SitModbusReadBlock(l_sit_reg) for l_sit_reg in l_read_block.sit_modbus_registers)
+			elif isinstance(l_result, SitModbusExceptionResponseError) and l_result.is_register_unsupported():
+				l_sit_reg = l_read_block.sit_modbus_registers[0]
+				self._logger.warning('read_sit_modbus_read_block-> register unsupported by device, exception_code:{} register:{}'.format(l_result.exception_code, l_sit_reg.out_short()))
+				l_sit_reg.value = None
+				if self._unsupported_register_registry is not None:
+					self._unsupported_register_registry.record_exception(l_sit_reg, l_result.exception_code)
+			else:
+				raise l_result
+		if len(l_retry_blocks) > 0:
+			yield from self.read_sit_modbus_read_blocks_steps(l_retry_blocks)
+
+	def _set_value_with_raw_registers(self, a_sit_modbus_register, some_registers):
+		"""
+		Sets value of given register from its raw words, None if they are the sentinel (not available) value
+		"""
+		if a_sit_modbus_register.is_sentinel_raw(some_registers):
+			a_sit_modbus_register.value = None
+			if self._unsupported_register_registry is not None:
+				self._unsupported_register_registry.record_sentinel(a_sit_modbus_register)
+		else:
+			a_sit_modbus_register.set_value_with_raw(ReadHoldingRegistersResponse(some_registers))
+			if self._unsupported_register_registry is not None:
+				self._unsupported_register_registry.record_supported(a_sit_modbus_register)
+
+	def _set_value_with_unpacked(self, a_sit_modbus_register, an_unpacked, an_is_sentinel):
+		"""
+		Sets value of given register from its value unpacked by SitModbusBlockDecoder, None if it is the sentinel (not available) value
+		"""
+		if an_is_sentinel:
+			a_sit_modbus_register.value = None
+			if self._unsupported_register_registry is not None:
+				self._unsupported_register_registry.record_sentinel(a_sit_modbus_register)
+		else:
+			a_sit_modbus_register.set_value_with_unpacked(an_unpacked)
+			if self._unsupported_register_registry is not None:
+				self._unsupported_register_registry.record_supported(a_sit_modbus_register)
+
+	def identification_sit_modbus_registers(self):
+		"""
+		Returns the list of registers identifying the device (model and serial number) if any
+		"""
+		return [l_sit_reg for l_sit_reg in self._sit_modbus_registers.values() if l_sit_reg.short_description in [SitConstants.SS_REG_SHORT_ABB_MODEL, SitConstants.SS_REG_SHORT_ABB_SERIAL_NUMBER]]
+
+	def unsupported_register_registry(self):
+		"""
+		Returns the SitUnsupportedRegisterRegistry of the device, keyed by values of identification_sit_modbus_registers()
+			or by class, target and slave addresses if the device has no identification register
+		"""
+		l_values = [l_sit_reg.value for l_sit_reg in self.identification_sit_modbus_registers()]
+		l_device_key = SitUnsupportedRegisterRegistry.device_key_from_values(*l_values)
+		if l_device_key == '':
+			l_slave_addresses = sorted(set(l_sit_reg.slave_address for l_sit_reg in self._sit_modbus_registers.values()))
+			l_device_key = SitUnsupportedRegisterRegistry.device_key_from_values(self.__class__.__name__, self._target_ip or self._target_port, *l_slave_addresses)
+		if self._unsupported_register_registries is None:
+			self._unsupported_register_registries = {}
+		if l_device_key not in self._unsupported_register_registries:
+			self._unsupported_register_registries[l_device_key] = SitUnsupportedRegisterRegistry(l_device_key)
+
+		return self._unsupported_register_registries[l_device_key]
 
 
 # LOW LEVEL FUNCTIONS READ
@@ -297,12 +1243,18 @@ class SitModbusDevice (object):
 		else:
 			l_register_index = a_register_index
 			l_register_index_s_debug = str(l_register_index)
+		l_slave_health = self.slave_health(a_slave_address)
+		l_max_retries_count = l_slave_health.start_request(self.MAX_MODBUS_REGISTER_RETRIES_COUNT)
 		l_retries_count = 0
-		while l_retries_count < self.MAX_MODBUS_REGISTER_RETRIES_COUNT:
+		while l_retries_count < l_max_retries_count:
 			try:
 				#Starting add, num of reg to read, slave unit.
-				self._logger.debug('register_value-> index:{} length:{} unit:{} _substract_one_to_register_index:{}'.format(l_register_index, a_register_length, a_slave_address, self._substract_one_to_register_index))
+				l_timeout = self.request_timeout(l_slave_health, l_retries_count)
+				self._logger.debug('register_value-> index:{} length:{} unit:{} timeout:{:.3f} _substract_one_to_register_index:{}'.format(l_register_index, a_register_length, a_slave_address, l_timeout, self._substract_one_to_register_index))
+				l_start_time = time.monotonic()
 				l_result = self._modbus_client.read_holding_registers(l_register_index, a_register_length, unit=a_slave_address) # Average current
+				if l_result is not None and (hasattr(l_result, 'registers') or isinstance(l_result, ExceptionResponse)):
+					l_slave_health.record_round_trip(time.monotonic() - l_start_time)
 				if l_result is not None:
 					if (hasattr(l_result, 'function_code') and 
 							l_result.function_code < 0xFFFFFFFF):
@@ -318,28 +1270,68 @@ class SitModbusDevice (object):
 					self._logger.error(l_msg)
 					raise ModbusException(l_msg)
 
+				if isinstance(l_result, ExceptionResponse):
+					raise SitModbusExceptionResponseError(l_result.exception_code, a_register_index, a_slave_address)
+
 				if not hasattr(l_result, 'registers'):
 					l_msg = 'register_value-> read register has no registers attribute, slave:{} reading register:{} length:{}'.format(a_slave_address, l_register_index, a_register_length)
 					self._logger.error(l_msg)
 					raise ModbusException(l_msg)
 
+				l_slave_health.record_success()
 				return l_result
 			except KeyboardInterrupt:
 				self._logger.exception("register_value-> Keyboard interruption")
 			except ModbusException as l_e:
 				l_retries_count += 1
-				if l_retries_count >= self.MAX_MODBUS_REGISTER_RETRIES_COUNT:
-					self._logger.error('register_value-> error with ModbusException not retrying but raising')
+				if not l_slave_health.is_retry_after(l_e, l_retries_count, l_max_retries_count):
+					self._logger.error('register_value-> error with ModbusException not retrying but raising:{}'.format(l_e))
 					raise l_e
-				else:
-					self._logger.error('register_value-> error with ModbusException retrying {}'.format(l_retries_count))
-					self.disconnect
-					time.sleep(0.2)
-					self.connect
+				self._logger.error('register_value-> error with ModbusException retrying {}:{}'.format(l_retries_count, l_e))
+				if isinstance(l_e, ConnectionException):
+					self.reconnect()
+				time.sleep(l_slave_health.retry_delay(l_retries_count))
 			except Exception as l_e:
 				self._logger.exception("register_value-> Exception occured, msg:%s" % l_e)
 				raise l_e
 
+	def slave_health(self, a_slave_address):
+		"""
+		Returns the SitModbusSlaveHealth of given slave of the target, shared by all devices of the process
+		"""
+		l_slave_key = (self._target_ip or str(self._target_port), a_slave_address)
+		l_res = SitModbusDevice._slave_healths.get(l_slave_key)
+		if l_res is None:
+			l_res = SitModbusDevice._slave_healths.setdefault(l_slave_key, SitModbusSlaveHealth(l_slave_key))
+
+		return l_res
+
+	def learned_request_timeout(self, a_slave_health, a_retries_count=0):
+		"""
+		Returns the timeout of the next request to given slave learned from its round-trip times, the static timeout
+			of the target mode until it answered, see SitModbusSlaveHealth.request_timeout, also used by SitModbusAsyncEngine
+		"""
+		l_default_timeout = self._rtu_timeout if self._target_mode == self.TARGET_MODE_RTU else self._tcp_timeout
+
+		return a_slave_health.request_timeout(l_default_timeout, self._min_request_timeout, max(self._max_request_timeout, l_default_timeout), a_retries_count)
+
+	def request_timeout(self, a_slave_health, a_retries_count=0):
+		"""
+		Sets the timeout of the modbus client for the next request to given slave and returns it, see learned_request_timeout
+		"""
+		l_res = self.learned_request_timeout(a_slave_health, a_retries_count)
+		self._modbus_client.timeout = l_res
+		if isinstance(self._modbus_client, ModbusSerialClient) and self._modbus_client.socket is not None:
+			self._modbus_client.socket.timeout = l_res # serial.Serial read timeout, set at connect only by pymodbus
+
+		return l_res
+
+	@classmethod
+	def slave_healths_status(cls, an_is_unhealthy_only=False):
+		"""
+		Returns the list of SitModbusSlaveHealth.status() of every slave requested by the process, for monitoring
+		"""
+		return [l_health.status() for l_health in SitModbusDevice._slave_healths.values() if not an_is_unhealthy_only or not l_health.is_healthy()]
 
 	def _int_from_register(self, a_register, a_start_index, a_bits_count):
 		"""
@@ -675,20 +1667,18 @@ class SitModbusDevice (object):
 
 		return l_result
 
-# LOW LEVEL FUNCTIONS READ
+# LOW LEVEL FUNCTIONS WRITE
 
 	def write_register_value(self, a_register_index, a_slave_address, a_value):
 		"""
-		Returns a given register value
+		Writes given word into given register with one write_register (FC06) request and returns the response
 		@a_register_index
-		@a_register_length: 1 register is 16 bits (2 bytes = 1 word)
 		@a_slave_address
-		@a_value
+		@a_value: 1 register is 16 bits (2 bytes = 1 word), see write_sit_modbus_register_values for typed values
 		"""
-		assert self.is_connected(), 'register_value->device is not connected'
-		assert self.valid_slave_address(self._slave_address), 'register_value->Slave address is None'
+		assert self.is_connected(), 'write_register_value->device is not connected'
+		assert self.valid_slave_address(a_slave_address), 'write_register_value->Slave address is not valid:' + str(a_slave_address)
 
-		#self._logger.debug('register_value-> _substract_one_to_register_index:%s' % (self._substract_one_to_register_index))
 		if self._substract_one_to_register_index:
 			l_register_index = a_register_index - 1
 			l_register_index_s_debug = str(a_register_index) + '-1'
@@ -696,31 +1686,64 @@ class SitModbusDevice (object):
 			l_register_index = a_register_index
 			l_register_index_s_debug = str(l_register_index)
 		try:
-			#Starting add, num of reg to read, slave unit.
-			l_result = self._modbus_client.write_register(l_register_index, a_value, unit=a_slave_address) # Average current
-			if l_result is not None:
-				if (hasattr(l_result, 'function_code') and 
-						l_result.function_code < 0xFFFFFFFF):
-					self._logger.debug("register_value-> read register index:%s (%s) value:(%s) length:%s slave_address:%s" % (l_register_index, l_register_index_s_debug,'|'.join( str(l_elt) for l_elt in l_result.registers), a_register_length, self._slave_address))
-					#self._logger.debug(l_result)
-					#self._logger.debug("register_value->register 0 value:%s" % l_result.getRegister(1))
-					#self._logger.debug("register_value-> 0 type:%s" % type(l_result.getRegister(0)))
-					#self._logger.debug(l_result._str_())
-				else:
-					self._logger.error("register_value-> returned code is invalid: {}".format(l_result))
-			else:
-				self._logger.error("register_value-> No register received, l_result is None")
-
-			if not hasattr(l_result, 'registers'):
-				raise Exception('register_value-> read register has no registers attribute, reading register:' + str(l_register_index)) # TODO CORRECTME HERE
+			with self.request_lane(SitModbusRequestPriority.PRIORITY_CONTROL):
+				l_result = self._modbus_client.write_register(l_register_index, a_value, unit=a_slave_address)
+			if l_result is None:
+				l_msg = "write_register_value-> No response received, l_result is None"
+				self._logger.error(l_msg)
+				raise ModbusException(l_msg)
+			if isinstance(l_result, ExceptionResponse):
+				raise SitModbusExceptionResponseError(l_result.exception_code, a_register_index, a_slave_address)
+			self._logger.debug("write_register_value-> wrote register index:%s (%s) value:%s slave_address:%s" % (l_register_index, l_register_index_s_debug, a_value, a_slave_address))
 
 			return l_result
 		except KeyboardInterrupt:
-			self._logger.exception("register_value-> Keyboard interruption")
+			self._logger.exception("write_register_value-> Keyboard interruption")
 		except Exception as l_e:
-			self._logger.exception("register_value-> Exception occured, msg:%s" % l_e)
+			self._logger.exception("write_register_value-> Exception occured, msg:%s" % l_e)
 			raise l_e
 
+	def write_register_values(self, a_register_index, some_words, a_slave_address):
+		"""
+		Writes given words from given register index with one write_registers (FC16) request and returns the response
+			retried as register_value, writing the same words again is harmless, except after an exception response of the slave
+		"""
+		assert self.is_connected(), 'write_register_values->device is not connected'
+		assert 0 < len(some_words) <= self.MAX_WRITE_BLOCK_WORDS_COUNT, 'write_register_values->invalid words count:{}'.format(len(some_words))
+		assert self.valid_slave_address(a_slave_address), 'write_register_values->Slave address is not valid:' + str(a_slave_address)
+
+		l_register_index = self.modbus_register_index(a_register_index)
+		l_slave_health = self.slave_health(a_slave_address)
+		l_max_retries_count = l_slave_health.start_request(self.MAX_MODBUS_REGISTER_RETRIES_COUNT)
+		l_retries_count = 0
+		while True:
+			try:
+				with self.request_lane(SitModbusRequestPriority.PRIORITY_CONTROL):
+					l_timeout = self.request_timeout(l_slave_health, l_retries_count)
+					self._logger.debug('write_register_values-> index:{} words:{} unit:{} timeout:{:.3f}'.format(l_register_index, some_words, a_slave_address, l_timeout))
+					l_start_time = time.monotonic()
+					l_result = self._modbus_client.write_registers(l_register_index, some_words, unit=a_slave_address)
+				if l_result is None:
+					raise ModbusException('write_register_values-> No response received, slave:{} register:{}'.format(a_slave_address, l_register_index))
+				if isinstance(l_result, ExceptionResponse):
+					l_slave_health.record_round_trip(time.monotonic() - l_start_time)
+					raise SitModbusExceptionResponseError(l_result.exception_code, a_register_index, a_slave_address)
+				if not isinstance(l_result, WriteMultipleRegistersResponse) or l_result.address != l_register_index or l_result.count != len(some_words):
+					raise ModbusException('write_register_values-> unexpected response:{} slave:{} register:{} count:{}'.format(l_result, a_slave_address, l_register_index, len(some_words)))
+				l_slave_health.record_round_trip(time.monotonic() - l_start_time)
+				l_slave_health.record_success()
+
+				return l_result
+			except ModbusException as l_e:
+				l_retries_count += 1
+				if not l_slave_health.is_retry_after(l_e, l_retries_count, l_max_retries_count, an_is_write=True):
+					self._logger.error('write_register_values-> error with ModbusException not retrying but raising:{}'.format(l_e))
+					raise l_e
+				self._logger.error('write_register_values-> error with ModbusException retrying {}:{}'.format(l_retries_count, l_e))
+				if isinstance(l_e, ConnectionException):
+					self.reconnect()
+				time.sleep(l_slave_health.retry_delay(l_retries_count))
+
 # CONNECTION
 
 	def is_connected(self):
@@ -730,6 +1753,38 @@ class SitModbusDevice (object):
 		#self._logger.debug("is_connected-> %s, modbusclient:%s" % (self._is_connected, self._modbus_client))
 		return self._modbus_client is not None and self._is_connected
 
+	def share_modbus_client(self, a_sit_modbus_device):
+		"""
+		Uses the connected modbus client of given device having the same target, only one of both has to disconnect
+		"""
+		assert isinstance(a_sit_modbus_device, SitModbusDevice), 'a_sit_modbus_device is a SitModbusDevice'
+		assert a_sit_modbus_device.is_connected(), 'given device is connected'
+		assert (a_sit_modbus_device.target_ip, str(a_sit_modbus_device.target_port)) == (self._target_ip, str(self._target_port)), 'same target'
+		self._modbus_client = a_sit_modbus_device._modbus_client
+		self._is_connected = True
+
+	def reset_connection(self):
+		"""
+		Closes the modbus client after an error without raising, is_connected is False afterwards
+		"""
+		self.close_tcp_connection_pool()
+		if self._modbus_client is not None:
+			try:
+				self._modbus_client.close()
+			except Exception as l_e:
+				self._logger.warning('reset_connection-> error closing modbus client:{}'.format(l_e))
+		self._is_connected = False
+
+	def reconnect(self):
+		"""
+		Closes and opens again the socket (or serial port) of the modbus client after a connection error,
+			the client object is kept so that devices sharing it (see share_modbus_client) keep using it
+		"""
+		assert self._modbus_client is not None, 'has a modbus client'
+		self._modbus_client.close()
+		if not self._modbus_client.connect():
+			self._logger.warning('reconnect-> could not reconnect modbus client, target:{}'.format(self._target_ip or self._target_port))
+
 	def disconnect(self):
 		"""
 		Disconnects modbus client
@@ -738,6 +1793,7 @@ class SitModbusDevice (object):
 		assert self._modbus_client is not None
 
 		try:
+			self.close_tcp_connection_pool()
 			self._modbus_client.close()
 			self._is_connected = False
 			self._logger.info('disconnect -> Disconnection success')
@@ -753,7 +1809,7 @@ class SitModbusDevice (object):
 		"""App help"""
 		self._parser = argparse.ArgumentParser(description=self.PARSER_DESCRIPTION)
 		self.add_arg_parse()
-		l_args = self._parser.parse_args()
+		l_args = self._parser.parse_args(self._forced_script_arguments)
 		self._args = l_args
 
 	def add_arg_parse(self):
@@ -767,6 +1823,14 @@ class SitModbusDevice (object):
 		self._parser.add_argument('-t', '--test', help='Runs test method', action="store_true")
 		self._parser.add_argument('-a', '--display_all', help='Displays all register after reading them', action='store_true')
 		self._parser.add_argument('-d', '--long', help='Displays all register after reading them, with long version and description', action='store_true')
+		self._parser.add_argument('--daemon', help='Keeps running and connected, executing a cycle every --interval seconds until SIGTERM', action='store_true')
+		self._parser.add_argument('--interval', help='Seconds between two cycles of --daemon mode, default:{}'.format(self.DEFAULT_DAEMON_INTERVAL), type=float, default=self.DEFAULT_DAEMON_INTERVAL)
+		self._parser.add_argument('--pipeline_window', help='Modbus TCP requests outstanding on the connection, 1 to send them one after the other, default:{}'.format(self._pipeline_window), type=int, default=None)
+		self._parser.add_argument('--broker_socket_path', help='Unix socket of the connection broker used when it exists, default:{}'.format(self._broker_socket_path), default=None)
+		self._parser.add_argument('--no_broker', help='Connects directly even if the connection broker is running', action='store_true')
+		self._parser.add_argument('--tcp_connections', help='TCP connections to the gateway reading slaves concurrently, default:{}'.format(self._tcp_connection_pool_size), type=int, default=None)
+		self._parser.add_argument('--change_gated', help='Reads the data sequence register first (SMA NewData i.e.) and skips reading, storing and events of slaves whose data did not change', action='store_true', default=None)
+		self._parser.add_argument('--tcp_framer', help='Reads register blocks with a minimal Modbus TCP framer, falling back to pymodbus for unusual answers', action='store_true', default=None)
 
 		# REQUIRED
 		l_required_named = self._parser.add_argument_group('required named arguments')
@@ -808,12 +1872,97 @@ class SitModbusDevice (object):
 				if self._args.test:
 					self.test()
 
+	def execute_cycle(self):
+		"""
+		Reads all registers and stores, displays, raises events and tests them according to script arguments
+			for each slave yielded by poll_sit_modbus_registers
+		"""
+		for l_slave in self.poll_sit_modbus_registers():
+			if self._args.store_values:
+				self.store_values_into_csv(self._sit_modbus_registers, l_slave)
+			if self._args.display_all:
+				print(self.out_human_readable(a_with_description=self._args.long))
+			if getattr(self._args, 'raise_event', False):
+				assert len(self._sit_modbus_registers) > 0, 'modbus_registers_not_empty'
+				self.call_sit_modbus_registers_events()
+			if self._args.test:
+				self.test()
+
+	def execute_cycles(self):
+		"""
+		Executes one cycle, or cycles until stopped if --daemon was given
+		"""
+		if self._args.daemon:
+			self.run_daemon(self._args.interval)
+		else:
+			self.execute_cycle()
+
+# DAEMON
+
+	def run_daemon(self, an_interval=DEFAULT_DAEMON_INTERVAL, a_cycles_count=None):
+		"""
+		Executes execute_cycle every an_interval seconds on a monotonic schedule until SIGTERM/SIGINT (or a_cycles_count cycles),
+			the modbus client stays connected and registers are built once, a cycle ending with an
+			error is logged, disconnects and the next one reconnects, only SIGTERM/SIGINT stop the daemon
+			A cycle lasting more than an_interval skips the missed ticks instead of running late cycles in a row
+		"""
+		assert an_interval > 0, 'an_interval > 0:{}'.format(an_interval)
+		self._daemon_stop_event = threading.Event()
+		l_previous_handlers = {}
+		if threading.current_thread() is threading.main_thread():
+			for l_signal in (signal.SIGTERM, signal.SIGINT):
+				l_previous_handlers[l_signal] = signal.signal(l_signal, self._daemon_signal_handler)
+		self._logger.info('run_daemon-> started with interval:{}s'.format(an_interval))
+		l_cycles_count = 0
+		l_next_cycle_time = time.monotonic()
+		try:
+			while not self._daemon_stop_event.is_set() and (a_cycles_count is None or l_cycles_count < a_cycles_count):
+				try:
+					if not self.is_connected():
+						self.connect()
+					if not self.is_connected():
+						raise ConnectionException('run_daemon-> could not connect to {}'.format(self._target_ip or self._target_port))
+					self.execute_cycle()
+				except (ModbusException, socket.error) as l_e:
+					self._logger.error('run_daemon-> cycle {} failed, reconnecting next cycle:{}'.format(l_cycles_count, l_e))
+					self.reset_connection()
+				except Exception as l_e:
+					self._logger.exception('run_daemon-> cycle {} failed with unexpected error, reconnecting next cycle:{}'.format(l_cycles_count, l_e))
+					self.reset_connection()
+				for l_status in self.slave_healths_status(True):
+					self._logger.warning('run_daemon-> slave health:{}'.format(json.dumps(l_status)))
+				l_cycles_count += 1
+				l_next_cycle_time += an_interval
+				l_now = time.monotonic()
+				if l_next_cycle_time < l_now:
+					l_skipped_count = int((l_now - l_next_cycle_time) // an_interval) + 1
+					self._logger.warning('run_daemon-> cycle {} overran interval, skipping {} cycle(s)'.format(l_cycles_count, l_skipped_count))
+					l_next_cycle_time += l_skipped_count * an_interval
+				self._daemon_stop_event.wait(max(0, l_next_cycle_time - time.monotonic()))
+		finally:
+			for l_signal, l_handler in l_previous_handlers.items():
+				signal.signal(l_signal, l_handler)
+			self._logger.info('run_daemon-> stopped after {} cycle(s)'.format(l_cycles_count))
+
+	def stop_daemon(self):
+		"""
+		Makes run_daemon return after the current cycle
+		"""
+		if self._daemon_stop_event is not None:
+			self._daemon_stop_event.set()
+
+	def _daemon_signal_handler(self, a_signal_number, a_frame):
+		self._logger.info('_daemon_signal_handler-> received signal {}, stopping'.format(a_signal_number))
+		self.stop_daemon()
+
 # EVENTS
 
 	def call_sit_modbus_registers_events(self):
 		l_index = 0
 		for l_short_desc, l_sit_reg in self._sit_modbus_registers.items():
-			if l_sit_reg.has_event():
+			if l_sit_reg.has_event() and l_sit_reg.value is None:
+				self._logger.debug('call_sit_modbus_registers_events-> no value, not calling event for register_short:{}'.format(l_sit_reg.out_short()))
+			elif l_sit_reg.has_event():
 				self._logger.debug('call_sit_modbus_registers_events-> Calling event for register_short:{}'.format(l_sit_reg.out_short()))
 				self._logger.debug('call_sit_modbus_registers_events-> counter:{}/{}'.format(l_index, len(self._sit_modbus_registers.items())))
 				l_sit_reg.call_event()
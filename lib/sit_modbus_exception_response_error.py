@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Modbus exception response (function code + 0x80) returned by a device, see sit_modbus_device.register_value
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	from pymodbus.exceptions import ModbusException
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusExceptionResponseError(ModbusException):
+
+# CONSTANTS
+	ILLEGAL_FUNCTION = 0x01
+	ILLEGAL_DATA_ADDRESS = 0x02
+	ILLEGAL_DATA_VALUE = 0x03
+	SLAVE_FAILURE = 0x04
+	GATEWAY_PATH_UNAVAILABLE = 0x0A
+	GATEWAY_NO_RESPONSE = 0x0B
+	REGISTER_UNSUPPORTED_CODES = [ILLEGAL_FUNCTION, ILLEGAL_DATA_ADDRESS, ILLEGAL_DATA_VALUE] # the register will never answer, retrying is useless
+	GATEWAY_ERROR_CODES = [GATEWAY_PATH_UNAVAILABLE, GATEWAY_NO_RESPONSE] # answered by the gateway for a slave which did not answer
+
+# VARIABLES
+	_exception_code = None
+	_register_index = None
+	_slave_address = None
+
+# SETTERS AND GETTERS
+
+	@property
+	def exception_code(self):
+		return self._exception_code
+
+	@property
+	def register_index(self):
+		return self._register_index
+
+	@property
+	def slave_address(self):
+		return self._slave_address
+
+# INITIALIZE
+
+	def __init__(self, an_exception_code, a_register_index, a_slave_address):
+		"""
+			Initialize
+		"""
+		self._exception_code = an_exception_code
+		self._register_index = a_register_index
+		self._slave_address = a_slave_address
+		super().__init__('exception response code:{} register_index:{} slave_address:{}'.format(an_exception_code, a_register_index, a_slave_address))
+
+# STATUS REPORT
+
+	def is_register_unsupported(self):
+		"""
+		True if the device answers that the register does not exist or cannot be read
+		"""
+		return self._exception_code in self.REGISTER_UNSUPPORTED_CODES
+
+	def is_gateway_error(self):
+		"""
+		True if a gateway answered instead of the slave, the slave itself may be down
+		"""
+		return self._exception_code in self.GATEWAY_ERROR_CODES
+
+#################### END CLASS ######################
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Fleet decoder, optional NumPy path decoding the same register layout read from many slaves
+#			(i.e. ClusterControllerInverter units 3..N) as a 2-D array of words, one vectorised step per column
+#			scale factors and sentinels are applied as array operations, registers without numeric struct_format
+#			(strings, enums) are not part of the table
+#		CALL SAMPLE:
+#			l_table = l_device.read_fleet_table([3, 4, 5])
+#			l_table.columns['W'].sum() # masked array, slaves where W is not available are masked
+#			SitModbusFleetDecoder.table_row(l_table, 4)['W']
+#		REQUIREMENT: sudo apt-get install python3-numpy (or pip3 install numpy)
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	from collections import OrderedDict, namedtuple
+	import numpy
+	from pymodbus.constants import Endian
+	from sit_logger import SitLogger
+	from sit_modbus_register import SitModbusRegister
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+# numpy.ndarray of slave addresses, OrderedDict short_description => numpy.ma.MaskedArray with one value per slave
+SitModbusFleetTable = namedtuple('SitModbusFleetTable', ['slave_addresses', 'columns'])
+
+class SitModbusFleetDecoder(object):
+
+# CONSTANTS
+	NUMPY_DTYPES = {'h': 'i2', 'H': 'u2', 'i': 'i4', 'I': 'u4', 'q': 'i8', 'Q': 'u8', 'f': 'f4', 'd': 'f8'} # struct_format => numpy dtype without byte order
+	SCALE_FACTOR_SENTINEL = 0x8000
+	MISSING_WORD = None # value of a word not read in the words given to decode
+
+# VARIABLES
+	_logger = None
+	_register_index = None # first register index of the layout
+	_words_count = 0
+	_columns = None # list of (short_description, word offset, words count, dtype, word order, sentinel registers, scale factor word offset or None)
+
+# SETTERS AND GETTERS
+
+	@property
+	def register_index(self):
+		return self._register_index
+
+	@property
+	def words_count(self):
+		return self._words_count
+
+	@property
+	def short_descriptions(self):
+		return [l_column[0] for l_column in self._columns]
+
+# INITIALIZE
+
+	def __init__(self, some_sit_modbus_registers):
+		"""
+			Initialize with the registers of one slave, the layout read from every slave
+		"""
+		self._logger = SitLogger().new_logger(__name__)
+		l_sit_regs = [l_sit_reg for l_sit_reg in some_sit_modbus_registers if self.is_decodable(l_sit_reg)]
+		assert len(l_sit_regs) > 0, 'at least one numeric register'
+		l_indexes = [l_sit_reg.register_index for l_sit_reg in l_sit_regs] + [l_sit_reg.scale_factor_register_index for l_sit_reg in l_sit_regs if l_sit_reg.scale_factor_register_index is not None]
+		l_ends = [l_sit_reg.register_index + l_sit_reg.words_count for l_sit_reg in l_sit_regs] + [l_index + 1 for l_index in l_indexes]
+		self._register_index = min(l_indexes)
+		self._words_count = max(l_ends) - self._register_index
+		self._columns = []
+		for l_sit_reg in l_sit_regs:
+			l_sf_offset = None
+			if l_sit_reg.scale_factor_register_index is not None:
+				l_sf_offset = l_sit_reg.scale_factor_register_index - self._register_index
+			self._columns.append((
+				l_sit_reg.short_description,
+				l_sit_reg.register_index - self._register_index,
+				l_sit_reg.words_count,
+				numpy.dtype('>' + self.NUMPY_DTYPES[l_sit_reg.struct_format]),
+				l_sit_reg.word_order,
+				l_sit_reg.sentinel_registers,
+				l_sf_offset))
+
+		self.invariants()
+
+	def is_decodable(self, a_sit_modbus_register):
+		"""
+		True if given register is a single numeric value with big endian bytes
+		"""
+		assert isinstance(a_sit_modbus_register, SitModbusRegister), 'a_sit_modbus_register is a SitModbusRegister'
+		l_res = a_sit_modbus_register.struct_format in self.NUMPY_DTYPES and a_sit_modbus_register.byte_order == Endian.Big
+		if not l_res:
+			self._logger.debug('is_decodable-> not in fleet table:{}'.format(a_sit_modbus_register.short_description))
+
+		return l_res
+
+# DECODING
+
+	def decode(self, some_words_by_slave):
+		"""
+		Returns a SitModbusFleetTable
+		@param some_words_by_slave: OrderedDict slave_address => list of self._words_count words from self._register_index,
+			MISSING_WORD for words not read, None for a slave not read at all
+		"""
+		l_slaves = list(some_words_by_slave.keys())
+		l_rows = []
+		for l_words in some_words_by_slave.values():
+			if l_words is None:
+				l_words = [self.MISSING_WORD] * self._words_count
+			assert len(l_words) == self._words_count, 'decode-> {} words, {} expected'.format(len(l_words), self._words_count)
+			l_rows.append([-1 if l_word is self.MISSING_WORD else l_word for l_word in l_words])
+		l_raw = numpy.array(l_rows, dtype=numpy.int32).reshape(len(l_slaves), self._words_count)
+		l_missing = l_raw < 0
+		l_words = l_raw.astype('>u2')
+
+		l_columns = OrderedDict()
+		for l_short_desc, l_offset, l_count, l_dtype, l_word_order, l_sentinel, l_sf_offset in self._columns:
+			l_column_words = l_words[:, l_offset:l_offset + l_count]
+			l_mask = l_missing[:, l_offset:l_offset + l_count].any(axis=1)
+			if l_sentinel is not None:
+				l_mask |= (l_column_words == numpy.array(l_sentinel, dtype='>u2')).all(axis=1)
+			if l_word_order == Endian.Little:
+				l_column_words = l_column_words[:, ::-1]
+			l_values = numpy.ascontiguousarray(l_column_words).view(l_dtype)[:, 0]
+			if l_sf_offset is not None:
+				l_mask |= l_missing[:, l_sf_offset] | (l_words[:, l_sf_offset] == self.SCALE_FACTOR_SENTINEL)
+				l_values = l_values * numpy.power(10.0, l_words[:, l_sf_offset].view('>i2'))
+			l_columns[l_short_desc] = numpy.ma.MaskedArray(l_values, mask=l_mask)
+
+		return SitModbusFleetTable(numpy.array(l_slaves), l_columns)
+
+	@staticmethod
+	def table_row(a_fleet_table, a_slave_address):
+		"""
+		Returns an OrderedDict short_description => value (None if masked) of given slave
+		"""
+		l_row_index = list(a_fleet_table.slave_addresses).index(a_slave_address)
+		l_res = OrderedDict()
+		for l_short_desc, l_column in a_fleet_table.columns.items():
+			l_res[l_short_desc] = None if l_column.mask[l_row_index] else l_column.data[l_row_index].item()
+
+		return l_res
+
+# INVARIANTS
+
+	def invariants(self):
+		assert self._words_count > 0, 'words_count > 0'
+		assert len(self._columns) > 0, 'columns not empty'
+
+#################### END CLASS ######################
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Read holding registers response of SitModbusTcpFramer, the payload is a memoryview into the
+#			buffer of the framer, valid until its next read_holding_registers
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import struct
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusFramedResponse(object):
+
+# CONSTANTS
+	WORDS_STRUCT_FORMAT = '>{}H' # modbus words as sent on the wire
+
+# VARIABLES
+	_payload = None # memoryview of the register bytes of the response
+	_registers = None # list of words, unpacked on first use only
+
+# SETTERS AND GETTERS
+
+	@property
+	def payload(self):
+		return self._payload
+
+	@property
+	def registers(self):
+		"""
+		List of words of the response as in ReadHoldingRegistersResponse, for registers decoded by set_value_with_raw
+		"""
+		if self._registers is None:
+			self._registers = list(struct.unpack_from(self.WORDS_STRUCT_FORMAT.format(len(self._payload) // 2), self._payload))
+		return self._registers
+
+# INITIALIZE
+
+	def __init__(self, a_payload):
+		"""
+			Initialize
+			@param a_payload: memoryview of the register bytes
+		"""
+		self._payload = a_payload
+
+		self.invariants()
+
+# INVARIANTS
+
+	def invariants(self):
+		assert len(self._payload) % 2 == 0, 'payload of whole words'
+
+#################### END CLASS ######################
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Modbus TCP read holding registers requests pipelined on the socket of a pymodbus sync client,
+#			up to window requests are outstanding, responses are matched by transaction id. Falls back to
+#			window 1 (one request at a time) for a gateway answering wrongly, see SitModbusDevice.read_block_results
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import time
+	import select
+	import struct
+	from collections import OrderedDict
+	from pymodbus.factory import ClientDecoder
+	from pymodbus.exceptions import ConnectionException
+	from pymodbus.register_read_message import ReadHoldingRegistersRequest
+	from sit_logger import SitLogger
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusPipelinedTcpClient(object):
+
+# CONSTANTS
+	MBAP_HEADER = struct.Struct('>HHHB') # transaction id, protocol id, length, unit id
+	MAX_TRANSACTION_ID = 0xFFFF
+	DEFAULT_WINDOW = 4 # requests outstanding on the connection
+	RECV_SIZE = 4096
+
+# VARIABLES
+	_logger = None
+	_target_key = None # (ip, port)
+	_window = DEFAULT_WINDOW
+	_decoder = None
+	_transaction_id = 0
+	_fall_back_reason = None
+
+# SETTERS AND GETTERS
+
+	@property
+	def target_key(self):
+		return self._target_key
+
+	@property
+	def window(self):
+		return self._window
+
+	@property
+	def fall_back_reason(self):
+		"""
+		Why the window was set to 1, None if it was not
+		"""
+		return self._fall_back_reason
+
+# INITIALIZE
+
+	def __init__(self, a_target_key, a_window=DEFAULT_WINDOW):
+		"""
+			Initialize
+			@param a_target_key: (ip, port)
+		"""
+		assert a_window > 0, 'a_window > 0:{}'.format(a_window)
+		self._logger = SitLogger().new_logger(__name__)
+		self._target_key = a_target_key
+		self._window = a_window
+		self._decoder = ClientDecoder()
+
+		self.invariants()
+
+# STATUS REPORT
+
+	def is_pipelining(self):
+		return self._window > 1
+
+# STATUS SETTING
+
+	def fall_back_to_single_request(self, a_reason):
+		"""
+		Sets the window to 1 for the life of the process, the gateway does not support outstanding requests
+		"""
+		if self._window > 1:
+			self._logger.warning('fall_back_to_single_request-> target:{} window {} => 1, reason:{}'.format(self._target_key, self._window, a_reason))
+			self._window = 1
+			self._fall_back_reason = a_reason
+
+# READ
+
+	def read_holding_registers(self, a_modbus_client, some_requests, a_timeout):
+		"""
+		Sends given requests on the socket of a_modbus_client with up to self._window outstanding
+			returns a list with (response, round trip seconds) for each request, (None, None) if not answered in time
+			the socket is closed after a timeout or a wrong answer so that late responses are discarded, pymodbus
+			connects again on its next request
+		@param some_requests: list of (address, count, unit)
+		@param a_timeout: seconds without any response before giving up the outstanding requests
+		"""
+		assert a_timeout > 0, 'a_timeout > 0:{}'.format(a_timeout)
+		if a_modbus_client.socket is None and not a_modbus_client.connect():
+			raise ConnectionException('read_holding_registers-> could not connect to {}'.format(self._target_key))
+		l_socket = a_modbus_client.socket
+		l_res = [(None, None)] * len(some_requests)
+		l_pending = OrderedDict() # transaction_id => (request index, unit, send time)
+		l_next_index = 0
+		l_buffer = b''
+		l_is_reset_needed = False
+		try:
+			l_socket.settimeout(a_timeout)
+			l_deadline = time.monotonic() + a_timeout
+			while l_next_index < len(some_requests) or len(l_pending) > 0:
+				while l_next_index < len(some_requests) and len(l_pending) < self._window:
+					l_address, l_count, l_unit = some_requests[l_next_index]
+					l_transaction_id = self._next_transaction_id()
+					l_request = ReadHoldingRegistersRequest(l_address, l_count, unit=l_unit)
+					l_pdu = struct.pack('>B', l_request.function_code) + l_request.encode()
+					l_socket.sendall(self.MBAP_HEADER.pack(l_transaction_id, 0, len(l_pdu) + 1, l_unit) + l_pdu)
+					l_pending[l_transaction_id] = (l_next_index, l_unit, time.monotonic())
+					l_next_index += 1
+				l_ready = select.select([l_socket], [], [], max(0, l_deadline - time.monotonic()))
+				if not l_ready[0]:
+					self._logger.warning('read_holding_registers-> target:{} {} request(s) not answered in {:.3f}s'.format(self._target_key, len(l_pending), a_timeout))
+					l_is_reset_needed = True
+					break
+				l_data = l_socket.recv(self.RECV_SIZE)
+				if l_data == b'':
+					l_is_reset_needed = True
+					raise ConnectionException('read_holding_registers-> connection closed by {}'.format(self._target_key))
+				l_buffer += l_data
+				while len(l_buffer) >= self.MBAP_HEADER.size:
+					l_transaction_id, l_protocol_id, l_length, l_unit = self.MBAP_HEADER.unpack_from(l_buffer)
+					if len(l_buffer) < self.MBAP_HEADER.size + l_length - 1:
+						break
+					l_pdu = l_buffer[self.MBAP_HEADER.size:self.MBAP_HEADER.size + l_length - 1]
+					l_buffer = l_buffer[self.MBAP_HEADER.size + l_length - 1:]
+					l_response = self._decoder.decode(l_pdu) if l_protocol_id == 0 else None
+					l_entry = l_pending.pop(l_transaction_id, None)
+					if l_entry is None or l_response is None or l_entry[1] != l_unit or l_response.function_code & 0x7F != ReadHoldingRegistersRequest.function_code:
+						self.fall_back_to_single_request('unexpected response transaction_id:{} protocol_id:{} unit:{} pdu:{}'.format(l_transaction_id, l_protocol_id, l_unit, l_pdu.hex()))
+						l_is_reset_needed = True
+						return l_res
+					l_res[l_entry[0]] = (l_response, time.monotonic() - l_entry[2])
+				l_deadline = time.monotonic() + a_timeout
+		except OSError as l_e:
+			l_is_reset_needed = True
+			raise ConnectionException('read_holding_registers-> socket error with {}:{}'.format(self._target_key, l_e))
+		finally:
+			if l_is_reset_needed or len(l_buffer) > 0:
+				a_modbus_client.close()
+
+		return l_res
+
+	def _next_transaction_id(self):
+		self._transaction_id = self._transaction_id % self.MAX_TRANSACTION_ID + 1
+		return self._transaction_id
+
+# INVARIANTS
+
+	def invariants(self):
+		assert self._window > 0, 'window > 0'
+
+#################### END CLASS ######################
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Lock of a connection shared by threads, granted to the waiting request of highest priority
+#			(see SitModbusRequestPriority) then in arrival order, so that a control write waits for the request being
+#			sent only and not for the whole polling sweep queued before it
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import heapq
+	import itertools
+	import threading
+	import time
+	from contextlib import contextmanager
+	from sit_modbus_request_priority import SitModbusRequestPriority
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusPriorityLock(object):
+
+# VARIABLES
+	_condition = None
+	_waiters = None # heap of (priority, arrival sequence)
+	_sequence = None # itertools.count of arrivals
+	_is_locked = False
+	_request_priority = None # SitModbusRequestPriority, queueing delays per priority
+
+# SETTERS AND GETTERS
+
+	@property
+	def request_priority(self):
+		return self._request_priority
+
+# INITIALIZE
+
+	def __init__(self):
+		"""
+			Initialize
+		"""
+		self._condition = threading.Condition()
+		self._waiters = []
+		self._sequence = itertools.count()
+		self._request_priority = SitModbusRequestPriority()
+
+# STATUS REPORT
+
+	def status(self):
+		"""
+		Returns the queueing delays per priority and the count of waiting requests
+		"""
+		with self._condition:
+			l_waiting_count = len(self._waiters)
+
+		return {'waiting': l_waiting_count, 'delays': self._request_priority.status()}
+
+# LOCKING
+
+	def acquire(self, a_priority):
+		"""
+		Waits until no request of higher priority or of same priority arrived before is waiting and the lock is free, then takes it
+			a wait interrupted by an exception leaves the queue of waiters
+		"""
+		assert SitModbusRequestPriority.valid_priority(a_priority), 'invalid a_priority:{}'.format(a_priority)
+		l_start = time.monotonic()
+		with self._condition:
+			l_waiter = (a_priority, next(self._sequence))
+			heapq.heappush(self._waiters, l_waiter)
+			try:
+				while self._is_locked or self._waiters[0] != l_waiter:
+					self._condition.wait()
+			except BaseException:
+				# interrupted waiter (KeyboardInterrupt, signal handler raising i.e.) would block the head of the heap forever
+				self._waiters.remove(l_waiter)
+				heapq.heapify(self._waiters)
+				self._condition.notify_all()
+				raise
+			heapq.heappop(self._waiters)
+			self._is_locked = True
+		self._request_priority.record_delay(a_priority, time.monotonic() - l_start)
+
+	def release(self):
+		with self._condition:
+			assert self._is_locked, 'lock is taken'
+			self._is_locked = False
+			self._condition.notify_all()
+
+	@contextmanager
+	def lane(self, a_priority):
+		"""
+		Context holding the lock for one request (or an indivisible group of requests) of given priority
+		"""
+		self.acquire(a_priority)
+		try:
+			yield self
+		finally:
+			self.release()
+
+#################### END CLASS ######################
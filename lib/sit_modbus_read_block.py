@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Contiguous range of holding registers of one slave, read with one read_holding_registers
+#			request, see sit_modbus_read_planner.py
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	from sit_modbus_register import SitModbusRegister
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusReadBlock(object):
+
+# VARIABLES
+	_slave_address = None
+	_register_index = None # First register index of the block
+	_words_count = 0
+	_sit_modbus_registers = None # list ordered by register_index
+
+# SETTERS AND GETTERS
+
+	@property
+	def slave_address(self):
+		return self._slave_address
+
+	@property
+	def register_index(self):
+		return self._register_index
+
+	@property
+	def words_count(self):
+		return self._words_count
+
+	@property
+	def end_register_index(self):
+		"""
+		First register index after the block
+		"""
+		return self._register_index + self._words_count
+
+	@property
+	def sit_modbus_registers(self):
+		return self._sit_modbus_registers
+
+# INITIALIZE
+
+	def __init__(self, a_sit_modbus_register):
+		"""
+			Initialize with the first register of the block
+		"""
+		assert isinstance(a_sit_modbus_register, SitModbusRegister), 'a_sit_modbus_register is a SitModbusRegister'
+		self._slave_address = a_sit_modbus_register.slave_address
+		self._register_index = a_sit_modbus_register.register_index
+		self._words_count = a_sit_modbus_register.words_count
+		self._sit_modbus_registers = [a_sit_modbus_register]
+
+		self.invariants()
+
+# STATUS REPORT
+
+	def gap_with(self, a_sit_modbus_register):
+		"""
+		Count of unmapped words between end of block and given register, negative if overlapping
+		"""
+		return a_sit_modbus_register.register_index - self.end_register_index
+
+	def words_count_with(self, a_sit_modbus_register):
+		"""
+		Words count of the block if given register would be appended
+		"""
+		l_end = max(self.end_register_index, a_sit_modbus_register.register_index + a_sit_modbus_register.words_count)
+		return l_end - self._register_index
+
+	def can_append(self, a_sit_modbus_register, a_max_words_count, a_max_gap):
+		"""
+		True if given register (with a register_index >= self.register_index) can be read into this block
+		"""
+		return (a_sit_modbus_register.slave_address == self._slave_address and
+				a_sit_modbus_register.register_index >= self._register_index and
+				self.gap_with(a_sit_modbus_register) <= a_max_gap and
+				self.words_count_with(a_sit_modbus_register) <= a_max_words_count)
+
+	def register_offset(self, a_sit_modbus_register):
+		"""
+		Offset in words of given register into the block
+		"""
+		return a_sit_modbus_register.register_index - self._register_index
+
+# STATUS SETTING
+
+	def append(self, a_sit_modbus_register):
+		"""
+		Adds given register to the block, extending it if necessary
+		"""
+		assert a_sit_modbus_register.slave_address == self._slave_address, 'same slave address'
+		assert a_sit_modbus_register.register_index >= self._register_index, 'registers appended ordered by register_index'
+		self._words_count = self.words_count_with(a_sit_modbus_register)
+		self._sit_modbus_registers.append(a_sit_modbus_register)
+
+		self.invariants()
+
+# OUTPUT
+
+	def out_short(self, a_sep='|'):
+		l_res = ''
+		l_res = l_res + 'slave:' + str(self._slave_address) + a_sep
+		l_res = l_res + 'index:' + str(self._register_index) + a_sep
+		l_res = l_res + 'words:' + str(self._words_count) + a_sep
+		l_res = l_res + 'registers:' + ','.join(l_reg.short_description for l_reg in self._sit_modbus_registers)
+
+		return l_res
+
+# INVARIANTS
+
+	def invariants(self):
+		assert self._words_count > 0, 'words_count > 0'
+		assert len(self._sit_modbus_registers) > 0, 'registers not empty'
+
+#################### END CLASS ######################
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Static analyzer of the read plans of drivers, loads their register maps without connecting and reports
+#			modbus requests and words of a cycle with and without coalescing, duplicate and overlapping addresses
+#			and scale factors shared by several registers, as json or csv to track the requests budget of each driver
+#			i.e. ./sit_modbus_read_plan_analyzer.py -f csv -o /var/solarity/read_plans_budget_$(date +%Y%m%d).csv
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/register_types'))
+	import importlib.util
+	import logging # http://www.onlamp.com/pub/a/python/2005/06/02/logging.html
+	import argparse
+	import json
+	import csv
+	from collections import OrderedDict
+	from sit_logger import SitLogger
+	from sit_constants import SitConstants
+	from sit_modbus_register import SitModbusRegister
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusReadPlanAnalyzer(object):
+
+# CONSTANTS
+	ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+	DRIVERS = [ # (file path from ROOT_DIR, class name, script arguments added to SCRIPT_ARGUMENTS)
+		('sma/cluster_controller.py', 'ClusterController', []),
+		('sma/inverter_manager.py', 'InverterManager', []),
+		('sma/sunny_tripower_60.py', 'SunnyTripower60', ['-c', '3']),
+		('huawei/smart_logger_1000a.py', 'SmartLogger1000a', []),
+		('huawei/smart_logger_1000a_inverter.py', 'SmartLogger1000aInverter', ['-x', '1']),
+		('renke/renke_rs-ra-n01-jt_irra_irradiance.py', 'RenkeRsRaN01Jt', []),
+	]
+	SCRIPT_ARGUMENTS = ['-i', '127.0.0.1', '-m', '00:00:00:00:00:00'] # required by drivers, nothing is connected
+	OUTPUT_FORMAT_JSON = 'json'
+	OUTPUT_FORMAT_CSV = 'csv'
+	OUTPUT_FORMATS = [OUTPUT_FORMAT_JSON, OUTPUT_FORMAT_CSV]
+	CSV_FIELDS = ['driver', 'cycles', 'registers', 'scale_factors', 'requests_per_register', 'requests_coalesced', 'requests_coalesced_steady',
+			'words_per_register', 'words_coalesced', 'duplicate_addresses_count', 'overlapping_addresses_count', 'shared_scale_factors_count']
+
+# VARIABLES
+	_logger = None
+	_args = None
+	_parser = None
+
+# INITIALIZE
+
+	def __init__(self):
+		"""
+			Initialize
+		"""
+		self._logger = SitLogger().new_logger(__name__)
+
+# ANALYSIS
+
+	def new_driver(self, a_file_path, a_class_name, some_script_arguments):
+		"""
+		Returns a new instance of given driver class, created with SCRIPT_ARGUMENTS + some_script_arguments and not connected
+		"""
+		l_file_path = os.path.join(self.ROOT_DIR, a_file_path)
+		sys.path.append(os.path.dirname(l_file_path))
+		l_spec = importlib.util.spec_from_file_location(os.path.basename(l_file_path)[:-3].replace('-', '_'), l_file_path)
+		l_module = importlib.util.module_from_spec(l_spec)
+		l_spec.loader.exec_module(l_module)
+
+		return getattr(l_module, a_class_name).new_with_script_arguments(self.SCRIPT_ARGUMENTS + some_script_arguments)
+
+	def cycle_sit_modbus_register_lists(self, a_sit_modbus_device):
+		"""
+		Returns a list of the registers lists a cycle of given device reads, one per slave or inverter of poll_sit_modbus_registers
+			read_all_sit_modbus_registers is shadowed by an instance attribute recording the registers instead of reading them
+		"""
+		l_res = []
+		a_sit_modbus_device.read_all_sit_modbus_registers = lambda: l_res.append(list(a_sit_modbus_device.sit_modbus_registers.values()))
+		try:
+			for l_slave_address in a_sit_modbus_device.poll_sit_modbus_registers():
+				pass
+		finally:
+			del a_sit_modbus_device.read_all_sit_modbus_registers
+
+		return l_res
+
+	def analysis(self, a_sit_modbus_device):
+		"""
+		Returns an OrderedDict of the read plan figures of a cycle of given device, all registers being due (first cycle)
+			requests_per_register: one request per register and one per scale factor reference as without coalescing
+			requests_coalesced: read blocks of the registers and of their scale factors
+			requests_coalesced_steady: read blocks of the registers polled every cycle, scale factors being cached
+		"""
+		l_read_planner = a_sit_modbus_device.read_planner()
+		l_res = OrderedDict([('driver', a_sit_modbus_device.__class__.__name__), ('cycles', 0), ('registers', 0), ('scale_factors', 0),
+				('requests_per_register', 0), ('requests_coalesced', 0), ('requests_coalesced_steady', 0), ('words_per_register', 0), ('words_coalesced', 0),
+				('duplicate_addresses', []), ('overlapping_addresses', []), ('shared_scale_factors', [])])
+		for l_sit_regs in self.cycle_sit_modbus_register_lists(a_sit_modbus_device):
+			l_sf_refs = OrderedDict() # scale factor register => list of registers referencing it
+			for l_sit_reg in l_sit_regs:
+				if l_sit_reg.scale_factor_register_index is not None:
+					l_sf_refs.setdefault(a_sit_modbus_device.scale_factor_sit_modbus_register(l_sit_reg), []).append(l_sit_reg)
+			l_read_blocks = l_read_planner.read_blocks(l_sit_regs + list(l_sf_refs.keys()))
+			l_steady_regs = [l_sit_reg for l_sit_reg in l_sit_regs if l_sit_reg.poll_period == SitModbusRegister.POLL_PERIOD_EVERY_CYCLE]
+			l_res['cycles'] += 1
+			l_res['registers'] += len(l_sit_regs)
+			l_res['scale_factors'] += len(l_sf_refs)
+			l_res['requests_per_register'] += len(l_sit_regs) + sum(len(l_refs) for l_refs in l_sf_refs.values())
+			l_res['requests_coalesced'] += len(l_read_blocks)
+			l_res['requests_coalesced_steady'] += len(l_read_planner.read_blocks(l_steady_regs))
+			l_res['words_per_register'] += sum(l_sit_reg.words_count for l_sit_reg in l_sit_regs) + sum(l_sf_reg.words_count * len(l_refs) for l_sf_reg, l_refs in l_sf_refs.items())
+			l_res['words_coalesced'] += sum(l_read_block.words_count for l_read_block in l_read_blocks)
+			l_res['duplicate_addresses'] += self.duplicate_addresses(l_sit_regs)
+			l_res['overlapping_addresses'] += self.overlapping_addresses(l_sit_regs)
+			l_res['shared_scale_factors'] += [OrderedDict([('slave_address', l_sf_reg.slave_address), ('register_index', l_sf_reg.register_index), ('registers', [l_sit_reg.short_description for l_sit_reg in l_refs])])
+					for l_sf_reg, l_refs in l_sf_refs.items() if len(l_refs) > 1]
+
+		return l_res
+
+	def duplicate_addresses(self, some_sit_modbus_registers):
+		"""
+		Returns a list of OrderedDict for each (slave_address, register_index) of more than one register
+		"""
+		l_regs_by_address = OrderedDict()
+		for l_sit_reg in some_sit_modbus_registers:
+			l_regs_by_address.setdefault((l_sit_reg.slave_address, l_sit_reg.register_index), []).append(l_sit_reg.short_description)
+
+		return [OrderedDict([('slave_address', l_key[0]), ('register_index', l_key[1]), ('registers', l_shorts)]) for l_key, l_shorts in l_regs_by_address.items() if len(l_shorts) > 1]
+
+	def overlapping_addresses(self, some_sit_modbus_registers):
+		"""
+		Returns a list of OrderedDict for each couple of registers of different addresses sharing words
+		"""
+		l_res = []
+		l_sorted_regs = sorted(some_sit_modbus_registers, key=lambda l_reg: (l_reg.slave_address, l_reg.register_index))
+		for l_pos, l_sit_reg in enumerate(l_sorted_regs):
+			for l_next_reg in l_sorted_regs[l_pos + 1:]:
+				if l_next_reg.slave_address != l_sit_reg.slave_address or l_next_reg.register_index >= l_sit_reg.register_index + l_sit_reg.words_count:
+					break
+				if l_next_reg.register_index != l_sit_reg.register_index:
+					l_res.append(OrderedDict([('slave_address', l_sit_reg.slave_address), ('register_index', l_sit_reg.register_index), ('words_count', l_sit_reg.words_count),
+							('registers', [l_sit_reg.short_description, l_next_reg.short_description]), ('overlapping_register_index', l_next_reg.register_index)]))
+
+		return l_res
+
+	def analyses(self, some_drivers=None):
+		"""
+		Returns the list of analysis of given drivers (DRIVERS by default), a driver which can not be loaded gets an error entry
+		"""
+		l_res = []
+		for l_file_path, l_class_name, l_script_arguments in some_drivers or self.DRIVERS:
+			try:
+				l_res.append(self.analysis(self.new_driver(l_file_path, l_class_name, l_script_arguments)))
+			except Exception as l_e:
+				self._logger.exception('analyses-> driver {} not analyzed, Error: {}'.format(l_class_name, l_e))
+				l_res.append(OrderedDict([('driver', l_class_name), ('error', str(l_e))]))
+
+		return l_res
+
+# OUTPUT
+
+	def output(self, some_analyses, an_output_format=OUTPUT_FORMAT_JSON, a_file=sys.stdout):
+		"""
+		Writes given analyses as a json list or as csv lines of CSV_FIELDS (lists replaced by their count)
+		"""
+		assert an_output_format in self.OUTPUT_FORMATS, 'invalid an_output_format:{}'.format(an_output_format)
+		if an_output_format == self.OUTPUT_FORMAT_JSON:
+			json.dump(some_analyses, a_file, indent=2)
+			a_file.write('\n')
+		else:
+			l_writer = csv.DictWriter(a_file, fieldnames=self.CSV_FIELDS, extrasaction='ignore')
+			l_writer.writeheader()
+			for l_analysis in some_analyses:
+				l_row = OrderedDict(l_analysis)
+				for l_key in ['duplicate_addresses', 'overlapping_addresses', 'shared_scale_factors']:
+					l_row[l_key + '_count'] = len(l_analysis.get(l_key, []))
+				l_writer.writerow(l_row)
+
+# SCRIPT ARGUMENTS
+
+	def init_arg_parse(self):
+		"""
+			Parsing arguments
+		"""
+		self._parser = argparse.ArgumentParser(description='Static analysis of drivers read plans, no device is connected. ' + SitConstants.DEFAULT_HELP_LICENSE_NOTICE)
+		self._add_arguments()
+		self._args = self._parser.parse_args()
+
+	def _add_arguments(self):
+		"""
+		Add arguments to parser (called by init_arg_parse())
+		"""
+		self._parser.add_argument('-v', '--verbose', help='increase output verbosity', action="store_true")
+		self._parser.add_argument('-d', '--driver', help='Class name of the driver to analyze, all by default:' + ('|'.join(l_driver[1] for l_driver in self.DRIVERS)), nargs='?')
+		self._parser.add_argument('-f', '--output_format', help='Output format:' + ('|'.join(self.OUTPUT_FORMATS)), nargs='?', default=self.OUTPUT_FORMAT_JSON, choices=self.OUTPUT_FORMATS)
+		self._parser.add_argument('-o', '--output_file', help='Output file, stdout by default (mixed with console logs)', nargs='?')
+
+	def execute_corresponding_args(self):
+		"""
+			Parsing arguments and calling corresponding functions
+		"""
+		if self._args.verbose:
+			self._logger.setLevel(logging.DEBUG)
+		else:
+			self._logger.setLevel(logging.INFO)
+		l_drivers = [l_driver for l_driver in self.DRIVERS if self._args.driver is None or l_driver[1] == self._args.driver]
+		assert len(l_drivers) > 0, 'unknown driver:{}'.format(self._args.driver)
+		l_analyses = self.analyses(l_drivers)
+		if self._args.output_file is None:
+			self.output(l_analyses, self._args.output_format)
+		else:
+			with open(self._args.output_file, 'w', newline='') as l_file:
+				self.output(l_analyses, self._args.output_format, l_file)
+
+#################### END CLASS ######################
+
+def main():
+	"""
+	Main method
+	"""
+	logger = logging.getLogger(__name__)
+
+	try:
+		l_obj = SitModbusReadPlanAnalyzer()
+		l_obj.init_arg_parse()
+		l_obj.execute_corresponding_args()
+	except KeyboardInterrupt:
+		logger.exception("Keyboard interruption")
+	except Exception as l_e:
+		logger.exception("Exception occured:{}".format(l_e))
+		raise l_e
+
+
+#Call main if this script is executed
+if __name__ == '__main__':
+	main()
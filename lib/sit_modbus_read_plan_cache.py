@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: On disk cache of read plans (SitModbusReadBlock lists and their SitModbusBlockDecoder layouts)
+#			keyed by a hash of the registers to read and of the device reading them, saves planning on each cron run
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	import os, errno
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import time
+	import json
+	import hashlib
+	from sit_logger import SitLogger
+	from sit_modbus_read_block import SitModbusReadBlock
+	from sit_modbus_block_decoder import SitModbusBlockDecoder
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusReadPlanCache(object):
+
+# CONSTANTS
+	DEFAULT_DIRECTORY = '/var/solarity/.cache/read_plans' #without ending slash
+	MAX_PLANS_COUNT = 64 # least recently used plans are dropped from the file beyond
+	FORMAT_VERSION = 1 # part of the hash, changing the plan format invalidates existing files
+
+# VARIABLES
+	_logger = None
+	_cache_name = None
+	_directory = DEFAULT_DIRECTORY
+	_plans = None # dict plan hash => {'blocks': list of register positions lists, 'layouts': list of SitModbusBlockDecoder.layout_data, 'last_use': time}
+	_read_blocks_by_registers = None # dict tuple of (registers, barrier registers) => list of SitModbusReadBlock, plans already used by this process
+	_is_dirty = False
+
+# SETTERS AND GETTERS
+
+	@property
+	def cache_name(self):
+		return self._cache_name
+
+	@property
+	def plans(self):
+		return self._plans
+
+	def file_path(self):
+		return os.path.join(self._directory, self._cache_name + '.json')
+
+# INITIALIZE
+
+	def __init__(self, a_cache_name, a_directory=DEFAULT_DIRECTORY):
+		"""
+			Initialize and loads file_path() if it exists
+			@param a_cache_name: file name without extension, i.e. device class name
+		"""
+		assert a_cache_name, 'a_cache_name not empty'
+		self._logger = SitLogger().new_logger(__name__)
+		self._cache_name = a_cache_name
+		self._directory = a_directory
+		self._plans = {}
+		self._read_blocks_by_registers = {}
+		self.load()
+
+		self.invariants()
+
+# STATUS REPORT
+
+	@classmethod
+	def register_signature(cls, a_sit_modbus_register):
+		"""
+		What of a register changes its place into a plan or its decoding
+		"""
+		return [a_sit_modbus_register.__class__.__name__, a_sit_modbus_register.slave_address, a_sit_modbus_register.register_index, a_sit_modbus_register.words_count,
+				a_sit_modbus_register.struct_format, a_sit_modbus_register.byte_order, a_sit_modbus_register.word_order]
+
+	def plan_hash(self, a_read_planner, some_sit_modbus_registers, some_barrier_registers, some_key_values):
+		"""
+		Hash of the plan of given registers
+		@param some_key_values: json serializable values of the device changing the plan (i.e. class, _substract_one_to_register_index, byte and word orders)
+		"""
+		l_data = [self.FORMAT_VERSION, list(some_key_values), a_read_planner.max_gap, a_read_planner.max_words_count,
+				[self.register_signature(l_reg) for l_reg in some_sit_modbus_registers],
+				[self.register_signature(l_reg) for l_reg in some_barrier_registers]]
+
+		return hashlib.sha1(json.dumps(l_data).encode('utf-8')).hexdigest()
+
+# PLANNING
+
+	def read_blocks(self, a_read_planner, some_sit_modbus_registers, some_barrier_registers=None, some_key_values=()):
+		"""
+		Returns a_read_planner.read_blocks of given registers, from memory if already planned by this process,
+			from file_path() if planned by a previous run with the same hash, planned and saved otherwise
+		"""
+		l_sit_regs = list(some_sit_modbus_registers)
+		l_barrier_regs = list(some_barrier_registers or [])
+		l_memory_key = (tuple(l_sit_regs), tuple(l_barrier_regs), tuple(some_key_values))
+		if l_memory_key in self._read_blocks_by_registers:
+			return self._read_blocks_by_registers[l_memory_key]
+
+		l_hash = self.plan_hash(a_read_planner, l_sit_regs, l_barrier_regs, some_key_values)
+		l_plan = self._plans.get(l_hash)
+		if l_plan is not None:
+			l_res = self.read_blocks_from_plan(l_plan, l_sit_regs)
+			self._logger.debug('read_blocks-> {} block(s) from cache {}'.format(len(l_res), l_hash))
+		else:
+			l_res = a_read_planner.read_blocks(l_sit_regs, l_barrier_regs)
+			l_plan = self.plan_from_read_blocks(l_res, l_sit_regs)
+			self._plans[l_hash] = l_plan
+			self._is_dirty = True
+		l_plan['last_use'] = time.time()
+		self._read_blocks_by_registers[l_memory_key] = l_res
+		self.save()
+
+		return l_res
+
+	def plan_from_read_blocks(self, some_read_blocks, some_sit_modbus_registers):
+		"""
+		Returns json serializable plan of given blocks, registers are given by their position into some_sit_modbus_registers
+		"""
+		l_positions = {id(l_reg): l_pos for l_pos, l_reg in enumerate(some_sit_modbus_registers)}
+
+		return {
+				'blocks': [[l_positions[id(l_reg)] for l_reg in l_read_block.sit_modbus_registers] for l_read_block in some_read_blocks],
+				'layouts': [SitModbusBlockDecoder.layout_data(l_read_block) for l_read_block in some_read_blocks],
+				'last_use': None
+			}
+
+	def read_blocks_from_plan(self, a_plan, some_sit_modbus_registers):
+		"""
+		Returns the SitModbusReadBlock list of given plan with its decoder layouts set, without planning nor compiling
+		"""
+		l_res = []
+		for l_positions, l_layout_data in zip(a_plan['blocks'], a_plan['layouts']):
+			l_read_block = SitModbusReadBlock(some_sit_modbus_registers[l_positions[0]])
+			for l_pos in l_positions[1:]:
+				l_read_block.append(some_sit_modbus_registers[l_pos])
+			SitModbusBlockDecoder.add_layout_data(l_read_block, l_layout_data)
+			l_res.append(l_read_block)
+
+		return l_res
+
+# FILE
+
+	def load(self):
+		"""
+		Reads file_path() into self._plans, an unreadable file is ignored (plans will be computed again)
+		"""
+		l_file_path = self.file_path()
+		if not os.path.isfile(l_file_path):
+			return
+		try:
+			with open(l_file_path, 'r') as l_file:
+				self._plans = json.load(l_file)
+			self._logger.debug('load-> {} plans from {}'.format(len(self._plans), l_file_path))
+		except ValueError as l_e:
+			self._logger.error('load-> ignoring invalid file {}, msg:{}'.format(l_file_path, l_e))
+			self._plans = {}
+		self._is_dirty = False
+
+	def save(self):
+		"""
+		Writes self._plans into file_path() if a plan was added since load, keeping the MAX_PLANS_COUNT last used ones
+			the cache is not needed to read, a write error is only logged
+		"""
+		if not self._is_dirty:
+			return
+		if len(self._plans) > self.MAX_PLANS_COUNT:
+			l_hashes = sorted(self._plans.keys(), key=lambda l_hash: self._plans[l_hash]['last_use'] or 0)
+			for l_hash in l_hashes[:len(self._plans) - self.MAX_PLANS_COUNT]:
+				del self._plans[l_hash]
+		try:
+			try:
+				os.makedirs(self._directory)
+			except OSError as l_e:
+				if l_e.errno != errno.EEXIST:
+					raise l_e
+			l_tmp_file_path = self.file_path() + '.tmp'
+			with open(l_tmp_file_path, 'w') as l_file:
+				json.dump(self._plans, l_file, sort_keys=True)
+			os.replace(l_tmp_file_path, self.file_path())
+			self._is_dirty = False
+		except OSError as l_e:
+			self._logger.warning('save-> read plans not cached, Error: {}'.format(l_e))
+
+# INVARIANTS
+
+	def invariants(self):
+		assert self._cache_name, 'cache_name not empty'
+		assert isinstance(self._plans, dict), 'plans is a dict'
+
+#################### END CLASS ######################
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Read planner, groups registers by slave address and merges neighbours into
+#			SitModbusReadBlock so that a cycle costs one read_holding_registers request per block
+#			instead of one per register
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	from collections import OrderedDict
+	from sit_logger import SitLogger
+	from sit_modbus_register import SitModbusRegister
+	from sit_modbus_read_block import SitModbusReadBlock
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusReadPlanner(object):
+
+# CONSTANTS
+	MAX_READ_BLOCK_WORDS_COUNT = 125 # Max registers count of a read_holding_registers (FC03) request
+	DEFAULT_MAX_GAP = 10 # Max unmapped words read between two registers of the same block
+
+# VARIABLES
+	_logger = None
+	_max_gap = DEFAULT_MAX_GAP
+	_max_words_count = MAX_READ_BLOCK_WORDS_COUNT
+
+# SETTERS AND GETTERS
+
+	@property
+	def max_gap(self):
+		return self._max_gap
+
+	@property
+	def max_words_count(self):
+		return self._max_words_count
+
+# INITIALIZE
+
+	def __init__(self, a_max_gap=DEFAULT_MAX_GAP, a_max_words_count=MAX_READ_BLOCK_WORDS_COUNT):
+		"""
+			Initialize
+			@param a_max_gap: 0 merges only adjacent registers
+			@param a_max_words_count: <= MAX_READ_BLOCK_WORDS_COUNT
+		"""
+		assert a_max_gap >= 0, 'a_max_gap >= 0:{}'.format(a_max_gap)
+		assert a_max_words_count > 0 and a_max_words_count <= self.MAX_READ_BLOCK_WORDS_COUNT, 'invalid a_max_words_count:{}'.format(a_max_words_count)
+		self._logger = SitLogger().new_logger(__name__)
+		self._max_gap = a_max_gap
+		self._max_words_count = a_max_words_count
+
+# PLANNING
+
+	def read_blocks(self, some_sit_modbus_registers, some_barrier_registers=None):
+		"""
+		Returns a list of SitModbusReadBlock covering all given registers,
+			slaves in order of first appearance, blocks ordered by register_index
+		@param some_barrier_registers: registers not to read (i.e. unsupported ones), no block spans over them
+		"""
+		l_barriers_by_slave = self.registers_by_slave(some_barrier_registers or [])
+		l_res = []
+		for l_slave_address, l_reg_list in self.registers_by_slave(some_sit_modbus_registers).items():
+			l_reg_list.sort(key=lambda l_reg: (l_reg.register_index, l_reg.words_count))
+			l_barriers = l_barriers_by_slave.get(l_slave_address, [])
+			l_block = None
+			for l_reg in l_reg_list:
+				if (l_block is not None and l_block.can_append(l_reg, self._max_words_count, self._max_gap) and
+						not self.crosses_barrier(l_block, l_reg, l_barriers)):
+					l_block.append(l_reg)
+				else:
+					l_block = SitModbusReadBlock(l_reg)
+					l_res.append(l_block)
+		self._logger.debug('read_blocks-> planned {} request(s) for {} register(s)'.format(len(l_res), sum(len(l_block.sit_modbus_registers) for l_block in l_res)))
+
+		return l_res
+
+	def crosses_barrier(self, a_read_block, a_sit_modbus_register, some_barrier_registers):
+		"""
+		True if a_read_block extended to a_sit_modbus_register would read one of the given barrier registers
+		"""
+		l_end = a_read_block.register_index + a_read_block.words_count_with(a_sit_modbus_register)
+		for l_barrier in some_barrier_registers:
+			if l_barrier.register_index < l_end and l_barrier.register_index + l_barrier.words_count > a_read_block.register_index:
+				return True
+
+		return False
+
+	def registers_by_slave(self, some_sit_modbus_registers):
+		"""
+		Returns an OrderedDict slave_address => list of registers
+		"""
+		l_res = OrderedDict()
+		for l_reg in some_sit_modbus_registers:
+			assert isinstance(l_reg, SitModbusRegister), 'l_reg is a SitModbusRegister but {}'.format(l_reg.__class__.__name__)
+			assert l_reg.words_count <= self._max_words_count, 'register {} larger than a block'.format(l_reg.short_description)
+			l_res.setdefault(l_reg.slave_address, []).append(l_reg)
+
+		return l_res
+
+#################### END CLASS ######################
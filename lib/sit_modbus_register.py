@@ -40,12 +40,15 @@ try:
 	#sys.path.append(os.path.join(os.path.dirname(__file__), '../lib')) #the way to import directories
 	from abc import ABC, abstractmethod
 	from collections import OrderedDict
+	import copy
+	import struct
 	import logging # http://www.onlamp.com/pub/a/python/2005/06/02/logging.html
 	import argparse
 	#sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'pysunspec'))
 	from datetime import datetime, date, time, timedelta
 #	import jsonpickle # pip install jsonpickle
 #	import json
+	from pymodbus.constants import Endian
 	from sit_logger import SitLogger
 	from sit_modbus_register_event import SitModbusRegisterEvent
 except ImportError as l_err:
@@ -68,6 +71,10 @@ class SitModbusRegister(ABC):
 	ACCESS_MODE_RW='RW'
 	ACCESS_MODE_R='R'
 
+	POLL_PERIOD_EVERY_CYCLE = 1
+	POLL_PERIOD_ONCE = 0 # read once per connection, and again after POLL_PERIOD_ONCE_MAX_AGE
+	POLL_PERIOD_ONCE_MAX_AGE = 24 * 3600 # seconds
+
 # VARIABLES
 
 	_logger = None
@@ -83,10 +90,18 @@ class SitModbusRegister(ABC):
 	_slave_address = None # Can be none, in that case the default slave_address is taken
 
 	_words_count = None
+	_byte_order = None # pymodbus Endian
+	_word_order = None # pymodbus Endian
+	_struct_format = None # struct format of the register bytes without byte order character, None if not decodable by SitModbusBlockDecoder
+	_sentinel_registers = None # tuple of raw words meaning 'not available' (NaN), None if the type has none
 
 	_event = None 
 	_post_set_value_call = None
 
+	_poll_period = None # cycles count between two reads, None for POLL_PERIOD_ONCE if metadata else POLL_PERIOD_EVERY_CYCLE
+	_polls_count_since_read = None # None if never read since connection
+	_read_monotonic_time = None
+
 # FUNCTIONS DEFINITION 
 
 	"""
@@ -229,10 +244,44 @@ class SitModbusRegister(ABC):
 	def words_count(self): 
 		return self._words_count
 
+	@property
+	def poll_period(self):
+		if self._poll_period is None:
+			return self.POLL_PERIOD_ONCE if self._is_metadata else self.POLL_PERIOD_EVERY_CYCLE
+		return self._poll_period
+
+	@poll_period.setter
+	def poll_period(self, v):
+		assert isinstance(v, int) and v >= 0, 'poll_period is an int >= 0:{}'.format(v)
+		self._poll_period = v
+
+	@property
+	def read_monotonic_time(self):
+		"""
+		time.monotonic() of the cycle which last read the register, None if not read since connection
+		"""
+		return self._read_monotonic_time
+
 	@property
 	def slave_address(self): 
 		return self._slave_address
 
+	@property
+	def byte_order(self):
+		return self._byte_order
+
+	@property
+	def word_order(self):
+		return self._word_order
+
+	@property
+	def struct_format(self):
+		return self._struct_format
+
+	@property
+	def sentinel_registers(self):
+		return self._sentinel_registers
+
 # STATUS REPORT
 
 	def has_event(self):
@@ -245,13 +294,81 @@ class SitModbusRegister(ABC):
 		from sit_modbus_device import SitModbusDevice
 		return SitModbusDevice.valid_slave_address(self._slave_address)
 
+	def is_sentinel_raw(self, some_registers):
+		"""
+		True if given raw words are the 'not available' value of this register type
+		"""
+		return self._sentinel_registers is not None and tuple(some_registers) == self._sentinel_registers
+
+	def is_poll_due(self, a_monotonic_time):
+		"""
+		True if the register has to be read by the cycle starting at given time.monotonic() value, see poll_period
+		"""
+		if self._polls_count_since_read is None:
+			return True
+		if self.poll_period == self.POLL_PERIOD_ONCE:
+			return a_monotonic_time - self._read_monotonic_time >= self.POLL_PERIOD_ONCE_MAX_AGE
+		return self._polls_count_since_read + 1 >= self.poll_period
+
 # STATUS SETTING
 
+	def set_polled(self, an_is_read, a_monotonic_time):
+		"""
+		Records a cycle, an_is_read if the register was read by it
+		"""
+		if an_is_read:
+			self._polls_count_since_read = 0
+			self._read_monotonic_time = a_monotonic_time
+		elif self._polls_count_since_read is not None:
+			self._polls_count_since_read += 1
+
+	def new_for_slave(self, a_slave_address, a_device=None):
+		"""
+		Returns a shallow copy of this register used as template for given slave, without value,
+			not calling __init__ (no logger creation nor validation), sharing descriptions and type
+			event and post set value methods bound to another device of the same class are bound to a_device if given
+		"""
+		from sit_modbus_device import SitModbusDevice
+		assert SitModbusDevice.valid_slave_address(a_slave_address), 'invalid a_slave_address:{}'.format(a_slave_address)
+		l_res = copy.copy(self)
+		l_res._slave_address = a_slave_address
+		l_res._value = None
+		l_res.reset_poll()
+		l_res._post_set_value_call = self.method_bound_to(self._post_set_value_call, a_device)
+		if self._event is not None:
+			l_res._event = SitModbusRegisterEvent(self.method_bound_to(self._event.method_to_call, a_device))
+
+		return l_res
+
+	@staticmethod
+	def method_bound_to(a_method, a_device):
+		"""
+		Returns given method bound to a_device if it is bound to another instance of a_device class, unchanged otherwise
+		"""
+		l_bound_object = getattr(a_method, '__self__', None)
+		if a_device is None or l_bound_object is None or l_bound_object is a_device or not isinstance(a_device, l_bound_object.__class__):
+			return a_method
+
+		return a_method.__func__.__get__(a_device)
+
+	def reset_poll(self):
+		"""
+		Makes the register due for next cycle whatever its poll_period, i.e. on a new connection
+		"""
+		self._polls_count_since_read = None
+		self._read_monotonic_time = None
+
 	@abstractmethod
 	def set_value_with_raw(self, v):
 		# OR raise NotImplementedError
 		pass
 
+	def set_value_with_unpacked(self, an_unpacked):
+		"""
+		Sets value with the value unpacked with struct_format by SitModbusBlockDecoder, redefine if the value needs a conversion
+		"""
+		self._value = an_unpacked
+
 # EVENT
 
 	def call_event(self):
@@ -278,6 +395,28 @@ class SitModbusRegister(ABC):
 
 # CONVERSION
 
+	def unpacked_of(self, a_value):
+		"""
+		Returns the value to pack with struct_format for given value, reverse of set_value_with_unpacked, redefine if the value needs a conversion
+		"""
+		if isinstance(a_value, str):
+			return a_value.encode('utf-8')
+		return a_value
+
+	def raw_registers_of(self, a_value):
+		"""
+		Returns the list of words to write for given value (scale factor removed),
+			packed with struct_format and ordered by byte_order and word_order as BinaryPayloadBuilder would
+		"""
+		assert self._struct_format is not None, 'register {} has no struct_format to encode a value'.format(self._short_description)
+		l_bytes = struct.pack('>' + self._struct_format, self.unpacked_of(a_value))
+		l_res = list(struct.unpack('>{}H'.format(len(l_bytes) // 2), l_bytes))
+		if self._word_order == Endian.Little:
+			l_res.reverse()
+		if self._byte_order == Endian.Little:
+			l_res = [((l_word & 0xFF) << 8) | (l_word >> 8) for l_word in l_res]
+
+		return l_res
 
 # OUTPUT
 
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Declarative register map, a JSON file describing registers of a device compiled into a
+#			SitModbusRegisterTable indexed by short description and by (slave_address, register_index)
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/register_types'))
+	import json
+	from collections import OrderedDict, namedtuple
+	from types import MappingProxyType
+	from sit_logger import SitLogger
+	from sit_modbus_register import SitModbusRegister
+	from sit_modbus_register_event import SitModbusRegisterEvent
+	from register_type_int8_s import RegisterTypeInt8s
+	from register_type_int16_u import RegisterTypeInt16u
+	from register_type_int16_s import RegisterTypeInt16s
+	from register_type_int16_u_scale_factor import RegisterTypeInt16uScaleFactor
+	from register_type_int32_u import RegisterTypeInt32u
+	from register_type_int32_s import RegisterTypeInt32s
+	from register_type_int32_u_scale_factor import RegisterTypeInt32uScaleFactor
+	from register_type_int64_u import RegisterTypeInt64u
+	from register_type_string8 import RegisterTypeString8
+	from register_type_string16 import RegisterTypeString16
+	from register_type_sma_cc_device_class import RegisterTypeSmaCCDeviceClass
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+# by_name: read only OrderedDict short_description => register, by_slave_and_address: read only dict (slave_address, register_index) => tuple of registers,
+#	read_blocks: tuple of SitModbusReadBlock covering all registers
+SitModbusRegisterTable = namedtuple('SitModbusRegisterTable', ['by_name', 'by_slave_and_address', 'read_blocks'])
+
+class SitModbusRegisterMap(object):
+	"""
+	A map file is a JSON object {"description": "...", "registers": [...]}, each register being an object with keys:
+		short, description, type (see REGISTER_TYPES), address: mandatory
+		access (R|RW), unit, scale_factor_register (a_scale_factor_register_index), scale_factor (a_scale_factor of *ScaleFactor types),
+		metadata (bool), poll (see POLL_CLASSES or a cycles count), event and post_set_value_call (method names of the device),
+		slave_address (fixed slave address, the one given to compiled_table otherwise): optional
+	"""
+
+# CONSTANTS
+	REGISTER_TYPES = {
+		'Int8s': RegisterTypeInt8s,
+		'Int16u': RegisterTypeInt16u,
+		'Int16s': RegisterTypeInt16s,
+		'Int16uScaleFactor': RegisterTypeInt16uScaleFactor,
+		'Int32u': RegisterTypeInt32u,
+		'Int32s': RegisterTypeInt32s,
+		'Int32uScaleFactor': RegisterTypeInt32uScaleFactor,
+		'Int64u': RegisterTypeInt64u,
+		'String8': RegisterTypeString8,
+		'String16': RegisterTypeString16,
+		'SmaCCDeviceClass': RegisterTypeSmaCCDeviceClass,
+	}
+	POLL_CLASS_EVERY_CYCLE = 'every_cycle'
+	POLL_CLASS_SLOW = 'slow' # device DEFAULT_SLOW_POLL_PERIOD
+	POLL_CLASS_ONCE = 'once'
+	POLL_CLASSES = [POLL_CLASS_EVERY_CYCLE, POLL_CLASS_SLOW, POLL_CLASS_ONCE]
+	MANDATORY_KEYS = ['short', 'description', 'type', 'address']
+	OPTIONAL_KEYS = ['access', 'unit', 'scale_factor_register', 'scale_factor', 'metadata', 'poll', 'event', 'post_set_value_call', 'slave_address']
+
+# VARIABLES
+	_logger = None
+	_maps_by_path = {} # shared by all instances: map file path => SitModbusRegisterMap, see new_from_file
+	_map_file_path = None
+	_description = None
+	_register_definitions = None # tuple of read only dicts, one per register in file order
+
+# SETTERS AND GETTERS
+
+	@property
+	def map_file_path(self):
+		return self._map_file_path
+
+	@property
+	def description(self):
+		return self._description
+
+	@property
+	def register_definitions(self):
+		return self._register_definitions
+
+# INITIALIZE
+
+	def __init__(self, a_map_file_path):
+		"""
+			Initialize, reads and validates given JSON map file
+		"""
+		self._logger = SitLogger().new_logger(__name__)
+		self._map_file_path = a_map_file_path
+		with open(a_map_file_path, 'r') as l_file:
+			l_data = json.load(l_file, object_pairs_hook=OrderedDict)
+		assert 'registers' in l_data, 'map file {} has a registers list'.format(a_map_file_path)
+		self._description = l_data.get('description')
+		for l_definition in l_data['registers']:
+			self.assert_valid_definition(l_definition)
+		self._register_definitions = tuple(MappingProxyType(l_definition) for l_definition in l_data['registers'])
+
+		self.invariants()
+
+	@classmethod
+	def new_from_file(cls, a_map_file_path):
+		"""
+		Returns the SitModbusRegisterMap of given file, read once per process
+		"""
+		l_path = os.path.abspath(a_map_file_path)
+		if l_path not in cls._maps_by_path:
+			cls._maps_by_path[l_path] = cls(l_path)
+
+		return cls._maps_by_path[l_path]
+
+# STATUS REPORT
+
+	def assert_valid_definition(self, a_definition):
+		"""
+		Asserts given register definition of the map file is valid
+		"""
+		for l_key in self.MANDATORY_KEYS:
+			assert l_key in a_definition, '{}: register {} has no {}'.format(self._map_file_path, a_definition, l_key)
+		l_short = a_definition['short']
+		for l_key in a_definition.keys():
+			assert l_key in self.MANDATORY_KEYS or l_key in self.OPTIONAL_KEYS, '{}: register {} unknown key {}'.format(self._map_file_path, l_short, l_key)
+		assert a_definition['type'] in self.REGISTER_TYPES, '{}: register {} unknown type {}'.format(self._map_file_path, l_short, a_definition['type'])
+		assert isinstance(a_definition['address'], int) and a_definition['address'] >= 0, '{}: register {} invalid address {}'.format(self._map_file_path, l_short, a_definition['address'])
+		l_poll = a_definition.get('poll')
+		assert l_poll is None or l_poll in self.POLL_CLASSES or (isinstance(l_poll, int) and l_poll >= 0), '{}: register {} invalid poll {}'.format(self._map_file_path, l_short, l_poll)
+		assert not 'scale_factor' in a_definition or hasattr(self.REGISTER_TYPES[a_definition['type']], 'scale_factor'), '{}: register {} type {} has no scale_factor'.format(self._map_file_path, l_short, a_definition['type'])
+
+	def poll_period(self, a_definition, a_device):
+		"""
+		Returns the poll period in cycles of given definition, None for the register default
+		"""
+		l_poll = a_definition.get('poll')
+		if l_poll == self.POLL_CLASS_EVERY_CYCLE:
+			return SitModbusRegister.POLL_PERIOD_EVERY_CYCLE
+		elif l_poll == self.POLL_CLASS_SLOW:
+			return a_device.DEFAULT_SLOW_POLL_PERIOD
+		elif l_poll == self.POLL_CLASS_ONCE:
+			return SitModbusRegister.POLL_PERIOD_ONCE
+
+		return l_poll
+
+# COMPILING
+
+	def new_sit_modbus_register(self, a_definition, a_device, a_slave_address):
+		"""
+		Returns the register of given definition, event and post_set_value_call bound to a_device
+		"""
+		l_event = None
+		if a_definition.get('event') is not None:
+			l_event = SitModbusRegisterEvent(getattr(a_device, a_definition['event']))
+		l_kwargs = {} # only given when set, not all register types take them
+		if a_definition.get('post_set_value_call') is not None:
+			l_kwargs['a_post_set_value_call'] = getattr(a_device, a_definition['post_set_value_call'])
+		if 'scale_factor' in a_definition:
+			l_kwargs['a_scale_factor'] = a_definition['scale_factor']
+		l_res = self.REGISTER_TYPES[a_definition['type']](
+			a_definition['short'],
+			a_definition['description'],
+			a_definition['address'],
+			a_definition.get('slave_address', a_slave_address),
+			a_definition.get('access', SitModbusRegister.DEFAULT_ACCESS_MODE),
+			a_definition.get('unit'),
+			a_definition.get('scale_factor_register'),
+			l_event,
+			a_definition.get('metadata', False),
+			**l_kwargs
+		)
+		l_poll_period = self.poll_period(a_definition, a_device)
+		if l_poll_period is not None:
+			l_res.poll_period = l_poll_period
+
+		return l_res
+
+	def compiled_table(self, a_device, a_slave_address, a_read_planner=None):
+		"""
+		Returns a SitModbusRegisterTable with new registers of all definitions for given slave
+		@param a_read_planner: plans read_blocks, a_device.read_planner() if None
+		"""
+		l_by_name = OrderedDict()
+		l_by_slave_and_address = OrderedDict()
+		for l_definition in self._register_definitions:
+			l_reg = self.new_sit_modbus_register(l_definition, a_device, a_slave_address)
+			assert l_reg.short_description not in l_by_name, '{}: duplicated short {}'.format(self._map_file_path, l_reg.short_description)
+			l_by_name[l_reg.short_description] = l_reg
+			l_key = (l_reg.slave_address, l_reg.register_index)
+			l_by_slave_and_address[l_key] = l_by_slave_and_address.get(l_key, ()) + (l_reg,)
+		l_read_planner = a_read_planner or a_device.read_planner()
+		l_read_blocks = tuple(l_read_planner.read_blocks(l_by_name.values()))
+		self._logger.debug('compiled_table-> {}: {} register(s) {} read block(s)'.format(self._map_file_path, len(l_by_name), len(l_read_blocks)))
+
+		return SitModbusRegisterTable(MappingProxyType(l_by_name), MappingProxyType(l_by_slave_and_address), l_read_blocks)
+
+# INVARIANTS
+
+	def invariants(self):
+		assert self._register_definitions is not None, 'register definitions read'
+
+#################### END CLASS ######################
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Priority classes of modbus requests sharing a connection (control writes, fast-rate reads, slow
+#			metadata reads) and the queueing delay measured per class, see sit_modbus_priority_lock and sit_modbus_rtu_bus
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import threading
+	from collections import OrderedDict
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusRequestPriority(object):
+
+# CONSTANTS
+	PRIORITY_CONTROL = 0 # setpoint writes, served first
+	PRIORITY_FAST_READ = 1 # registers read every cycle
+	PRIORITY_SLOW_READ = 2 # metadata and registers read every few cycles
+	PRIORITY_NAMES = ['control', 'fast_read', 'slow_read'] # indexed by priority
+	WRITE_FUNCTION_CODES = [0x05, 0x06, 0x0F, 0x10, 0x16, 0x17]
+
+# VARIABLES
+	_lock = None
+	_counts = None # list indexed by priority
+	_total_delays = None # seconds
+	_max_delays = None # seconds
+
+# INITIALIZE
+
+	def __init__(self):
+		"""
+			Initialize
+		"""
+		self._lock = threading.Lock()
+		self.reset_stats()
+
+	@classmethod
+	def valid_priority(cls, a_priority):
+		return isinstance(a_priority, int) and 0 <= a_priority < len(cls.PRIORITY_NAMES)
+
+	@classmethod
+	def pdu_priority(cls, a_pdu, a_read_priority=PRIORITY_FAST_READ):
+		"""
+		PRIORITY_CONTROL for a write request pdu, a_read_priority for other requests
+		"""
+		if a_pdu[0] in cls.WRITE_FUNCTION_CODES:
+			return cls.PRIORITY_CONTROL
+		return a_read_priority
+
+# STATUS REPORT
+
+	def status(self):
+		"""
+		Returns a json serializable OrderedDict priority name => requests count, mean and max seconds waited before being served
+		"""
+		l_res = OrderedDict()
+		with self._lock:
+			for l_priority, l_name in enumerate(self.PRIORITY_NAMES):
+				l_count = self._counts[l_priority]
+				l_res[l_name] = {'requests': l_count,
+						'mean_delay': round(self._total_delays[l_priority] / l_count, 6) if l_count > 0 else None,
+						'max_delay': round(self._max_delays[l_priority], 6) if l_count > 0 else None}
+
+		return l_res
+
+# STATUS SETTING
+
+	def record_delay(self, a_priority, a_seconds):
+		"""
+		Records the seconds a request of given priority waited before being served
+		"""
+		assert self.valid_priority(a_priority), 'invalid a_priority:{}'.format(a_priority)
+		with self._lock:
+			self._counts[a_priority] += 1
+			self._total_delays[a_priority] += a_seconds
+			self._max_delays[a_priority] = max(self._max_delays[a_priority], a_seconds)
+
+	def reset_stats(self):
+		with self._lock:
+			self._counts = [0] * len(self.PRIORITY_NAMES)
+			self._total_delays = [0.0] * len(self.PRIORITY_NAMES)
+			self._max_delays = [0.0] * len(self.PRIORITY_NAMES)
+
+#################### END CLASS ######################
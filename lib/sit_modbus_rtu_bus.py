@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Owner of one RTU serial bus, requests of several drivers are queued and sent by one thread
+#			back to back, separated by the t3.5 silent interval computed from the line settings (baudrate, parity,
+#			stop bits) of each request. Keeps the bus utilisation, see SitModbusConnectionBroker for its use
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import time
+	import itertools
+	import queue
+	import threading
+	from sit_logger import SitLogger
+	from sit_modbus_request_priority import SitModbusRequestPriority
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusRtuBus(object):
+
+# CONSTANTS
+	FIXED_INTERVALS_BAUDRATE = 19200 # above it the modbus serial line spec fixes t1.5 and t3.5
+	FIXED_T15 = 0.00075 # seconds
+	FIXED_T35 = 0.00175 # seconds
+	BROADCAST_UNIT = 0
+	DEFAULT_TURNAROUND_DELAY = 0.1 # seconds of silence after a broadcast request, which is not answered
+	BYTE_COUNT_FUNCTION_CODES = [0x01, 0x02, 0x03, 0x04, 0x17] # response: unit, function code, byte count, data, crc
+	ECHO_FUNCTION_CODES = [0x05, 0x06, 0x0F, 0x10] # response: unit, function code, address, value or count, crc
+	EXCEPTION_FLAG = 0x80
+	MAX_FRAME_SIZE = 256
+	CRC_POLYNOMIAL = 0xA001
+
+# VARIABLES
+	_crc_table = None # shared by all instances, see crc
+	_logger = None
+	_port = None
+	_serial = None # opened serial.Serial (or object with the same read, write, flush, reset_input_buffer and settings attributes)
+	_line_settings = None # (baudrate, parity, stopbits, bytesize) applied to the serial port
+	_t15 = None # seconds, max silence inside a frame
+	_t35 = None # seconds, min silence between two frames
+	_turnaround_delay = DEFAULT_TURNAROUND_DELAY
+	_requests = None # queue.PriorityQueue of (priority, arrival sequence, request), see execute
+	_sequence = None # itertools.count of queued requests
+	_request_priority = None # SitModbusRequestPriority, queueing delays per priority
+	_thread = None
+	_stop_event = None
+	_last_frame_end = 0 # time.monotonic() of the end of the last frame on the bus
+	_stats_start = None # time.monotonic() of the start of the stats
+	_busy_seconds = 0 # from the start of a request to the end of its response
+	_wire_seconds = 0 # bytes on the wire times the character time
+	_requests_count = 0
+	_timeouts_count = 0
+	_crc_errors_count = 0
+
+# SETTERS AND GETTERS
+
+	@property
+	def port(self):
+		return self._port
+
+	@property
+	def t15(self):
+		return self._t15
+
+	@property
+	def t35(self):
+		return self._t35
+
+# INITIALIZE
+
+	def __init__(self, a_port, a_serial, a_turnaround_delay=DEFAULT_TURNAROUND_DELAY):
+		"""
+			Initialize and starts the thread of the bus
+			@param a_serial: opened serial.Serial of the port, owned by the bus afterwards
+		"""
+		self._logger = SitLogger().new_logger(__name__)
+		self._port = a_port
+		self._serial = a_serial
+		self._turnaround_delay = a_turnaround_delay
+		self._requests = queue.PriorityQueue()
+		self._sequence = itertools.count()
+		self._request_priority = SitModbusRequestPriority()
+		self._stop_event = threading.Event()
+		self.reset_stats()
+		self._apply_line_settings((a_serial.baudrate, a_serial.parity, a_serial.stopbits, a_serial.bytesize))
+		self._thread = threading.Thread(target=self._run, name='rtu_bus', daemon=True)
+		self._thread.start()
+
+		self.invariants()
+
+	@classmethod
+	def silent_intervals(cls, a_baudrate, a_parity, a_stopbits=1, a_bytesize=8):
+		"""
+		Returns (t1.5, t3.5) in seconds for given line settings, a character being start bit, data bits, parity bit if any and stop bits
+		"""
+		if a_baudrate > cls.FIXED_INTERVALS_BAUDRATE:
+			return cls.FIXED_T15, cls.FIXED_T35
+		l_char_time = cls.character_time(a_baudrate, a_parity, a_stopbits, a_bytesize)
+
+		return 1.5 * l_char_time, 3.5 * l_char_time
+
+	@staticmethod
+	def character_time(a_baudrate, a_parity, a_stopbits=1, a_bytesize=8):
+		"""
+		Seconds to send one character
+		"""
+		return (1 + a_bytesize + (0 if a_parity == 'N' else 1) + a_stopbits) / a_baudrate
+
+	@classmethod
+	def crc(cls, a_data):
+		"""
+		Returns the modbus CRC-16 of given bytes, sent low byte first
+		"""
+		if cls._crc_table is None:
+			l_table = []
+			for l_byte in range(256):
+				l_crc = l_byte
+				for l_bit in range(8):
+					l_crc = (l_crc >> 1) ^ cls.CRC_POLYNOMIAL if l_crc & 1 else l_crc >> 1
+				l_table.append(l_crc)
+			cls._crc_table = l_table
+		l_res = 0xFFFF
+		for l_byte in a_data:
+			l_res = (l_res >> 8) ^ cls._crc_table[(l_res ^ l_byte) & 0xFF]
+
+		return l_res
+
+	@classmethod
+	def frame(cls, a_unit, a_pdu):
+		"""
+		Returns the RTU frame of given pdu
+		"""
+		l_res = bytes([a_unit]) + a_pdu
+		return l_res + cls.crc(l_res).to_bytes(2, 'little')
+
+# STATUS REPORT
+
+	def is_running(self):
+		return self._thread.is_alive()
+
+	def status(self):
+		"""
+		Returns a json serializable dict of the bus and its utilisation since reset_stats
+			busy_ratio counts slave response times, wire_ratio only the bytes sent on the line
+		"""
+		l_elapsed = max(time.monotonic() - self._stats_start, 1e-9)
+		l_baudrate, l_parity, l_stopbits, l_bytesize = self._line_settings
+
+		return {'port': self._port,
+				'baudrate': l_baudrate, 'parity': l_parity, 'stopbits': l_stopbits, 'bytesize': l_bytesize,
+				't15': self._t15, 't35': self._t35,
+				'requests': self._requests_count, 'timeouts': self._timeouts_count, 'crc_errors': self._crc_errors_count,
+				'queued': self._requests.qsize(),
+				'busy_ratio': round(self._busy_seconds / l_elapsed, 4), 'wire_ratio': round(self._wire_seconds / l_elapsed, 4),
+				'queue_delays': self._request_priority.status(),
+				'seconds': round(l_elapsed, 3)}
+
+# STATUS SETTING
+
+	def reset_stats(self):
+		self._stats_start = time.monotonic()
+		self._busy_seconds = 0
+		self._wire_seconds = 0
+		self._requests_count = 0
+		self._timeouts_count = 0
+		self._crc_errors_count = 0
+		self._request_priority.reset_stats()
+
+	def _apply_line_settings(self, some_line_settings):
+		"""
+		Sets the serial port to given (baudrate, parity, stopbits, bytesize) if they changed, drivers of one port may use different ones
+		"""
+		if some_line_settings == self._line_settings:
+			return
+		self._serial.baudrate, self._serial.parity, self._serial.stopbits, self._serial.bytesize = some_line_settings
+		self._line_settings = some_line_settings
+		self._t15, self._t35 = self.silent_intervals(*some_line_settings)
+		self._logger.debug('_apply_line_settings-> port:{} settings:{} t1.5:{:.6f}s t3.5:{:.6f}s'.format(self._port, some_line_settings, self._t15, self._t35))
+
+	def close(self):
+		"""
+		Stops the thread of the bus, requests still queued are not answered, and closes the serial port
+		"""
+		self._stop_event.set()
+		self._thread.join()
+		while not self._requests.empty():
+			self._requests.get_nowait()[2][4].set()
+		self._serial.close()
+
+# REQUESTS
+
+	def execute(self, a_unit, a_pdu, some_line_settings, a_timeout, a_priority=None):
+		"""
+		Queues given request and waits for its turn on the bus, returns the pdu of the response, None if not answered
+			(timeout, wrong crc or unit, broadcast or bus closed)
+			requests are sent by priority then in arrival order, a write waits for the frame on the wire only
+		@param some_line_settings: (baudrate, parity, stopbits, bytesize)
+		@param a_timeout: seconds to wait for the first byte of the response
+		@param a_priority: SitModbusRequestPriority.PRIORITY_*, SitModbusRequestPriority.pdu_priority of a_pdu if None
+		"""
+		if a_priority is None:
+			a_priority = SitModbusRequestPriority.pdu_priority(a_pdu)
+		assert SitModbusRequestPriority.valid_priority(a_priority), 'invalid a_priority:{}'.format(a_priority)
+		l_request = [a_unit, a_pdu, tuple(some_line_settings), a_timeout, threading.Event(), None, time.monotonic()]
+		self._requests.put((a_priority, next(self._sequence), l_request))
+		l_request[4].wait()
+
+		return l_request[5]
+
+	def _run(self):
+		while not self._stop_event.is_set():
+			try:
+				l_priority, l_sequence, l_request = self._requests.get(timeout=1)
+			except queue.Empty:
+				continue
+			self._request_priority.record_delay(l_priority, time.monotonic() - l_request[6])
+			try:
+				l_request[5] = self._transact(*l_request[0:4])
+			except Exception as l_e:
+				self._logger.exception('_run-> port:{} request failed:{}'.format(self._port, l_e))
+			finally:
+				l_request[4].set()
+
+	def _transact(self, a_unit, a_pdu, some_line_settings, a_timeout):
+		"""
+		Sends one request after the t3.5 silence following the previous frame and reads its response
+		"""
+		self._apply_line_settings(some_line_settings)
+		l_char_time = self.character_time(*some_line_settings)
+		l_wait = self._last_frame_end + self._t35 - time.monotonic()
+		if l_wait > 0:
+			time.sleep(l_wait)
+		self._serial.reset_input_buffer() # late bytes of a response which timed out
+		l_frame = self.frame(a_unit, a_pdu)
+		l_start = time.monotonic()
+		self._serial.write(l_frame)
+		self._serial.flush()
+		self._requests_count += 1
+		if a_unit == self.BROADCAST_UNIT:
+			time.sleep(self._turnaround_delay)
+			l_response = None
+		else:
+			self._serial.timeout = a_timeout
+			l_response = self._read_response()
+		self._last_frame_end = time.monotonic()
+		self._busy_seconds += self._last_frame_end - l_start
+		self._wire_seconds += (len(l_frame) + len(l_response or b'')) * l_char_time
+		if a_unit == self.BROADCAST_UNIT:
+			return None
+		if l_response is None:
+			self._timeouts_count += 1
+			self._logger.debug('_transact-> port:{} unit:{} no response in {}s'.format(self._port, a_unit, a_timeout))
+			return None
+		if self.crc(l_response[:-2]) != int.from_bytes(l_response[-2:], 'little') or l_response[0] != a_unit:
+			self._crc_errors_count += 1
+			self._logger.warning('_transact-> port:{} unit:{} invalid response:{}'.format(self._port, a_unit, l_response.hex()))
+			return None
+
+		return l_response[1:-2]
+
+	def _read_response(self):
+		"""
+		Returns the frame of the response, its length being known from its function code, None if not complete in time
+		"""
+		l_res = self._serial.read(2)
+		if len(l_res) < 2:
+			return None
+		l_function_code = l_res[1]
+		if l_function_code & self.EXCEPTION_FLAG:
+			l_rest_size = 3
+		elif l_function_code in self.BYTE_COUNT_FUNCTION_CODES:
+			l_byte_count = self._serial.read(1)
+			if len(l_byte_count) < 1:
+				return None
+			l_res += l_byte_count
+			l_rest_size = l_byte_count[0] + 2
+		elif l_function_code in self.ECHO_FUNCTION_CODES:
+			l_rest_size = 6
+		else:
+			self._serial.timeout = max(self._t35, 0.01) # unknown length, the frame ends with a silence
+			return l_res + self._serial.read(self.MAX_FRAME_SIZE - len(l_res))
+		l_rest = self._serial.read(l_rest_size)
+		if len(l_rest) < l_rest_size:
+			return None
+
+		return l_res + l_rest
+
+# INVARIANTS
+
+	def invariants(self):
+		assert self._t35 > self._t15 > 0, 't3.5 > t1.5 > 0'
+
+#################### END CLASS ######################
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Throughput benchmark of SitModbusRtuBus without hardware, against a slave emulator on the
+#			master side of a pty pair, the bus using the slave side as serial port. The emulator answers read holding
+#			(and input) registers requests and waits the time the bytes would take on the wire at the line settings
+#
+#			--control_writes sends write single register requests while the drivers poll, to measure the latency
+#			of control writes under polling load
+#
+#       CALL SAMPLE:
+#			python3 lib/sit_modbus_rtu_bus_benchmark.py --baudrate 9600 --parity E --units 1-4 --drivers 4 --requests 50 --words 10 --control_writes 10
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import argparse
+	import json
+	import select
+	import struct
+	import threading
+	import time
+	import serial
+	from sit_logger import SitLogger
+	from sit_utils import SitUtils
+	from sit_modbus_rtu_bus import SitModbusRtuBus
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusRtuSlaveEmulator(object):
+
+# CONSTANTS
+	READ_FUNCTION_CODES = [0x03, 0x04]
+	WRITE_SINGLE_REGISTER = 0x06 # answered with the echo of the request
+	REQUEST_SIZE = 8 # unit, function code, address, count, crc
+	ILLEGAL_FUNCTION = 0x01
+	DEFAULT_RESPONSE_DELAY = 0.005 # seconds the slave takes before answering
+
+# VARIABLES
+	_logger = None
+	_fd = None # master side of the pty pair
+	_units = None # set of unit ids answering
+	_line_settings = None # (baudrate, parity, stopbits, bytesize)
+	_response_delay = DEFAULT_RESPONSE_DELAY
+	_is_wire_time_simulated = True
+	_requests_count = 0
+	_thread = None
+	_stop_event = None
+
+# SETTERS AND GETTERS
+
+	@property
+	def requests_count(self):
+		return self._requests_count
+
+# INITIALIZE
+
+	def __init__(self, a_fd, some_units, some_line_settings, a_response_delay=DEFAULT_RESPONSE_DELAY, an_is_wire_time_simulated=True):
+		"""
+			Initialize
+			@param a_fd: master file descriptor of os.openpty()
+			@param an_is_wire_time_simulated: waits the time of the bytes at the baudrate, a pty being as fast as memory
+		"""
+		self._logger = SitLogger().new_logger(__name__)
+		self._fd = a_fd
+		self._units = set(some_units)
+		self._line_settings = some_line_settings
+		self._response_delay = a_response_delay
+		self._is_wire_time_simulated = an_is_wire_time_simulated
+		self._stop_event = threading.Event()
+		self._thread = threading.Thread(target=self._run, name='rtu_slave_emulator', daemon=True)
+
+	def start(self):
+		self._thread.start()
+
+	def stop(self):
+		self._stop_event.set()
+		self._thread.join()
+
+# EMULATION
+
+	def _run(self):
+		l_char_time = SitModbusRtuBus.character_time(*self._line_settings)
+		l_buffer = b''
+		while not self._stop_event.is_set():
+			if not select.select([self._fd], [], [], 0.2)[0]:
+				continue
+			l_buffer += os.read(self._fd, SitModbusRtuBus.MAX_FRAME_SIZE)
+			while len(l_buffer) >= self.REQUEST_SIZE:
+				l_request, l_buffer = l_buffer[:self.REQUEST_SIZE], l_buffer[self.REQUEST_SIZE:]
+				if self._is_wire_time_simulated:
+					time.sleep(len(l_request) * l_char_time)
+				l_response = self.response(l_request)
+				if l_response is None:
+					continue
+				time.sleep(self._response_delay)
+				if self._is_wire_time_simulated:
+					time.sleep(len(l_response) * l_char_time)
+				os.write(self._fd, l_response)
+
+	def response(self, a_request):
+		"""
+		Returns the frame answering given request frame, None if it is not for one of the units or has a wrong crc
+			registers values are their address
+		"""
+		if SitModbusRtuBus.crc(a_request[:-2]) != int.from_bytes(a_request[-2:], 'little') or a_request[0] not in self._units:
+			return None
+		self._requests_count += 1
+		l_unit, l_function_code, l_address, l_count = struct.unpack('>BBHH', a_request[:-2])
+		if l_function_code == self.WRITE_SINGLE_REGISTER:
+			return a_request
+		if l_function_code not in self.READ_FUNCTION_CODES:
+			return SitModbusRtuBus.frame(l_unit, bytes([l_function_code | SitModbusRtuBus.EXCEPTION_FLAG, self.ILLEGAL_FUNCTION]))
+		l_words = [(l_address + l_index) & 0xFFFF for l_index in range(l_count)]
+
+		return SitModbusRtuBus.frame(l_unit, struct.pack('>BB{}H'.format(l_count), l_function_code, l_count * 2, *l_words))
+
+#################### END CLASS ######################
+
+def driver_loop(a_bus, a_driver_index, some_units, some_line_settings, a_requests_count, a_words_count, a_timeout, some_latencies, some_errors):
+	"""
+	Sends a_requests_count read requests through the bus as a driver would, appends latencies and errors to given lists
+	"""
+	for l_index in range(a_requests_count):
+		l_unit = some_units[(a_driver_index + l_index) % len(some_units)]
+		l_address = (l_index * a_words_count) % 1000
+		l_start = time.monotonic()
+		l_response = a_bus.execute(l_unit, struct.pack('>BHH', 0x03, l_address, a_words_count), some_line_settings, a_timeout)
+		some_latencies.append(time.monotonic() - l_start)
+		if l_response is None or len(l_response) != 2 + 2 * a_words_count or struct.unpack_from('>H', l_response, 2)[0] != l_address:
+			some_errors.append((l_unit, l_address, l_response))
+
+def control_loop(a_bus, some_units, some_line_settings, a_writes_count, an_interval, a_timeout, some_latencies, some_errors):
+	"""
+	Sends a_writes_count write single register requests through the bus every an_interval seconds, appends latencies and errors to given lists
+	"""
+	for l_index in range(a_writes_count):
+		time.sleep(an_interval)
+		l_unit = some_units[l_index % len(some_units)]
+		l_pdu = struct.pack('>BHH', SitModbusRtuSlaveEmulator.WRITE_SINGLE_REGISTER, l_index, l_index)
+		l_start = time.monotonic()
+		l_response = a_bus.execute(l_unit, l_pdu, some_line_settings, a_timeout)
+		some_latencies.append(time.monotonic() - l_start)
+		if l_response != l_pdu:
+			some_errors.append((l_unit, l_index, l_response))
+
+def main():
+	"""
+	Main method
+	"""
+	l_parser = argparse.ArgumentParser(description='Throughput of SitModbusRtuBus against a pty slave emulator')
+	l_parser.add_argument('--baudrate', type=int, default=9600)
+	l_parser.add_argument('--parity', choices=['N', 'E', 'O'], default='E')
+	l_parser.add_argument('--stopbits', type=int, default=1)
+	l_parser.add_argument('--units', help='Unit ids of the emulated slaves as 1-4 or 1,3', default='1-4')
+	l_parser.add_argument('--drivers', help='Threads sending requests concurrently', type=int, default=4)
+	l_parser.add_argument('--requests', help='Requests per driver', type=int, default=50)
+	l_parser.add_argument('--words', help='Registers read per request', type=int, default=10)
+	l_parser.add_argument('--response_delay', help='Seconds the emulated slave takes to answer', type=float, default=SitModbusRtuSlaveEmulator.DEFAULT_RESPONSE_DELAY)
+	l_parser.add_argument('--timeout', type=float, default=1)
+	l_parser.add_argument('--no_wire_time', help='Does not simulate the time of the bytes on the wire', action='store_true')
+	l_parser.add_argument('--control_writes', help='Write requests sent while polling', type=int, default=0)
+	l_parser.add_argument('--control_interval', help='Seconds between two control writes', type=float, default=0.2)
+	l_args = l_parser.parse_args()
+
+	l_units = SitUtils.args_to_list(l_args.units)
+	l_line_settings = (l_args.baudrate, l_args.parity, l_args.stopbits, 8)
+	l_master_fd, l_slave_fd = os.openpty()
+	l_emulator = SitModbusRtuSlaveEmulator(l_master_fd, l_units, l_line_settings, l_args.response_delay, not l_args.no_wire_time)
+	l_emulator.start()
+	l_bus = SitModbusRtuBus(os.ttyname(l_slave_fd), serial.Serial(os.ttyname(l_slave_fd), baudrate=l_args.baudrate, parity=l_args.parity, stopbits=l_args.stopbits, bytesize=8, timeout=l_args.timeout))
+	l_latencies = []
+	l_errors = []
+	l_threads = [threading.Thread(target=driver_loop, args=(l_bus, l_index, l_units, l_line_settings, l_args.requests, l_args.words, l_args.timeout, l_latencies, l_errors)) for l_index in range(l_args.drivers)]
+	l_control_latencies = []
+	if l_args.control_writes > 0:
+		l_threads.append(threading.Thread(target=control_loop, args=(l_bus, l_units, l_line_settings, l_args.control_writes, l_args.control_interval, l_args.timeout, l_control_latencies, l_errors)))
+	l_start = time.monotonic()
+	for l_thread in l_threads:
+		l_thread.start()
+	for l_thread in l_threads:
+		l_thread.join()
+	l_elapsed = time.monotonic() - l_start
+	l_status = l_bus.status()
+	l_bus.close()
+	l_emulator.stop()
+	os.close(l_master_fd)
+	os.close(l_slave_fd)
+
+	l_char_time = SitModbusRtuBus.character_time(*l_line_settings)
+	l_transaction_time = (SitModbusRtuSlaveEmulator.REQUEST_SIZE + 5 + 2 * l_args.words) * l_char_time + l_args.response_delay + SitModbusRtuBus.silent_intervals(*l_line_settings)[1]
+	print(json.dumps({'requests': len(l_latencies), 'errors': len(l_errors), 'seconds': round(l_elapsed, 3),
+			'requests_per_second': round(len(l_latencies) / l_elapsed, 2),
+			'max_requests_per_second': round(1 / l_transaction_time, 2) if not l_args.no_wire_time else None,
+			'mean_latency': round(sum(l_latencies) / len(l_latencies), 4) if l_latencies else None,
+			'control_writes': len(l_control_latencies),
+			'max_control_latency': round(max(l_control_latencies), 4) if l_control_latencies else None,
+			'bus': l_status}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Health state machine of one modbus slave (target, unit), circuit breaker closed/open/half-open with
+#			exponential backoff and jitter, see sit_modbus_device.register_value
+#			start_request and is_retry_after are the retry policy shared by blocking and asynchronous requests
+#			request timeout learned from observed round-trip times as TCP does (RFC 6298), SRTT + 4 * RTTVAR
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import time
+	import random
+	from collections import OrderedDict
+	from sit_logger import SitLogger
+	from sit_modbus_exception_response_error import SitModbusExceptionResponseError
+	from sit_modbus_slave_unavailable_error import SitModbusSlaveUnavailableError
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusSlaveHealth(object):
+
+# CONSTANTS
+	STATE_CLOSED = 'closed' # requests are sent
+	STATE_OPEN = 'open' # requests are refused until open_until
+	STATE_HALF_OPEN = 'half_open' # one probe request is sent, its result closes or opens again
+	DEFAULT_FAILURES_TO_OPEN = 2 # consecutive failed register_value calls (each with its retries) opening the circuit
+	BASE_OPEN_DURATION = 5 # seconds of the first open state, doubled by each consecutive open
+	MAX_OPEN_DURATION = 600
+	BASE_RETRY_DELAY = 0.2 # seconds before the first retry of a request, doubled by each retry
+	MAX_RETRY_DELAY = 5
+	JITTER_RATIO = 0.2 # delays are multiplied by a random factor in [1 - JITTER_RATIO, 1 + JITTER_RATIO]
+	RTT_ALPHA = 0.125 # gain of the smoothed round-trip time
+	RTT_BETA = 0.25 # gain of the round-trip time variation
+	RTT_VARIANCE_FACTOR = 4 # timeout = srtt + RTT_VARIANCE_FACTOR * rttvar
+	TIMEOUT_LOG_CHANGE_RATIO = 0.25 # a learned timeout is logged when it changes more than this ratio since the last logged one
+
+# VARIABLES
+	_logger = None
+	_slave_key = None # (target ip or port, slave_address)
+	_failures_to_open = DEFAULT_FAILURES_TO_OPEN
+	_state = STATE_CLOSED
+	_failures_count = 0 # consecutive failures
+	_opens_count = 0 # consecutive opens without success, exponent of the open duration
+	_open_until = 0 # time.monotonic() value
+	_last_failure_time = None # time.time() value
+	_last_failure_message = None
+	_last_success_time = None # time.time() value
+	_srtt = None # seconds, smoothed round-trip time, None before the first answer
+	_rttvar = None # seconds, round-trip time variation
+	_timeout_backoff_factor = 1 # doubled by each failure, reset by an answer
+	_logged_timeout = None
+
+# SETTERS AND GETTERS
+
+	@property
+	def slave_key(self):
+		return self._slave_key
+
+	@property
+	def state(self):
+		return self._state
+
+	@property
+	def failures_count(self):
+		return self._failures_count
+
+	@property
+	def srtt(self):
+		return self._srtt
+
+	@property
+	def rttvar(self):
+		return self._rttvar
+
+# INITIALIZE
+
+	def __init__(self, a_slave_key, a_failures_to_open=DEFAULT_FAILURES_TO_OPEN):
+		"""
+			Initialize closed
+			@param a_slave_key: (target ip or port, slave_address)
+		"""
+		assert a_failures_to_open > 0, 'a_failures_to_open > 0:{}'.format(a_failures_to_open)
+		self._logger = SitLogger().new_logger(__name__)
+		self._slave_key = a_slave_key
+		self._failures_to_open = a_failures_to_open
+
+		self.invariants()
+
+# STATUS REPORT
+
+	def is_healthy(self):
+		"""
+		True if closed without failure since the last success, requests to a slave which is not healthy are not retried
+		"""
+		return self._state == self.STATE_CLOSED and self._failures_count == 0
+
+	def remaining_open_seconds(self, a_monotonic_time=None):
+		if a_monotonic_time is None:
+			a_monotonic_time = time.monotonic()
+		return max(0, self._open_until - a_monotonic_time) if self._state == self.STATE_OPEN else 0
+
+	def is_request_allowed(self, a_monotonic_time=None):
+		"""
+		True if a request can be sent, an open circuit whose delay is reached becomes half open and allows one probe
+		"""
+		if self._state == self.STATE_OPEN:
+			if self.remaining_open_seconds(a_monotonic_time) > 0:
+				return False
+			self._state = self.STATE_HALF_OPEN
+			self._logger.info('is_request_allowed-> slave:{} half open, probing'.format(self._slave_key))
+
+		return True
+
+	def retry_delay(self, a_retries_count):
+		"""
+		Returns the seconds to wait before retry number a_retries_count (from 1), exponential with jitter
+		"""
+		assert a_retries_count > 0, 'a_retries_count > 0:{}'.format(a_retries_count)
+		return self.with_jitter(min(self.MAX_RETRY_DELAY, self.BASE_RETRY_DELAY * 2 ** (a_retries_count - 1)))
+
+	def start_request(self, a_max_retries_count):
+		"""
+		Returns the tries count allowed to a new request to the slave, raises SitModbusSlaveUnavailableError if its circuit is open
+			a slave which is not healthy gets one try, a failing slave costs one timeout per request
+		"""
+		if not self.is_request_allowed():
+			raise SitModbusSlaveUnavailableError(self._slave_key, self.remaining_open_seconds())
+
+		return a_max_retries_count if self.is_healthy() else 1
+
+	def is_retry_after(self, a_modbus_exception, a_retries_count, a_max_retries_count, an_is_write=False):
+		"""
+		Records the result of given failed try number a_retries_count (from 1) of a request started with start_request,
+			returns True if the request is to be sent again after retry_delay(a_retries_count), False if the exception is to be raised
+			an exception response of the slave itself is an answer, never retried for an unsupported register or a write
+		"""
+		l_is_slave_answer = isinstance(a_modbus_exception, SitModbusExceptionResponseError) and not a_modbus_exception.is_gateway_error()
+		if l_is_slave_answer:
+			self.record_success()
+			if an_is_write or a_modbus_exception.is_register_unsupported():
+				return False
+		if a_retries_count < a_max_retries_count:
+			return True
+		if not l_is_slave_answer:
+			self.record_failure(a_modbus_exception)
+
+		return False
+
+	def with_jitter(self, a_delay):
+		return a_delay * random.uniform(1 - self.JITTER_RATIO, 1 + self.JITTER_RATIO)
+
+	def request_timeout(self, a_default_timeout, a_min_timeout, a_max_timeout, a_retries_count=0):
+		"""
+		Returns the timeout of the next request, a_default_timeout until the slave answered once
+			then srtt + RTT_VARIANCE_FACTOR * rttvar doubled by each failure and each retry, bounded by given min and max
+		"""
+		assert 0 < a_min_timeout <= a_max_timeout, 'valid bounds min:{} max:{}'.format(a_min_timeout, a_max_timeout)
+		if self._srtt is None:
+			l_res = a_default_timeout # nothing learned, a slave which never answered is not waited longer than before
+		else:
+			l_res = self._srtt + self.RTT_VARIANCE_FACTOR * self._rttvar
+			l_res = max(a_min_timeout, min(a_max_timeout, l_res * self._timeout_backoff_factor * 2 ** a_retries_count))
+		if self._logged_timeout is None or abs(l_res - self._logged_timeout) > self._logged_timeout * self.TIMEOUT_LOG_CHANGE_RATIO:
+			self._logger.info('request_timeout-> slave:{} timeout:{:.3f}s srtt:{} rttvar:{} backoff factor:{}'.format(self._slave_key, l_res, self._srtt, self._rttvar, self._timeout_backoff_factor))
+			self._logged_timeout = l_res
+
+		return l_res
+
+	def status(self):
+		"""
+		Returns an OrderedDict for monitoring
+		"""
+		l_res = OrderedDict()
+		l_res['target'] = self._slave_key[0]
+		l_res['slave_address'] = self._slave_key[1]
+		l_res['state'] = self._state
+		l_res['failures_count'] = self._failures_count
+		l_res['opens_count'] = self._opens_count
+		l_res['remaining_open_seconds'] = round(self.remaining_open_seconds(), 1)
+		l_res['srtt'] = self._srtt
+		l_res['rttvar'] = self._rttvar
+		l_res['timeout'] = self._logged_timeout
+		l_res['last_success_time'] = self._last_success_time
+		l_res['last_failure_time'] = self._last_failure_time
+		l_res['last_failure_message'] = self._last_failure_message
+
+		return l_res
+
+# STATUS SETTING
+
+	def record_success(self):
+		"""
+		The slave answered (an exception response is an answer), closes the circuit
+		"""
+		if self._state != self.STATE_CLOSED:
+			self._logger.info('record_success-> slave:{} answered, closing circuit after {} open(s)'.format(self._slave_key, self._opens_count))
+		self._state = self.STATE_CLOSED
+		self._failures_count = 0
+		self._opens_count = 0
+		self._last_success_time = time.time()
+		self._timeout_backoff_factor = 1
+
+	def record_round_trip(self, a_seconds):
+		"""
+		Updates the smoothed round-trip time and its variation with the duration of an answered request
+		"""
+		assert a_seconds >= 0, 'a_seconds >= 0:{}'.format(a_seconds)
+		if self._srtt is None:
+			self._srtt = a_seconds
+			self._rttvar = a_seconds / 2
+		else:
+			self._rttvar = (1 - self.RTT_BETA) * self._rttvar + self.RTT_BETA * abs(self._srtt - a_seconds)
+			self._srtt = (1 - self.RTT_ALPHA) * self._srtt + self.RTT_ALPHA * a_seconds
+
+	def record_failure(self, a_message=None):
+		"""
+		The slave did not answer after the retries of a request, opens the circuit if it was half open
+			or after self._failures_to_open consecutive failures, the open duration doubles with each open
+		"""
+		self._failures_count += 1
+		self._timeout_backoff_factor *= 2
+		self._last_failure_time = time.time()
+		self._last_failure_message = None if a_message is None else str(a_message)
+		if self._state == self.STATE_HALF_OPEN or self._failures_count >= self._failures_to_open:
+			l_open_duration = self.with_jitter(min(self.MAX_OPEN_DURATION, self.BASE_OPEN_DURATION * 2 ** self._opens_count))
+			self._state = self.STATE_OPEN
+			self._open_until = time.monotonic() + l_open_duration
+			self._opens_count += 1
+			self._logger.warning('record_failure-> slave:{} opening circuit for {:.1f}s after {} failure(s), open count:{} msg:{}'.format(self._slave_key, l_open_duration, self._failures_count, self._opens_count, a_message))
+
+		self.invariants()
+
+# INVARIANTS
+
+	def invariants(self):
+		assert self._state in [self.STATE_CLOSED, self.STATE_OPEN, self.STATE_HALF_OPEN], 'valid state:{}'.format(self._state)
+		assert self._failures_count >= 0, 'failures_count >= 0'
+
+#################### END CLASS ######################
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Raised without sending any request when the circuit breaker of a slave is open, see sit_modbus_slave_health
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	from pymodbus.exceptions import ModbusException
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusSlaveUnavailableError(ModbusException):
+
+# VARIABLES
+	_slave_key = None
+	_remaining_seconds = None
+
+# SETTERS AND GETTERS
+
+	@property
+	def slave_key(self):
+		"""
+		(target, slave_address) of the unavailable slave
+		"""
+		return self._slave_key
+
+	@property
+	def remaining_seconds(self):
+		"""
+		Seconds before the slave is probed again
+		"""
+		return self._remaining_seconds
+
+# INITIALIZE
+
+	def __init__(self, a_slave_key, a_remaining_seconds):
+		"""
+			Initialize
+		"""
+		self._slave_key = a_slave_key
+		self._remaining_seconds = a_remaining_seconds
+		super().__init__('slave unavailable (circuit open) target:{} slave_address:{} probed again in {:.1f}s'.format(a_slave_key[0], a_slave_key[1], a_remaining_seconds))
+
+#################### END CLASS ######################
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Pool of Modbus TCP connections to one gateway (ip, port) accepting several clients, each unit id
+#			is assigned to one connection so that slaves are read concurrently, see
+#			SitModbusDevice.poll_slaves_sit_modbus_registers. Connections are recycled after a max age or a failure,
+#			a connection refused by the gateway is tried again after a delay
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import time
+	from concurrent.futures import ThreadPoolExecutor
+	from sit_logger import SitLogger
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusTcpConnectionPool(object):
+
+# CONSTANTS
+	DEFAULT_SIZE = 4 # connections to the gateway, the primary one included
+	DEFAULT_MAX_CONNECTION_AGE = 3600 # seconds a connection is used before being closed and opened again
+	DEFAULT_RECONNECT_DELAY = 60 # seconds before connecting again a connection the gateway refused
+
+# VARIABLES
+	_logger = None
+	_target_key = None # (ip, port)
+	_size = DEFAULT_SIZE
+	_primary_client = None # connection of index 0, owned by the device, never recycled by the pool
+	_client_factory = None # callable returning a new modbus client not connected
+	_max_connection_age = DEFAULT_MAX_CONNECTION_AGE
+	_reconnect_delay = DEFAULT_RECONNECT_DELAY
+	_clients = None # list of modbus client or None by connection index
+	_connect_times = None # list of time.monotonic() of connection by connection index
+	_unavailable_untils = None # list of time.monotonic() before which the connection is not tried again
+	_connection_indexes = None # dict slave address => connection index
+	_executor = None
+
+# SETTERS AND GETTERS
+
+	@property
+	def target_key(self):
+		return self._target_key
+
+	@property
+	def size(self):
+		return self._size
+
+	@property
+	def primary_client(self):
+		return self._primary_client
+
+	@property
+	def executor(self):
+		"""
+		ThreadPoolExecutor with one worker per connection
+		"""
+		return self._executor
+
+# INITIALIZE
+
+	def __init__(self, a_target_key, a_primary_client, a_client_factory, a_size=DEFAULT_SIZE, a_max_connection_age=DEFAULT_MAX_CONNECTION_AGE, a_reconnect_delay=DEFAULT_RECONNECT_DELAY):
+		"""
+			Initialize
+			@param a_target_key: (ip, port)
+			@param a_primary_client: connected modbus client of the device, connection 0
+			@param a_client_factory: callable returning a new modbus client to the same target
+		"""
+		assert a_size > 0, 'a_size > 0:{}'.format(a_size)
+		self._logger = SitLogger().new_logger(__name__)
+		self._target_key = a_target_key
+		self._primary_client = a_primary_client
+		self._client_factory = a_client_factory
+		self._size = a_size
+		self._max_connection_age = a_max_connection_age
+		self._reconnect_delay = a_reconnect_delay
+		self._clients = [a_primary_client] + [None] * (a_size - 1)
+		self._connect_times = [time.monotonic()] * a_size
+		self._unavailable_untils = [0] * a_size
+		self._connection_indexes = {}
+		self._executor = ThreadPoolExecutor(max_workers=a_size, thread_name_prefix='connection')
+
+		self.invariants()
+
+# CONNECTIONS
+
+	def connection(self, a_connection_index):
+		"""
+		Returns the connected modbus client of given index, None if it is not available
+			a connection older than max connection age is closed and opened again
+		"""
+		if a_connection_index == 0:
+			return self._primary_client
+		l_now = time.monotonic()
+		l_client = self._clients[a_connection_index]
+		if l_client is not None and l_now - self._connect_times[a_connection_index] >= self._max_connection_age:
+			self._logger.debug('connection-> target:{} recycling connection {} after {:.0f}s'.format(self._target_key, a_connection_index, l_now - self._connect_times[a_connection_index]))
+			self._close_connection(a_connection_index)
+			l_client = None
+		if l_client is None:
+			if l_now < self._unavailable_untils[a_connection_index]:
+				return None
+			l_client = self._client_factory()
+			if not l_client.connect():
+				self._logger.warning('connection-> target:{} connection {} refused, trying again in {}s'.format(self._target_key, a_connection_index, self._reconnect_delay))
+				l_client.close()
+				self._unavailable_untils[a_connection_index] = l_now + self._reconnect_delay
+				return None
+			self._clients[a_connection_index] = l_client
+			self._connect_times[a_connection_index] = l_now
+
+		return l_client
+
+	def available_connection_indexes(self):
+		"""
+		Returns indexes of connections available for a cycle, connecting them if necessary
+		"""
+		return [l_index for l_index in range(self._size) if self.connection(l_index) is not None]
+
+	def connection_index(self, a_slave_address, some_available_indexes):
+		"""
+		Returns the connection reading given slave, the same as before if available,
+			otherwise the available connection having the fewest slaves
+		"""
+		assert len(some_available_indexes) > 0, 'some_available_indexes not empty'
+		l_res = self._connection_indexes.get(a_slave_address)
+		if l_res not in some_available_indexes:
+			l_slaves_counts = dict((l_index, 0) for l_index in some_available_indexes)
+			for l_index in self._connection_indexes.values():
+				if l_index in l_slaves_counts:
+					l_slaves_counts[l_index] += 1
+			l_res = min(some_available_indexes, key=lambda l_index: l_slaves_counts[l_index])
+			self._connection_indexes[a_slave_address] = l_res
+
+		return l_res
+
+	def record_failure(self, a_connection_index):
+		"""
+		Closes given connection after a connection error, opened again on next use
+		"""
+		if a_connection_index > 0:
+			self._logger.warning('record_failure-> target:{} closing connection {}'.format(self._target_key, a_connection_index))
+			self._close_connection(a_connection_index)
+
+	def _close_connection(self, a_connection_index):
+		l_client = self._clients[a_connection_index]
+		self._clients[a_connection_index] = None
+		try:
+			l_client.close()
+		except Exception as l_e:
+			self._logger.warning('_close_connection-> error closing connection {}:{}'.format(a_connection_index, l_e))
+
+	def close(self):
+		"""
+		Closes connections opened by the pool and stops its executor, the primary client is closed by its device
+		"""
+		for l_index in range(1, self._size):
+			if self._clients[l_index] is not None:
+				self._close_connection(l_index)
+		self._executor.shutdown(wait=True)
+
+# INVARIANTS
+
+	def invariants(self):
+		assert len(self._clients) == self._size, 'one client slot per connection'
+		assert self._clients[0] is self._primary_client, 'primary client is connection 0'
+
+#################### END CLASS ######################
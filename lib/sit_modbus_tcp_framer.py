@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Minimal Modbus TCP framer for read holding registers (function code 3) requests of blocks, sent
+#			from a preallocated request and received with recv_into a reusable buffer on the socket of a pymodbus
+#			sync client, the register bytes are handed to SitModbusBlockDecoder without building pymodbus responses.
+#			Exception responses and unusual answers are left to pymodbus, see SitModbusDevice.framed_read_block_results
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import time
+	import socket
+	import struct
+	from pymodbus.exceptions import ConnectionException
+	from sit_logger import SitLogger
+	from sit_modbus_framed_response import SitModbusFramedResponse
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusTcpFramer(object):
+
+# CONSTANTS
+	READ_REQUEST = struct.Struct('>HHHBBHH') # MBAP (transaction id, protocol id, length, unit id), function code, address, count
+	RESPONSE_HEADER = struct.Struct('>HHHBBB') # MBAP, function code, byte count (exception code of an exception response)
+	READ_HOLDING_REGISTERS_FUNCTION_CODE = 0x03
+	EXCEPTION_RESPONSE_FLAG = 0x80
+	MAX_WORDS_COUNT = 125 # of one read holding registers request
+	MAX_TRANSACTION_ID = 0xFFFF
+
+# VARIABLES
+	_logger = None
+	_target_key = None # (ip, port)
+	_transaction_id = 0
+	_request = None # bytearray of one request, packed into for each request
+	_response_header = None # bytearray received into for each response
+	_payload_buffer = None # bytearray receiving the register bytes of the responses of one read_holding_registers call
+	_fall_back_reason = None
+
+# SETTERS AND GETTERS
+
+	@property
+	def target_key(self):
+		return self._target_key
+
+	@property
+	def fall_back_reason(self):
+		"""
+		Why the framer is not used anymore, None if it is
+		"""
+		return self._fall_back_reason
+
+# INITIALIZE
+
+	def __init__(self, a_target_key):
+		"""
+			Initialize
+			@param a_target_key: (ip, port)
+		"""
+		self._logger = SitLogger().new_logger(__name__)
+		self._target_key = a_target_key
+		self._request = bytearray(self.READ_REQUEST.size)
+		self._response_header = bytearray(self.RESPONSE_HEADER.size)
+		self._payload_buffer = bytearray(self.MAX_WORDS_COUNT * 2)
+
+		self.invariants()
+
+# STATUS REPORT
+
+	def is_enabled(self):
+		return self._fall_back_reason is None
+
+	def can_read(self, a_words_count):
+		"""
+		True if a block of given words count fits into one request
+		"""
+		return 0 < a_words_count <= self.MAX_WORDS_COUNT
+
+# STATUS SETTING
+
+	def fall_back_to_pymodbus(self, a_reason):
+		"""
+		Disables the framer for the life of the process, the target answers in a way it does not handle
+		"""
+		if self._fall_back_reason is None:
+			self._logger.warning('fall_back_to_pymodbus-> target:{} reason:{}'.format(self._target_key, a_reason))
+			self._fall_back_reason = a_reason
+
+# READ
+
+	def read_holding_registers(self, a_modbus_client, some_requests):
+		"""
+		Sends given requests one after the other on the socket of a_modbus_client
+			returns a list with (SitModbusFramedResponse, round trip seconds) for each request, (None, None) for an
+			exception response, a timeout or an unusual answer, to be read again with pymodbus
+			payloads of the responses are views of a buffer reused by the next call, decode them before
+			the socket is closed after a timeout or a wrong answer so that late responses are discarded, pymodbus
+			connects again on its next request
+		@param some_requests: list of (address, count, unit, timeout seconds)
+		"""
+		if a_modbus_client.socket is None and not a_modbus_client.connect():
+			raise ConnectionException('read_holding_registers-> could not connect to {}'.format(self._target_key))
+		l_socket = a_modbus_client.socket
+		l_payload_size = sum(l_count for l_address, l_count, l_unit, l_timeout in some_requests) * 2
+		if len(self._payload_buffer) < l_payload_size:
+			self._payload_buffer = bytearray(l_payload_size) # not resized, views of the previous call may still be alive
+		l_payload_view = memoryview(self._payload_buffer)
+		l_header_view = memoryview(self._response_header)
+		l_payload_offset = 0
+		l_res = []
+		l_is_reset_needed = False
+		try:
+			for l_address, l_count, l_unit, l_timeout in some_requests:
+				assert self.can_read(l_count), 'can_read:{}'.format(l_count)
+				l_transaction_id = self._next_transaction_id()
+				self.READ_REQUEST.pack_into(self._request, 0, l_transaction_id, 0, self.READ_REQUEST.size - 6, l_unit, self.READ_HOLDING_REGISTERS_FUNCTION_CODE, l_address, l_count)
+				l_socket.settimeout(l_timeout)
+				l_start_time = time.monotonic()
+				l_socket.sendall(self._request)
+				self._recv_into(l_socket, l_header_view)
+				l_response_transaction_id, l_protocol_id, l_length, l_response_unit, l_function_code, l_byte_count = self.RESPONSE_HEADER.unpack_from(self._response_header)
+				if l_response_transaction_id != l_transaction_id or l_protocol_id != 0 or l_response_unit != l_unit:
+					self.fall_back_to_pymodbus('unexpected response transaction_id:{}/{} protocol_id:{} unit:{}/{}'.format(l_response_transaction_id, l_transaction_id, l_protocol_id, l_response_unit, l_unit))
+					l_is_reset_needed = True
+					break
+				if l_function_code == self.READ_HOLDING_REGISTERS_FUNCTION_CODE | self.EXCEPTION_RESPONSE_FLAG and l_length == 3:
+					l_res.append((None, None)) # read again by pymodbus which raises the SitModbusExceptionResponseError
+					continue
+				if l_function_code != self.READ_HOLDING_REGISTERS_FUNCTION_CODE or l_byte_count != l_count * 2 or l_length != l_byte_count + 3:
+					self.fall_back_to_pymodbus('unexpected response function_code:{} byte_count:{} length:{} for count:{}'.format(l_function_code, l_byte_count, l_length, l_count))
+					l_is_reset_needed = True
+					break
+				l_payload = l_payload_view[l_payload_offset:l_payload_offset + l_byte_count]
+				self._recv_into(l_socket, l_payload)
+				l_payload_offset += l_byte_count
+				l_res.append((SitModbusFramedResponse(l_payload), time.monotonic() - l_start_time))
+		except socket.timeout:
+			self._logger.warning('read_holding_registers-> target:{} request {}/{} not answered in time'.format(self._target_key, len(l_res) + 1, len(some_requests)))
+			l_is_reset_needed = True
+		except OSError as l_e:
+			l_is_reset_needed = True
+			raise ConnectionException('read_holding_registers-> socket error with {}:{}'.format(self._target_key, l_e))
+		finally:
+			if l_is_reset_needed:
+				a_modbus_client.close()
+		l_res.extend([(None, None)] * (len(some_requests) - len(l_res)))
+
+		return l_res
+
+	def _recv_into(self, a_socket, a_view):
+		"""
+		Receives exactly len(a_view) bytes into given memoryview
+		"""
+		while len(a_view) > 0:
+			l_received_count = a_socket.recv_into(a_view)
+			if l_received_count == 0:
+				raise ConnectionResetError('connection closed by {}'.format(self._target_key))
+			a_view = a_view[l_received_count:]
+
+	def _next_transaction_id(self):
+		self._transaction_id = self._transaction_id % self.MAX_TRANSACTION_ID + 1
+		return self._transaction_id
+
+# INVARIANTS
+
+	def invariants(self):
+		assert len(self._request) == self.READ_REQUEST.size, 'request size'
+
+#################### END CLASS ######################
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Discovers the unit ids answering behind a Modbus TCP gateway, probing them concurrently
+#			with a short timeout and a minimal read (SMA DeviceClass or SunSpec 'SunS'), then reads device class
+#			and serial number of the found units. The result is written into a cache file used by drivers
+#			as default slave addresses list, see cached_unit_ids
+#
+#       CALL SAMPLE:
+#			python3 lib/sit_modbus_unit_scanner.py -i 192.168.0.10 --profile sma
+#			python3 lib/sit_modbus_unit_scanner.py -i 192.168.0.20 --profile sunspec --units 1-247 --timeout 0.3
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	import os, errno
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/register_types'))
+	import logging # http://www.onlamp.com/pub/a/python/2005/06/02/logging.html
+	import argparse
+	import asyncio
+	import json
+	import time
+	from collections import namedtuple
+	from pymodbus.exceptions import ModbusException, ConnectionException
+	from pymodbus.pdu import ExceptionResponse
+	from pymodbus.register_read_message import ReadHoldingRegistersResponse
+	from sit_logger import SitLogger
+	from sit_constants import SitConstants
+	from sit_utils import SitUtils
+	from sit_modbus_register import SitModbusRegister
+	from sit_modbus_read_planner import SitModbusReadPlanner
+	from sit_modbus_block_decoder import SitModbusBlockDecoder
+	from sit_modbus_async_tcp_client import SitModbusAsyncTcpClient
+	from sit_modbus_exception_response_error import SitModbusExceptionResponseError
+	from register_type_int32_u import RegisterTypeInt32u
+	from register_type_string16 import RegisterTypeString16
+	from register_type_sma_cc_device_class import RegisterTypeSmaCCDeviceClass
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+# Unit found by a scan, device_class and serial_number are None if the unit did not give them
+SitModbusScannedUnit = namedtuple('SitModbusScannedUnit', ['unit_id', 'device_class', 'serial_number'])
+
+class SitModbusUnitScanner(object):
+
+# CONSTANTS
+	PROFILE_SMA = 'sma' # SMA Modbus profile, DeviceClass (30051) and SN (30005)
+	PROFILE_SUNSPEC = 'sunspec' # SunSpec 'SunS' marker (40000), common model Md (40020) and SN (40052)
+	PROFILES = [PROFILE_SMA, PROFILE_SUNSPEC]
+	SUNSPEC_MARKER = 0x53756e53 # 'SunS'
+	MIN_UNIT_ID = 1
+	MAX_UNIT_ID = 247
+	DEFAULT_PORT = 502
+	DEFAULT_TIMEOUT = 0.5 # seconds, a unit not answering in time is absent
+	DEFAULT_CONCURRENCY = 16 # probes outstanding on the connection
+	DEFAULT_DIRECTORY = '/var/solarity/unit_scans' #without ending slash
+	PARSER_DESCRIPTION = 'Discovers the modbus unit ids answering behind a gateway. ' + SitConstants.DEFAULT_HELP_LICENSE_NOTICE
+
+# VARIABLES
+	_logger = None
+	_host = None
+	_port = None
+	_profile = PROFILE_SMA
+	_timeout = DEFAULT_TIMEOUT
+	_concurrency = DEFAULT_CONCURRENCY
+	_directory = DEFAULT_DIRECTORY
+	_probe_sit_modbus_registers = None # templates of slave MIN_UNIT_ID read to know if a unit answers
+	_identification_sit_modbus_registers = None # templates read on answering units only
+	_read_planner = None
+
+# SETTERS AND GETTERS
+
+	@property
+	def host(self):
+		return self._host
+
+	@property
+	def port(self):
+		return self._port
+
+	@property
+	def profile(self):
+		return self._profile
+
+	def file_path(self):
+		return self.cache_file_path(self._host, self._port, self._directory)
+
+	@classmethod
+	def cache_file_path(cls, a_host, a_port, a_directory=DEFAULT_DIRECTORY):
+		return os.path.join(a_directory, '{}_{}.json'.format(a_host, int(a_port)))
+
+# INITIALIZE
+
+	def __init__(self, a_host, a_port=DEFAULT_PORT, a_profile=PROFILE_SMA, a_timeout=DEFAULT_TIMEOUT, a_concurrency=DEFAULT_CONCURRENCY, a_directory=DEFAULT_DIRECTORY):
+		"""
+			Initialize
+		"""
+		assert a_profile in self.PROFILES, 'a_profile in {}:{}'.format(self.PROFILES, a_profile)
+		assert a_timeout > 0, 'a_timeout > 0:{}'.format(a_timeout)
+		assert a_concurrency > 0, 'a_concurrency > 0:{}'.format(a_concurrency)
+		self._logger = SitLogger().new_logger(__name__)
+		self._host = a_host
+		self._port = int(a_port)
+		self._profile = a_profile
+		self._timeout = a_timeout
+		self._concurrency = a_concurrency
+		self._directory = a_directory
+		self._probe_sit_modbus_registers, self._identification_sit_modbus_registers = self.profile_sit_modbus_registers(a_profile)
+		self._read_planner = SitModbusReadPlanner()
+
+		self.invariants()
+
+	@classmethod
+	def profile_sit_modbus_registers(cls, a_profile):
+		"""
+		Returns (probe registers, identification registers) of given profile, for slave MIN_UNIT_ID
+			the probe registers have to hold 'DeviceClass' or 'SunS', the identification ones 'SN' and optionally 'Md'
+		"""
+		if a_profile == cls.PROFILE_SMA:
+			return ([RegisterTypeSmaCCDeviceClass('DeviceClass', 'Device Class', 30051, cls.MIN_UNIT_ID, SitModbusRegister.ACCESS_MODE_R, 'Enum', an_is_metadata=True)],
+					[RegisterTypeInt32u(SitConstants.SS_REG_SHORT_ABB_SERIAL_NUMBER, 'Serial number', 30005, cls.MIN_UNIT_ID, SitModbusRegister.ACCESS_MODE_R, 'Int32u', an_is_metadata=True)])
+
+		return ([RegisterTypeInt32u('SunS', 'SunSpec identifier', 40000, cls.MIN_UNIT_ID, SitModbusRegister.ACCESS_MODE_R, 'Int32u', an_is_metadata=True)],
+				[RegisterTypeString16(SitConstants.SS_REG_SHORT_ABB_MODEL, 'Model', 40020, cls.MIN_UNIT_ID, SitModbusRegister.ACCESS_MODE_R, 'String16', an_is_metadata=True),
+				RegisterTypeString16(SitConstants.SS_REG_SHORT_ABB_SERIAL_NUMBER, 'Serial number', 40052, cls.MIN_UNIT_ID, SitModbusRegister.ACCESS_MODE_R, 'String16', an_is_metadata=True)])
+
+# SCAN
+
+	def scan(self, some_unit_ids=None):
+		"""
+		Blocking scan_units, writes the result into file_path() and returns it
+		"""
+		l_start = time.monotonic()
+		l_res = asyncio.run(self.scan_units(some_unit_ids))
+		self._logger.info('scan-> {}:{} {} unit(s) found in {:.3f}s'.format(self._host, self._port, len(l_res), time.monotonic() - l_start))
+		self.save(l_res)
+
+		return l_res
+
+	async def scan_units(self, some_unit_ids=None):
+		"""
+		Returns the list of SitModbusScannedUnit answering among given unit ids (MIN_UNIT_ID..MAX_UNIT_ID by default)
+			ordered by unit id, self._concurrency probes being outstanding on one connection
+		"""
+		if some_unit_ids is None:
+			some_unit_ids = range(self.MIN_UNIT_ID, self.MAX_UNIT_ID + 1)
+		l_client = SitModbusAsyncTcpClient(self._host, self._port, self._timeout)
+		await l_client.connect()
+		l_semaphore = asyncio.Semaphore(self._concurrency)
+		try:
+			l_res = await asyncio.gather(*[self.probe_unit(l_client, l_semaphore, l_unit_id) for l_unit_id in some_unit_ids])
+		finally:
+			await l_client.close()
+
+		return [l_scanned_unit for l_scanned_unit in l_res if l_scanned_unit is not None]
+
+	async def probe_unit(self, a_client, a_semaphore, a_unit_id):
+		"""
+		Returns the SitModbusScannedUnit of given unit id, None if it does not answer the probe registers
+			a unit answering with an exception which is not a gateway one exists, without device class
+		"""
+		l_probe_regs = [l_sit_reg.new_for_slave(a_unit_id) for l_sit_reg in self._probe_sit_modbus_registers]
+		async with a_semaphore:
+			try:
+				await self.read_sit_modbus_registers(a_client, l_probe_regs)
+			except SitModbusExceptionResponseError as l_e:
+				if l_e.is_gateway_error():
+					return None
+				self._logger.debug('probe_unit-> unit:{} answers without profile {}, msg:{}'.format(a_unit_id, self._profile, l_e))
+				return SitModbusScannedUnit(a_unit_id, None, None)
+			except ModbusException:
+				return None # no answer in time
+			l_values = {l_sit_reg.short_description: l_sit_reg.value for l_sit_reg in l_probe_regs}
+			if self._profile == self.PROFILE_SUNSPEC and l_values['SunS'] != self.SUNSPEC_MARKER:
+				return SitModbusScannedUnit(a_unit_id, None, None)
+			l_ident_regs = [l_sit_reg.new_for_slave(a_unit_id) for l_sit_reg in self._identification_sit_modbus_registers]
+			try:
+				await self.read_sit_modbus_registers(a_client, l_ident_regs)
+				l_values.update((l_sit_reg.short_description, l_sit_reg.value) for l_sit_reg in l_ident_regs)
+			except ModbusException as l_e:
+				self._logger.warning('probe_unit-> unit:{} identification not read, msg:{}'.format(a_unit_id, l_e))
+
+		return SitModbusScannedUnit(a_unit_id, l_values.get('DeviceClass', l_values.get(SitConstants.SS_REG_SHORT_ABB_MODEL)), l_values.get(SitConstants.SS_REG_SHORT_ABB_SERIAL_NUMBER))
+
+	async def read_sit_modbus_registers(self, a_client, some_sit_modbus_registers):
+		"""
+		Reads given registers of one slave with one request per planned block and sets their values
+			raises SitModbusExceptionResponseError on exception response, ModbusException on timeout or lost connection
+		"""
+		for l_read_block in self._read_planner.read_blocks(some_sit_modbus_registers):
+			try:
+				l_result = await a_client.read_holding_registers(l_read_block.register_index, l_read_block.words_count, unit=l_read_block.slave_address)
+			except ConnectionException as l_e:
+				await a_client.ensure_connected() # some gateways close the connection on unknown unit ids
+				raise l_e
+			if isinstance(l_result, ExceptionResponse):
+				raise SitModbusExceptionResponseError(l_result.exception_code, l_read_block.register_index, l_read_block.slave_address)
+			if not hasattr(l_result, 'registers') or len(l_result.registers) != l_read_block.words_count:
+				raise ModbusException('read_sit_modbus_registers-> invalid response unit:{} block:{}'.format(l_read_block.slave_address, l_read_block.out_short()))
+			l_block_decoder = SitModbusBlockDecoder(l_read_block)
+			for l_sit_reg, l_unpacked, l_is_sentinel in l_block_decoder.unpacked_values(l_result.registers):
+				self.set_value_with_unpacked(l_sit_reg, l_unpacked, l_is_sentinel)
+			for l_sit_reg in l_block_decoder.fallback_sit_modbus_registers:
+				l_offset = l_read_block.register_offset(l_sit_reg)
+				l_sit_reg.set_value_with_raw(ReadHoldingRegistersResponse(l_result.registers[l_offset:l_offset + l_sit_reg.words_count]))
+
+	def set_value_with_unpacked(self, a_sit_modbus_register, an_unpacked, an_is_sentinel):
+		"""
+		Sets value of given register, the unpacked value itself if the register type can not name it (unknown device class i.e.)
+		"""
+		if an_is_sentinel:
+			a_sit_modbus_register.value = None
+			return
+		try:
+			a_sit_modbus_register.set_value_with_unpacked(an_unpacked)
+		except Exception as l_e:
+			self._logger.warning('set_value_with_unpacked-> keeping unpacked value {} of {}, msg:{}'.format(an_unpacked, a_sit_modbus_register.out_short(), l_e))
+			a_sit_modbus_register.value = an_unpacked
+
+# FILE
+
+	def save(self, some_scanned_units):
+		"""
+		Writes given scan result into file_path()
+		"""
+		try:
+			os.makedirs(self._directory)
+		except OSError as l_e:
+			if l_e.errno != errno.EEXIST:
+				self._logger.error('save-> Error: {}'.format(l_e))
+				raise l_e
+		l_data = {
+				'host': self._host,
+				'port': self._port,
+				'profile': self._profile,
+				'scan_time': time.time(),
+				'units': [l_scanned_unit._asdict() for l_scanned_unit in some_scanned_units]
+			}
+		l_tmp_file_path = self.file_path() + '.tmp'
+		with open(l_tmp_file_path, 'w') as l_file:
+			json.dump(l_data, l_file, indent=2, sort_keys=True)
+		os.replace(l_tmp_file_path, self.file_path())
+
+	@classmethod
+	def cached_units(cls, a_host, a_port, a_profile=None, a_directory=DEFAULT_DIRECTORY):
+		"""
+		Returns the list of SitModbusScannedUnit of the last scan of given gateway, None if it was never scanned
+			or if a_profile is given and the scan was done with another one
+		"""
+		l_file_path = cls.cache_file_path(a_host, a_port, a_directory)
+		if not os.path.isfile(l_file_path):
+			return None
+		with open(l_file_path, 'r') as l_file:
+			l_data = json.load(l_file)
+		if a_profile is not None and l_data.get('profile') != a_profile:
+			return None
+
+		return [SitModbusScannedUnit(**l_unit) for l_unit in l_data['units']]
+
+	@classmethod
+	def cached_unit_ids(cls, a_host, a_port, a_profile, some_excluded_unit_ids=(), a_directory=DEFAULT_DIRECTORY):
+		"""
+		Returns the unit ids with a device class of the last scan of given gateway with a_profile, without given ones,
+			None if it was not scanned with a_profile
+			units answering without the registers of the profile (no device class) are not returned
+			i.e. default slave addresses of drivers without --slave_address
+		"""
+		assert a_profile in cls.PROFILES, 'a_profile in {}:{}'.format(cls.PROFILES, a_profile)
+		l_scanned_units = cls.cached_units(a_host, a_port, a_profile, a_directory)
+		if l_scanned_units is None:
+			return None
+
+		return [l_scanned_unit.unit_id for l_scanned_unit in l_scanned_units if l_scanned_unit.device_class is not None and l_scanned_unit.unit_id not in some_excluded_unit_ids]
+
+# INVARIANTS
+
+	def invariants(self):
+		assert self._host, 'host not empty'
+		assert self._profile in self.PROFILES, 'valid profile'
+		assert len(self._probe_sit_modbus_registers) > 0, 'probe registers not empty'
+
+#################### END CLASS ######################
+
+def main():
+	"""
+	Main method
+	"""
+	logger = logging.getLogger(__name__)
+	l_parser = argparse.ArgumentParser(description=SitModbusUnitScanner.PARSER_DESCRIPTION)
+	l_parser.add_argument('-p', '--port', help='Modbus TCP port of the gateway', type=int, default=SitModbusUnitScanner.DEFAULT_PORT)
+	l_parser.add_argument('--profile', help='Registers probed, one of {}'.format(SitModbusUnitScanner.PROFILES), choices=SitModbusUnitScanner.PROFILES, default=SitModbusUnitScanner.PROFILE_SMA)
+	l_parser.add_argument('--units', help='Unit ids probed i.e. 3-40,125', default='{}-{}'.format(SitModbusUnitScanner.MIN_UNIT_ID, SitModbusUnitScanner.MAX_UNIT_ID))
+	l_parser.add_argument('--timeout', help='Seconds a unit has to answer', type=float, default=SitModbusUnitScanner.DEFAULT_TIMEOUT)
+	l_parser.add_argument('--concurrency', help='Probes outstanding on the connection', type=int, default=SitModbusUnitScanner.DEFAULT_CONCURRENCY)
+	l_parser.add_argument('--directory', help='Directory of the cache files', default=SitModbusUnitScanner.DEFAULT_DIRECTORY)
+	l_required_named = l_parser.add_argument_group('required named arguments')
+	l_required_named.add_argument('-i', '--host_ip', help='Gateway IP', nargs='?', required=True)
+	l_args = l_parser.parse_args()
+
+	l_scanner = SitModbusUnitScanner(l_args.host_ip, l_args.port, l_args.profile, l_args.timeout, l_args.concurrency, l_args.directory)
+	try:
+		l_scanned_units = l_scanner.scan(SitUtils.args_to_list(l_args.units))
+		for l_scanned_unit in l_scanned_units:
+			print('unit:{} device_class:{} serial_number:{}'.format(l_scanned_unit.unit_id, l_scanned_unit.device_class, l_scanned_unit.serial_number))
+		print('{} unit(s) written into {}'.format(len(l_scanned_units), l_scanner.file_path()))
+	except KeyboardInterrupt:
+		logger.exception("Keyboard interruption")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Raised when registers read back after write_sit_modbus_register_values differ from the written ones
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+
+# INCLUDES
+try:
+	from pymodbus.exceptions import ModbusException
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitModbusWriteVerificationError(ModbusException):
+
+# VARIABLES
+	_mismatches = None
+
+# SETTERS AND GETTERS
+
+	@property
+	def mismatches(self):
+		"""
+		List of (register, written words, read words) of the registers which differ
+		"""
+		return self._mismatches
+
+# INITIALIZE
+
+	def __init__(self, some_mismatches):
+		"""
+			Initialize
+		"""
+		self._mismatches = some_mismatches
+		super().__init__('read back differs from written for {} register(s):{}'.format(len(some_mismatches), ', '.join('slave:{} {} written:{} read:{}'.format(l_reg.slave_address, l_reg.short_description, l_written, l_read) for l_reg, l_written, l_read in some_mismatches)))
+
+#################### END CLASS ######################
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Polls a whole site in one process, one worker thread and one persistent connection
+#			per gateway (ip, port), read registers snapshots of every device are put into one shared sink queue
+#			so that a cycle lasts as long as the slowest gateway.
+#
+#       CALL SAMPLE:
+#			python3 lib/sit_site_poller.py -m b8:27:eb:00:00:01 -f /etc/opt/solarity/site_poller.json -s --interval 60
+#			with site_poller.json:
+#				{"targets": [
+#					{"driver": "sma/inverter_manager.py", "class": "InverterManager", "host_ip": "192.168.0.10", "slave_address": "3-10"},
+#					{"driver": "huawei/smart_logger_1000a_inverter.py", "class": "SmartLogger1000aInverter", "host_ip": "192.168.0.20", "script_arguments": ["-x", "1-6"]}
+#				]}
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import logging # http://www.onlamp.com/pub/a/python/2005/06/02/logging.html
+	import argparse
+	import importlib.util
+	import json
+	import queue
+	import threading
+	import time
+	from collections import OrderedDict, namedtuple
+	from concurrent.futures import ThreadPoolExecutor
+	from datetime import datetime
+	from pymodbus.exceptions import ModbusException, ConnectionException
+	from sit_logger import SitLogger
+	from sit_constants import SitConstants
+	from sit_modbus_device import SitModbusDevice
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+# Item of the sink queue, sit_modbus_registers is an OrderedDict of copies of the read registers
+SitModbusPollResult = namedtuple('SitModbusPollResult', ['sit_modbus_device', 'slave_address', 'timestamp', 'sit_modbus_registers'])
+
+class SitSitePoller(object):
+
+# CONSTANTS
+	DEFAULT_INTERVAL = 60 # seconds between the start of two cycles
+	REPO_ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..') # drivers paths of site configuration are relative to it
+	PARSER_DESCRIPTION = 'Polls all modbus devices of a site. ' + SitConstants.DEFAULT_HELP_LICENSE_NOTICE
+
+# VARIABLES
+	_logger = None
+	_gateways = None # OrderedDict (ip, port) => list of SitModbusDevice, the first one owns the connection
+	_sink_queue = None # queue.Queue of SitModbusPollResult
+	_executor = None
+	_is_raise_event = False
+
+# SETTERS AND GETTERS
+
+	@property
+	def gateways(self):
+		return self._gateways
+
+	@property
+	def sink_queue(self):
+		return self._sink_queue
+
+# INITIALIZE
+
+	def __init__(self, some_sit_modbus_devices, a_sink_queue=None, an_is_raise_event=False):
+		"""
+			Initialize
+			@param some_sit_modbus_devices: tcp devices, grouped by gateway
+			@param a_sink_queue: queue.Queue receiving a SitModbusPollResult per read slave, created if None
+			@param an_is_raise_event: calls registers events of devices after each read
+		"""
+		assert len(some_sit_modbus_devices) > 0, 'some_sit_modbus_devices not empty'
+		self._logger = SitLogger().new_logger(__name__)
+		self._gateways = OrderedDict()
+		for l_device in some_sit_modbus_devices:
+			assert isinstance(l_device, SitModbusDevice), 'l_device is a SitModbusDevice but {}'.format(l_device.__class__.__name__)
+			assert l_device.target_mode == SitModbusDevice.TARGET_MODE_TCP, 'only tcp devices are polled by gateway'
+			self._gateways.setdefault((l_device.target_ip, str(l_device.target_port)), []).append(l_device)
+		if a_sink_queue is None:
+			a_sink_queue = queue.Queue()
+		self._sink_queue = a_sink_queue
+		self._is_raise_event = an_is_raise_event
+		self._executor = ThreadPoolExecutor(max_workers=len(self._gateways), thread_name_prefix='gateway')
+
+		self.invariants()
+
+	@classmethod
+	def new_with_targets(cls, some_targets, a_host_mac, a_sink_queue=None, an_is_raise_event=False):
+		"""
+		Returns a new poller, devices being created from given targets
+		@param some_targets: list of (driver class, ip, unit ids as in --slave_address or None[, list of other script arguments])
+		"""
+		l_devices = []
+		for l_target in some_targets:
+			l_driver_class, l_ip, l_slave_address = l_target[0:3]
+			l_script_arguments = ['-i', l_ip, '-m', a_host_mac]
+			if l_slave_address is not None:
+				l_script_arguments += ['-c', l_slave_address]
+			if len(l_target) > 3:
+				l_script_arguments += l_target[3]
+			l_devices.append(l_driver_class.new_with_script_arguments(l_script_arguments))
+
+		return cls(l_devices, a_sink_queue, an_is_raise_event)
+
+# POLLING
+
+	def poll_cycle(self):
+		"""
+		Polls all gateways concurrently, returns when the slowest is done
+			returns the count of SitModbusPollResult put into sink queue
+		"""
+		l_start = time.monotonic()
+		l_futures = [self._executor.submit(self._poll_gateway, l_gateway_key) for l_gateway_key in self._gateways.keys()]
+		l_res = sum(l_future.result() for l_future in l_futures)
+		self._logger.info('poll_cycle-> {} result(s) from {} gateway(s) in {:.3f}s'.format(l_res, len(self._gateways), time.monotonic() - l_start))
+
+		return l_res
+
+	def _poll_gateway(self, a_gateway_key):
+		"""
+		Polls all devices of given gateway with the connection of its first device, on a worker thread
+			an error of a device is logged and the next device is polled, a lost connection is closed
+			and opened again for the next device, the gateway is left for this cycle if it can not be connected
+			returns the count of SitModbusPollResult put into sink queue
+		"""
+		l_res = 0
+		l_devices = self._gateways[a_gateway_key]
+		l_connection_device = l_devices[0]
+		for l_device in l_devices:
+			if not l_connection_device.is_connected():
+				try:
+					l_connection_device.connect()
+				except Exception as l_e:
+					self._logger.exception('_poll_gateway-> gateway:{} Exception connecting:{}'.format(a_gateway_key, l_e))
+				if not l_connection_device.is_connected():
+					self._logger.error('_poll_gateway-> gateway:{} could not connect, {} device(s) not polled'.format(a_gateway_key, len(l_devices) - l_devices.index(l_device)))
+					break
+			try:
+				if l_device is not l_connection_device:
+					l_device.share_modbus_client(l_connection_device)
+				for l_slave in l_device.poll_sit_modbus_registers():
+					self._sink_queue.put(SitModbusPollResult(l_device, l_slave, datetime.utcnow(), l_device.sit_modbus_registers_snapshot()))
+					l_res += 1
+					if self._is_raise_event:
+						l_device.call_sit_modbus_registers_events()
+			except ConnectionException as l_e:
+				self._logger.error('_poll_gateway-> gateway:{} device:{} disconnecting, msg:{}'.format(a_gateway_key, l_device.__class__.__name__, l_e))
+				self._disconnect_gateway(a_gateway_key)
+			except ModbusException as l_e:
+				self._logger.error('_poll_gateway-> gateway:{} device:{} msg:{}'.format(a_gateway_key, l_device.__class__.__name__, l_e))
+			except Exception as l_e:
+				self._logger.exception('_poll_gateway-> gateway:{} device:{} Exception:{}'.format(a_gateway_key, l_device.__class__.__name__, l_e))
+
+		return l_res
+
+	def run(self, an_interval=DEFAULT_INTERVAL, a_cycles_count=None):
+		"""
+		Runs poll_cycle every an_interval seconds, a_cycles_count times or forever if None
+		"""
+		assert an_interval > 0, 'an_interval > 0:{}'.format(an_interval)
+		l_cycle = 0
+		l_next_start = time.monotonic()
+		while a_cycles_count is None or l_cycle < a_cycles_count:
+			self.poll_cycle()
+			l_cycle += 1
+			l_next_start += an_interval
+			l_sleep = l_next_start - time.monotonic()
+			if l_sleep > 0:
+				time.sleep(l_sleep)
+			else:
+				self._logger.warning('run-> cycle lasted more than interval {}s'.format(an_interval))
+				l_next_start = time.monotonic()
+
+# CONNECTION
+
+	def _disconnect_gateway(self, a_gateway_key):
+		l_connection_device = self._gateways[a_gateway_key][0]
+		try:
+			if l_connection_device.is_connected():
+				l_connection_device.disconnect()
+		except Exception as l_e:
+			self._logger.error('_disconnect_gateway-> gateway:{} msg:{}'.format(a_gateway_key, l_e))
+			l_connection_device.reset_connection()
+
+	def close(self):
+		"""
+		Disconnects all gateways and stops worker threads
+		"""
+		for l_gateway_key in self._gateways.keys():
+			self._disconnect_gateway(l_gateway_key)
+		self._executor.shutdown(wait=True)
+
+# SITE CONFIGURATION
+
+	@classmethod
+	def targets_from_site_conf(cls, a_site_conf_file_path):
+		"""
+		Returns targets for new_with_targets from given json file, see CALL SAMPLE
+		"""
+		with open(a_site_conf_file_path, 'r') as l_file:
+			l_site_conf = json.load(l_file)
+		l_res = []
+		for l_target_conf in l_site_conf['targets']:
+			l_driver_class = cls.driver_class(l_target_conf['driver'], l_target_conf['class'])
+			l_res.append((l_driver_class, l_target_conf['host_ip'], l_target_conf.get('slave_address'), l_target_conf.get('script_arguments', [])))
+
+		return l_res
+
+	@classmethod
+	def driver_class(cls, a_driver_file_path, a_class_name):
+		"""
+		Returns the class named a_class_name of given driver file (relative to REPO_ROOT_DIR), drivers file names are not always importable
+		"""
+		l_file_path = os.path.join(cls.REPO_ROOT_DIR, a_driver_file_path)
+		l_module_name = os.path.splitext(os.path.basename(l_file_path))[0]
+		if l_module_name not in sys.modules:
+			sys.path.append(os.path.dirname(l_file_path)) # drivers import their neighbours i.e. from cluster_controller import ClusterController
+			l_spec = importlib.util.spec_from_file_location(l_module_name, l_file_path)
+			l_module = importlib.util.module_from_spec(l_spec)
+			sys.modules[l_module_name] = l_module
+			l_spec.loader.exec_module(l_module)
+		l_res = getattr(sys.modules[l_module_name], a_class_name)
+		assert issubclass(l_res, SitModbusDevice), '{} is a SitModbusDevice'.format(a_class_name)
+
+		return l_res
+
+# INVARIANTS
+
+	def invariants(self):
+		assert len(self._gateways) > 0, 'gateways not empty'
+		assert self._sink_queue is not None, 'sink_queue not None'
+
+#################### END CLASS ######################
+
+def sink_loop(a_sink_queue, an_is_store_values, an_is_display_all):
+	"""
+	Consumes SitModbusPollResult of the queue until None is received
+	"""
+	while True:
+		l_result = a_sink_queue.get()
+		if l_result is None:
+			break
+		if an_is_store_values:
+			l_result.sit_modbus_device.store_values_into_csv(l_result.sit_modbus_registers, l_result.slave_address)
+		if an_is_display_all:
+			print('{} {} slave:{}'.format(l_result.timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'), l_result.sit_modbus_device.__class__.__name__, l_result.slave_address))
+			for l_sit_reg in l_result.sit_modbus_registers.values():
+				print(l_sit_reg.out_human_readable('\t'))
+
+def main():
+	"""
+	Main method
+	"""
+	logger = logging.getLogger(__name__)
+	l_parser = argparse.ArgumentParser(description=SitSitePoller.PARSER_DESCRIPTION)
+	l_parser.add_argument('-s', '--store_values', help='Stores values into csv files located into ' + SitModbusDevice.DEFAULT_CSV_FILE_LOCATION, action="store_true")
+	l_parser.add_argument('-a', '--display_all', help='Displays all register after reading them', action='store_true')
+	l_parser.add_argument('-e', '--raise_event', help='Raises the corresponding events', action="store_true")
+	l_parser.add_argument('--interval', help='Seconds between two cycles', type=float, default=SitSitePoller.DEFAULT_INTERVAL)
+	l_parser.add_argument('--cycles', help='Cycles count, forever if not given', type=int)
+	l_required_named = l_parser.add_argument_group('required named arguments')
+	l_required_named.add_argument('-m', '--host_mac', help='Host MAC', nargs='?', required=True)
+	l_required_named.add_argument('-f', '--site_conf', help='Json site configuration file', nargs='?', required=True)
+	l_args = l_parser.parse_args()
+
+	l_poller = SitSitePoller.new_with_targets(SitSitePoller.targets_from_site_conf(l_args.site_conf), l_args.host_mac, an_is_raise_event=l_args.raise_event)
+	l_sink_thread = threading.Thread(target=sink_loop, args=(l_poller.sink_queue, l_args.store_values, l_args.display_all), name='sink')
+	l_sink_thread.start()
+	try:
+		l_poller.run(l_args.interval, l_args.cycles)
+	except KeyboardInterrupt:
+		logger.exception("Keyboard interruption")
+	finally:
+		l_poller.close()
+		l_poller.sink_queue.put(None)
+		l_sink_thread.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Registry of registers a device does not support (exception response or only
+#			sentinel values), keyed by device model and serial number and persisted as json under
+#			DEFAULT_DIRECTORY, see sit_modbus_device.read_all_sit_modbus_registers
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+try:
+	import sys
+	import os.path
+	import os, errno
+	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+	import re
+	import time
+	import json
+	from sit_logger import SitLogger
+	from sit_modbus_register import SitModbusRegister
+except ImportError as l_err:
+	print("ImportError: {0}".format(l_err))
+	raise l_err
+
+class SitUnsupportedRegisterRegistry(object):
+
+# CONSTANTS
+	DEFAULT_DIRECTORY = '/var/solarity/unsupported_registers' #without ending slash
+	DEFAULT_REPROBE_INTERVAL = 24 * 3600 # seconds before a skipped register is read again
+	SENTINEL_DURATION_TO_SKIP = 2 * 24 * 3600 # seconds of sentinel only reads before skipping, a power register is NaN every night
+
+# VARIABLES
+	_logger = None
+	_device_key = None
+	_directory = DEFAULT_DIRECTORY
+	_reprobe_interval = DEFAULT_REPROBE_INTERVAL
+	_entries = None # dict 'slave_address:register_index' => dict
+	_is_dirty = False
+
+# SETTERS AND GETTERS
+
+	@property
+	def device_key(self):
+		return self._device_key
+
+	@property
+	def entries(self):
+		return self._entries
+
+	def file_path(self):
+		return os.path.join(self._directory, self._device_key + '.json')
+
+# INITIALIZE
+
+	def __init__(self, a_device_key, a_directory=DEFAULT_DIRECTORY, a_reprobe_interval=DEFAULT_REPROBE_INTERVAL):
+		"""
+			Initialize and loads file_path() if it exists
+			@param a_device_key: see device_key_from_values
+		"""
+		assert a_device_key, 'a_device_key not empty'
+		assert a_reprobe_interval > 0, 'a_reprobe_interval > 0:{}'.format(a_reprobe_interval)
+		self._logger = SitLogger().new_logger(__name__)
+		self._device_key = a_device_key
+		self._directory = a_directory
+		self._reprobe_interval = a_reprobe_interval
+		self._entries = {}
+		self.load()
+
+		self.invariants()
+
+	@staticmethod
+	def device_key_from_values(*some_values):
+		"""
+		Returns a string usable as file name from given values (i.e. model and serial number)
+		"""
+		l_res = '_'.join(str(l_val).strip() for l_val in some_values if l_val is not None and str(l_val).strip() != '')
+		l_res = re.sub('[^A-Za-z0-9.-]+', '-', l_res)
+
+		return l_res
+
+# STATUS REPORT
+
+	def entry_key(self, a_sit_modbus_register):
+		return '{}:{}'.format(a_sit_modbus_register.slave_address, a_sit_modbus_register.register_index)
+
+	def is_skipped(self, a_sit_modbus_register, a_time=None):
+		"""
+		True if given register is known as unsupported and its reprobe time is not reached
+		"""
+		l_entry = self._entries.get(self.entry_key(a_sit_modbus_register))
+		if l_entry is None or not l_entry['skipped']:
+			return False
+		if a_time is None:
+			a_time = time.time()
+
+		return a_time - l_entry['last_probe'] < self._reprobe_interval
+
+	def skipped_registers(self, some_sit_modbus_registers, a_time=None):
+		"""
+		Returns the list of given registers which are skipped
+		"""
+		return [l_reg for l_reg in some_sit_modbus_registers if self.is_skipped(l_reg, a_time)]
+
+# STATUS SETTING
+
+	def record_exception(self, a_sit_modbus_register, an_exception_code):
+		"""
+		Device answered an exception response for given register, skips it until reprobe
+		"""
+		l_entry = self._entry_for(a_sit_modbus_register)
+		if not l_entry['skipped']:
+			self._logger.warning('record_exception-> skipping register until reprobe, device:{} exception_code:{} register:{}'.format(self._device_key, an_exception_code, a_sit_modbus_register.out_short()))
+		l_entry['exception_code'] = an_exception_code
+		l_entry['skipped'] = True
+		l_entry['last_probe'] = time.time()
+		self._is_dirty = True
+
+	def record_sentinel(self, a_sit_modbus_register):
+		"""
+		Register was read with its sentinel (not available) value, skipped once it answered
+			nothing else during SENTINEL_DURATION_TO_SKIP
+		"""
+		l_entry = self._entry_for(a_sit_modbus_register)
+		l_now = time.time()
+		if l_entry['first_sentinel'] is None:
+			l_entry['first_sentinel'] = l_now
+			self._is_dirty = True
+		if not l_entry['skipped'] and l_now - l_entry['first_sentinel'] >= self.SENTINEL_DURATION_TO_SKIP:
+			self._logger.warning('record_sentinel-> skipping register until reprobe, device:{} register:{}'.format(self._device_key, a_sit_modbus_register.out_short()))
+			l_entry['skipped'] = True
+		l_entry['last_probe'] = l_now
+		if l_entry['skipped']:
+			self._is_dirty = True # only state changes are written (limits writes on sd cards)
+
+	def record_supported(self, a_sit_modbus_register):
+		"""
+		Register was read with a real value, forgets it if known
+		"""
+		l_key = self.entry_key(a_sit_modbus_register)
+		if l_key in self._entries:
+			self._logger.info('record_supported-> register answers again, device:{} register:{}'.format(self._device_key, a_sit_modbus_register.out_short()))
+			del self._entries[l_key]
+			self._is_dirty = True
+
+	def _entry_for(self, a_sit_modbus_register):
+		"""
+		Returns entry of given register, creating it if necessary
+		"""
+		assert isinstance(a_sit_modbus_register, SitModbusRegister), 'a_sit_modbus_register is a SitModbusRegister'
+		return self._entries.setdefault(self.entry_key(a_sit_modbus_register), {
+				'short_description': a_sit_modbus_register.short_description,
+				'exception_code': None,
+				'first_sentinel': None,
+				'skipped': False,
+				'last_probe': None
+			})
+
+# FILE
+
+	def load(self):
+		"""
+		Reads file_path() into self._entries, an unreadable file is ignored (registers will be probed again)
+		"""
+		l_file_path = self.file_path()
+		if not os.path.isfile(l_file_path):
+			return
+		try:
+			with open(l_file_path, 'r') as l_file:
+				self._entries = json.load(l_file)
+			self._logger.debug('load-> {} entries from {}'.format(len(self._entries), l_file_path))
+		except ValueError as l_e:
+			self._logger.error('load-> ignoring invalid file {}, msg:{}'.format(l_file_path, l_e))
+			self._entries = {}
+		self._is_dirty = False
+
+	def save(self):
+		"""
+		Writes self._entries into file_path() if changed since load
+		"""
+		if not self._is_dirty:
+			return
+		try:
+			os.makedirs(self._directory)
+		except OSError as l_e:
+			if l_e.errno != errno.EEXIST:
+				self._logger.error('save-> Error: {}'.format(l_e))
+				raise l_e
+		l_tmp_file_path = self.file_path() + '.tmp'
+		with open(l_tmp_file_path, 'w') as l_file:
+			json.dump(self._entries, l_file, indent=2, sort_keys=True)
+		os.replace(l_tmp_file_path, self.file_path())
+		self._is_dirty = False
+
+# INVARIANTS
+
+	def invariants(self):
+		assert self._device_key, 'device_key not empty'
+		assert isinstance(self._entries, dict), 'entries is a dict'
+
+#################### END CLASS ######################
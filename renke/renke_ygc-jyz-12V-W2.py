@@ -74,12 +74,6 @@ try:
 	from sit_modbus_device import SitModbusDevice #from file_name import ClassName
 	from sit_modbus_register import SitModbusRegister
 	from sit_modbus_register_event import SitModbusRegisterEvent
-	from register_type_int16_u import RegisterTypeInt16u
-	from register_type_int16_s import RegisterTypeInt16s
-	from register_type_int32_u import RegisterTypeInt32u
-	from register_type_int32_s import RegisterTypeInt32s
-	from register_type_int64_u import RegisterTypeInt64u
-	from register_type_sma_cc_device_class import RegisterTypeSmaCCDeviceClass
 	from sit_date_time import SitDateTime
 	from sit_json_conf import SitJsonConf
 	from sit_utils import SitUtils
@@ -96,6 +90,7 @@ class RenkeYgcJyz12VW2(SitModbusDevice):
 	DEFAULT_SLAVE_ADDRESS = 1
 	DEFAULT_MODBUS_PORT = '/dev/ttyUSB0'
 	DEFAULT_TARGET_MODE = SitModbusDevice.TARGET_MODE_RTU
+	REGISTER_MAP_FILE_PATH = os.path.join(os.path.dirname(__file__), 'register_maps', 'renke_ygc-jyz-12V-W2.json')
 	PARSER_DESCRIPTION = 'Actions with renke_ygc-jyz-12V-W2 from ali irradiance sensor' + SitConstants.DEFAULT_HELP_LICENSE_NOTICE
 
 # CLASS ATTRIBUTES
@@ -145,13 +140,7 @@ class RenkeYgcJyz12VW2(SitModbusDevice):
 		"""
 		assert self.valid_slave_address(a_slave_address), 'invalid a_slave_address:{}'.format(a_slave_address)
 
-		l_reg_list = OrderedDict()
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16u('GHI', 'Total irradiation on the external irradiation sensor/pyranometer (W/m2)', 0x00, a_slave_address, SitModbusRegister.ACCESS_MODE_R, 'Int16u', an_is_metadata=False))
-		#SitUtils.od_extend(l_reg_list, RegisterTypeInt16u('GHIDev', 'Solar radiation deviation (0~1800)', 0x52, a_slave_address, SitModbusRegister.ACCESS_MODE_R, 'Int16u', an_is_metadata=False))
-		#SitUtils.od_extend(l_reg_list, RegisterTypeInt32u('WDigIo', 'Active power setpoint Digital I/O', 31235, l_slave_address, SitModbusRegister.ACCESS_MODE_R, '%', an_is_metadata=False, a_post_set_value_call=self.sma_fix2))
-
-		self.append_modbus_registers(l_reg_list)
+		self.append_sit_modbus_registers_from_map(self.REGISTER_MAP_FILE_PATH, a_slave_address)
 
 #		self.add_cc_only_sit_modbus_registers(1)
 #		self.add_common_sit_modbus_registers(2)
@@ -235,18 +224,9 @@ class RenkeYgcJyz12VW2(SitModbusDevice):
 				self._logger.setLevel(logging.DEBUG)
 			else:
 				self._logger.setLevel(logging.INFO)
-			if self._args.store_values or self._args.display_all or self._args.raise_event:
+			if self._args.store_values or self._args.display_all or self._args.test or self._args.raise_event:
 				assert self.valid_slave_address(self._slave_address), 'Invalid slave address {}'.format(self._slave_address)
-				self.read_all_sit_modbus_registers()
-				if self._args.store_values:
-					self.store_values_into_csv(self._sit_modbus_registers, self._slave_address)
-				if self._args.display_all:
-					print(self.out_human_readable(a_with_description=self._args.long))
-				if self._args.raise_event:
-					assert len(self._sit_modbus_registers) > 0, 'modbus_registers_not_empty'
-					self.call_sit_modbus_registers_events()
-			if self._args.test:
-				self.test()
+				self.execute_cycles()
 #			if self._args.manual_restart:
 #				self.manual_restart()
 		except Exception as l_e:
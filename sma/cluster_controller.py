@@ -64,13 +64,9 @@ try:
 	from sit_logger import SitLogger
 	from sit_modbus_device import SitModbusDevice #from file_name import ClassName
 	from sit_modbus_register import SitModbusRegister
-	from sit_modbus_register_event import SitModbusRegisterEvent
 	from register_type_int16_u import RegisterTypeInt16u
-	from register_type_int16_s import RegisterTypeInt16s
 	from register_type_int32_u import RegisterTypeInt32u
-	from register_type_int32_s import RegisterTypeInt32s
 	from register_type_int64_u import RegisterTypeInt64u
-	from register_type_sma_cc_device_class import RegisterTypeSmaCCDeviceClass
 	from sit_date_time import SitDateTime
 	from sit_json_conf import SitJsonConf
 	from sit_utils import SitUtils
@@ -88,6 +84,8 @@ class ClusterController(SitModbusDevice):
 	DEFAULT_MODBUS_PORT = 502
 	DEFAULT_TARGET_MODE = SitModbusDevice.TARGET_MODE_TCP
 	MIN_W_FOR_RAISE_EVENT_GENERATION = 2000
+	COMMON_REGISTER_MAP_FILE_PATH = os.path.join(os.path.dirname(__file__), 'register_maps', 'cluster_controller_common.json')
+	CC_ONLY_REGISTER_MAP_FILE_PATH = os.path.join(os.path.dirname(__file__), 'register_maps', 'cluster_controller_cc_only.json')
 	PARSER_DESCRIPTION = 'Actions with sma cluster controller device. ' + SitConstants.DEFAULT_HELP_LICENSE_NOTICE
 
 # CLASS ATTRIBUTES
@@ -95,6 +93,10 @@ class ClusterController(SitModbusDevice):
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
 	_substract_one_to_register_index = False
+	_pipeline_window = SitModbusDevice.GATEWAY_PIPELINE_WINDOW # the gateway accepts several outstanding transactions
+	_curtailment_setpoint_short_description = 'WSetPointMan' # of slave 2, limits all inverters of the Cluster Controller
+	_curtailment_setpoint_value_per_percent = 100 # in 0.01%, no scale factor register, see sma_fix2
+	_data_sequence_short_description = 'NewData' # increased by the Cluster Controller when new data is available, see --change_gated
 
 # FUNCTIONS DEFINITION 
 
@@ -110,7 +112,7 @@ class ClusterController(SitModbusDevice):
 			if __name__ == '__main__':
 				if (hasattr(self._args, 'slave_address') and self._args.slave_address):
 					l_slave_address = self._args.slave_address
-			super().__init__(l_slave_address, self.DEFAULT_TARGET_MODE, a_port=self.DEFAULT_MODBUS_PORT, an_ip_address=self._args.host_ip) 
+			super().__init__(l_slave_address, self.DEFAULT_TARGET_MODE, a_port=a_port, an_ip_address=self._args.host_ip) 
 			self._logger = SitLogger().new_logger(self.__class__.__name__, self._args.host_mac)
 			self._init_sit_modbus_registers(l_slave_address)
 
@@ -132,6 +134,7 @@ class ClusterController(SitModbusDevice):
 		assert self.valid_slave_address(a_slave_address), 'invalid a_slave_address:{}'.format(a_slave_address)
 		self.add_common_sit_modbus_registers(1)
 		self.add_cc_only_sit_modbus_registers(2)
+		self.set_poll_period(self.DEFAULT_SLOW_POLL_PERIOD, ['Wh', 'TotWhDay'])
 
 		self.invariants()
 
@@ -143,23 +146,7 @@ class ClusterController(SitModbusDevice):
 		assert self.valid_slave_address(a_slave_address), 'invalid a_slave_address:{}'.format(a_slave_address)
 		assert a_slave_address == 1 or a_slave_address >= 3, 'Dont ask for slave_address 2, the add_cc_only_sit_modbus_registers is done for that! addr:{}'.format(a_slave_address)
 
-		l_reg_list = OrderedDict()
-		l_slave_address = a_slave_address
-
-		# CLUSTER AND INVERTERS
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32u('Vr', 'Version number of the SMA Modbus profile', 30001, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'Int32u', an_is_metadata=True))
-		
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32u('ID', 'SUSy ID (of the Cluster Controller)', 30003, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'Int32u', an_is_metadata=True))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32u('SN', 'Serial number (of the Cluster Controller)', 30005, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'Int32u', an_is_metadata=True))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('NewData', 'Modbus data change: meter value is increased by the Cluster Controller if new data is available.', 30007, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'Int32u', an_is_metadata=False))
-		SitUtils.od_extend(l_reg_list, RegisterTypeSmaCCDeviceClass('DeviceClass', 'Device Class', 30051, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'Enum', an_is_metadata=True))
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('W', 'Current active power on all line conductors (W), accumulated values of the inverters', 30775, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'W', an_is_metadata=False, an_event=SitModbusRegisterEvent(self._W_event)))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt64u('Wh', 'Total energy fed in across all line conductors, in Wh (accumulated values of the inverters) System param', 30513, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'Wh', an_is_metadata=False))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('VAr', 'Reactive power on all line conductors (var), accumulated values of the inverters', 30805, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'VAr', an_is_metadata=False))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt64u('TotWhDay', 'Energy fed in on current day across all line conductors, in Wh (accumulated values of the inverters)', 30517, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'Wh', an_is_metadata=False))
-
-		self.append_modbus_registers(l_reg_list)
+		self.append_sit_modbus_registers_from_map(self.COMMON_REGISTER_MAP_FILE_PATH, a_slave_address)
 
 	def add_cc_only_sit_modbus_registers(self, a_slave_address):
 		"""
@@ -168,36 +155,7 @@ class ClusterController(SitModbusDevice):
 		assert self.valid_slave_address(a_slave_address), 'invalid a_slave_address:{}'.format(a_slave_address)
 		assert a_slave_address == 2, 'add_cc_only_sit_modbus_registers->for this part slave_address should be =2 and is:{}'.format(a_slave_address)
 		
-		l_reg_list = OrderedDict()
-		l_slave_address = a_slave_address
-
-		#PARAMETERS UNIT_ID = 2 (p.26 of doc)
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32u('WDigIo', 'Active power setpoint Digital I/O', 31235, l_slave_address, SitModbusRegister.ACCESS_MODE_R, '%', an_is_metadata=False, a_post_set_value_call=self.sma_fix2))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32u('WAnalog', 'Active power setpoint Analog', 31237, l_slave_address, SitModbusRegister.ACCESS_MODE_R, '%', an_is_metadata=False, a_post_set_value_call=self.sma_fix2))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32u('WSetPoint', 'Active power setpoint in %s', 31239, l_slave_address, SitModbusRegister.ACCESS_MODE_R, '%', an_is_metadata=False, a_post_set_value_call=self.sma_fix2))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('WSetPointDirMar', 'Active power setpoint in %s Specification Modbus Direct marketing', 31241, l_slave_address, SitModbusRegister.ACCESS_MODE_R, '%', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32u('ResSetPoint', 'Resulting setpoint (minimum value definition of all specifications)', 31243, l_slave_address, SitModbusRegister.ACCESS_MODE_R, '%', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-		#Strange
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('WExport', 'Current utility grid export active power P in W (actual value of the active power fed in at the grid-connection point; measured with an external measuring device).', 31249, l_slave_address, SitModbusRegister.ACCESS_MODE_R, '%', an_is_metadata=False)) 
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('VArExport', 'Current utility grid export reactive power Q in VAr (actual value of the reactive power fed in at the grid- connection point; measured with an external measuring device).', 31251, l_slave_address, SitModbusRegister.ACCESS_MODE_R, '%', an_is_metadata=False)) 
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('AC_1', 'Analog current input 1 (mA)', 34637, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'mA', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('AC_2', 'Analog current input 2 (mA)', 34639, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'mA', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('AC_3', 'Analog current input 3 (mA)', 34641, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'mA', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('AC_4', 'Analog current input 4 (mA)', 34643, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'mA', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('InDCV_1', 'Analog voltage input 1 (V)', 34645, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'V', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('InDCV_2', 'Analog voltage input 2 (V)', 34647, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'V', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('InDCV_3', 'Analog voltage input 3 (V)', 34649, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'V', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32s('InDCV_4', 'Analog voltage input 4 (V)', 34651, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'V', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16s('WSetPointDirTotal', 'Direct marketer: Active power setpoint P, in % of the maximum active power (PMAX) of the PV plant. -100-0=Load|0=No active power|0-100 generator', 40493, l_slave_address, SitModbusRegister.ACCESS_MODE_R, '%', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32u('WSetPointMan', 'Active power setpoint (manual specification)', 41167, l_slave_address, SitModbusRegister.ACCESS_MODE_R, '%', an_is_metadata=False, a_post_set_value_call=self.sma_fix2)) 
-		# IRRADIATIONS
-		# not working on sanbe, getting max_int, SitUtils.od_extend(l_reg_list, RegisterTypeInt32u('IrradiationSurfaceTot', 'Total irradiation on the sensor surface (W/m2)', 34613, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'W/m2', an_is_metadata=False))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32u('GHI', 'Total irradiation on the external irradiation sensor/pyranometer (W/m2)', 34623, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'W/m2', an_is_metadata=False))
-
-		self.append_modbus_registers(l_reg_list)
+		self.append_sit_modbus_registers_from_map(self.CC_ONLY_REGISTER_MAP_FILE_PATH, a_slave_address)
 
 
 	def sma_fix2(self, a_sit_modbus_register):
@@ -336,16 +294,7 @@ class ClusterController(SitModbusDevice):
 				self._logger.setLevel(logging.INFO)
 			if self._args.store_values or self._args.display_all or self._args.test or self._args.raise_event:
 				assert self.valid_slave_address(self._slave_address), 'Invalid slave address {}'.format(self._slave_address)
-				self.read_all_sit_modbus_registers()
-				if self._args.store_values:
-					self.store_values_into_csv(self._sit_modbus_registers, self._slave_address)
-				if self._args.display_all:
-					print(self.out_human_readable(a_with_description=self._args.long))
-				if self._args.raise_event:
-					assert len(self._sit_modbus_registers) > 0, 'modbus_registers_not_empty'
-					self.call_sit_modbus_registers_events()
-				if self._args.test:
-					self.test()
+				self.execute_cycles()
 #			if self._args.manual_restart:
 #				self.manual_restart()
 		except Exception as l_e:
@@ -52,7 +52,6 @@ try:
 	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/register_types')) #the way to import directories
 	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/third_party/SunriseSunsetCalculator')) #the way to import directories
 	from pymodbus.constants import Endian
-	from pymodbus.exceptions import ModbusException
 	import logging # http://www.onlamp.com/pub/a/python/2005/06/02/logging.html
 	from logging import handlers
 	import argparse
@@ -64,6 +63,7 @@ try:
 	from sit_modbus_device import SitModbusDevice #from file_name import ClassName
 	from sit_modbus_register import SitModbusRegister
 	from sit_modbus_register_event import SitModbusRegisterEvent
+	from sit_modbus_unit_scanner import SitModbusUnitScanner
 	from cluster_controller import ClusterController
 	from register_type_int16_u import RegisterTypeInt16u
 	from register_type_int16_s import RegisterTypeInt16s
@@ -85,6 +85,7 @@ class ClusterControllerInverter(ClusterController):
 # CONSTANTS
 
 	DEFAULT_SLAVE_ADDRESS = 3
+	SCAN_EXCLUDED_UNIT_IDS = [1, 2] # units of the Cluster Controller itself, not inverters
 	MIN_W_FOR_RAISE_EVENT_GENERATION = 50
 	PARSER_DESCRIPTION = 'Actions with sma cluster controller inverter.  ' + SitConstants.DEFAULT_HELP_LICENSE_NOTICE
 
@@ -93,8 +94,10 @@ class ClusterControllerInverter(ClusterController):
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
 	_substract_one_to_register_index = False
+	_tcp_connection_pool_size = SitModbusDevice.GATEWAY_TCP_CONNECTION_POOL_SIZE # the gateway accepts several TCP clients
 
 	_slave_addresses_list = None
+	_curtailment_setpoint_short_description = None # inverters are limited through WSetPointMan of the ClusterController
 	_current_read_device_class = None
 	_last_read_slave_address = None
 	_last_read_serial_number = None
@@ -106,7 +109,8 @@ class ClusterControllerInverter(ClusterController):
 	"""
 	def __init__(self, a_slave_address=DEFAULT_SLAVE_ADDRESS, a_port=ClusterController.DEFAULT_MODBUS_PORT, an_ip_address=None):
 		"""
-		slave_address priority to commandline arguments
+		slave_address priority to commandline arguments, then to the units found by the last
+			sit_modbus_unit_scanner.py scan of the Cluster Controller
 		"""
 		assert self.valid_slave_address(a_slave_address), 'init invalid slave address'
 		try:
@@ -114,8 +118,10 @@ class ClusterControllerInverter(ClusterController):
 			l_slave_address = a_slave_address
 			if (hasattr(self._args, 'slave_address') and self._args.slave_address):
 				self._slave_addresses_list = SitUtils.args_to_list(self._args.slave_address)
+			else:
+				self._slave_addresses_list = SitModbusUnitScanner.cached_unit_ids(self._args.host_ip, a_port, SitModbusUnitScanner.PROFILE_SMA, self.SCAN_EXCLUDED_UNIT_IDS)
 
-			assert self.valid_slave_address_list(self._slave_addresses_list), 'Given script arguments are not valid, or could not be parsed'
+			assert self.valid_slave_address_list(self._slave_addresses_list), 'Given script arguments are not valid, or could not be parsed, give --slave_address or scan units with sit_modbus_unit_scanner.py'
 			assert self.valid_ip(self._args.host_ip), 'valid ip address:{}'.format(self._args.host_ip)
 
 			super().__init__(l_slave_address, a_port=a_port, an_ip_address=self._args.host_ip) 
@@ -161,28 +167,31 @@ class ClusterControllerInverter(ClusterController):
 
 # MODBUS READING
 
-	def read_all_sit_modbus_registers(self):
+	def _post_poll_sit_modbus_register(self, a_sit_modbus_register):
+		"""
+			REDEFINE
+			Keeps device class and serial number of the last polled slave
 		"""
-			Reads all registers and print result as debug
+		l_sit_reg = a_sit_modbus_register
+		# Setting slave address if changed
+		if self._last_read_slave_address != l_sit_reg.slave_address:
+			self._current_read_device_class = None
+			self._last_read_serial_number = None
+			self._last_read_slave_address = l_sit_reg.slave_address
+		#Setting device class
+		if l_sit_reg.short_description == 'DeviceClass':
+			self._current_read_device_class = l_sit_reg.value
+		elif l_sit_reg.short_description == 'SN':
+			self._last_read_serial_number = l_sit_reg.value
+		super()._post_poll_sit_modbus_register(l_sit_reg)
+
+	def poll_sit_modbus_registers(self):
+		"""
+		REDEFINE
+		Reads each slave of self._slave_addresses_list, a slave with a modbus error is logged and skipped
+			slaves are read concurrently if the device has several TCP connections, see poll_slaves_sit_modbus_registers
 		"""
-		self._logger.debug('read_all_sit_modbus_registers-> registers to read count({}) start --------------------------------------------------'.format(len(self._sit_modbus_registers)))
-
-		for l_short_desc, l_sit_reg in self._sit_modbus_registers.items():
-			self.read_sit_modbus_register(l_sit_reg)
-			# Setting slave address if changed
-			if self._last_read_slave_address != l_sit_reg.slave_address:
-				self._current_read_device_class = None
-				self._last_read_serial_number = None
-				self._last_read_slave_address = l_sit_reg.slave_address
-			#Setting device class
-			if l_sit_reg.short_description == 'DeviceClass':
-				self._current_read_device_class = l_sit_reg.value
-			elif l_sit_reg.short_description == 'SN':
-				self._last_read_serial_number = l_sit_reg.value
-			if l_sit_reg.has_post_set_value_call():
-				l_sit_reg.call_post_set_value()
-			#self._logger.debug('read_all_registers-> sit_register.out():%s' % (l_sit_reg.out()))
-			self._logger.debug('read_all_registers-> sit_register.out_short():%s' % (l_sit_reg.out_short()))
+		yield from self.poll_slaves_sit_modbus_registers(self._slave_addresses_list)
 
 
 # EVENTS
@@ -195,7 +204,7 @@ class ClusterControllerInverter(ClusterController):
 		Called by modbus_device.call_sit_modbus_registers_events()
 		"""
 
-		if 'PV inverter' in self._current_read_device_class:
+		if self._current_read_device_class is not None and 'PV inverter' in self._current_read_device_class:
 			super()._W_event(a_sit_modbus_register)
 
 	def _setted_parts(self, a_subject, a_body):
@@ -225,25 +234,7 @@ class ClusterControllerInverter(ClusterController):
 				assert self.valid_slave_address_list(self._slave_addresses_list), 'Slave addresses list is invalid:{}'.format(self._slave_addresses_list)
 				self._logger.debug('execute_corresponding_args-> _slave_addresses_list:{}'.format(self._slave_addresses_list))
 				# FOR EACH SLAVE
-				for l_slave in self._slave_addresses_list: 
-					self._sit_modbus_registers = OrderedDict()
-					try:
-						self._init_sit_modbus_registers(l_slave)
-						self.read_all_sit_modbus_registers()
-						if self._args.store_values:
-							self.store_values_into_csv(self._sit_modbus_registers, l_slave)
-						if self._args.display_all:
-							print(self.out_human_readable(a_with_description=self._args.long))
-						if self._args.raise_event:
-							assert len(self._sit_modbus_registers) > 0, 'modbus_registers_not_empty'
-							self.call_sit_modbus_registers_events()
-						if self._args.test:
-							self.test()
-					except ModbusException as l_e:
-						self._logger.error('Modbus error on slave {}, msg:{}'.format(l_slave, l_e))
-					except Exception as l_e:
-						self._logger.error('Exception on slave {}, msg:{}'.format(l_slave, l_e))
-						raise l_e
+				self.execute_cycles()
 
 		except Exception as l_e:
 			self._logger.exception("execute_corresponding_args-> Exception occured: %s" % (l_e))
@@ -261,7 +252,7 @@ class ClusterControllerInverter(ClusterController):
 		"""
 		self.add_arg_parse_modbus_device()
 		self._parser.add_argument('-e', '--raise_event', help='Raises the corresponding event if setted', action="store_true")
-		self._parser.add_argument('-c', '--slave_address', help='Slave address of modbus device', nargs='?', required=True)
+		self._parser.add_argument('-c', '--slave_address', help='Slave address of modbus device, units found by sit_modbus_unit_scanner.py if not given', nargs='?')
 
 	def add_required_named(self, a_required_named):
 		pass
@@ -52,7 +52,6 @@ try:
 	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/register_types')) #the way to import directories
 	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/third_party/SunriseSunsetCalculator')) #the way to import directories
 	from pymodbus.constants import Endian
-	from pymodbus.exceptions import ModbusException
 	import logging # http://www.onlamp.com/pub/a/python/2005/06/02/logging.html
 	from logging import handlers
 	import argparse
@@ -157,28 +156,31 @@ class DataManagerInverter(ClusterController):
 
 # MODBUS READING
 
-	def read_all_sit_modbus_registers(self):
+	def _post_poll_sit_modbus_register(self, a_sit_modbus_register):
 		"""
-			Reads all registers and print result as debug
+			REDEFINE
+			Keeps device class and serial number of the last polled slave
 		"""
-		self._logger.debug('read_all_sit_modbus_registers-> registers to read count({}) start --------------------------------------------------'.format(len(self._sit_modbus_registers)))
-
-		for l_short_desc, l_sit_reg in self._sit_modbus_registers.items():
-			self.read_sit_modbus_register(l_sit_reg)
-			# Setting slave address if changed
-			if self._last_read_slave_address != l_sit_reg.slave_address:
-				self._current_read_device_class = None
-				self._last_read_serial_number = None
-				self._last_read_slave_address = l_sit_reg.slave_address
-			#Setting device class
-			if l_sit_reg.short_description == 'DeviceClass':
-				self._current_read_device_class = l_sit_reg.value
-			elif l_sit_reg.short_description == 'SN':
-				self._last_read_serial_number = l_sit_reg.value
-			if l_sit_reg.has_post_set_value_call():
-				l_sit_reg.call_post_set_value()
-			#self._logger.debug('read_all_registers-> sit_register.out():%s' % (l_sit_reg.out()))
-			self._logger.debug('read_all_registers-> sit_register.out_short():%s' % (l_sit_reg.out_short()))
+		l_sit_reg = a_sit_modbus_register
+		# Setting slave address if changed
+		if self._last_read_slave_address != l_sit_reg.slave_address:
+			self._current_read_device_class = None
+			self._last_read_serial_number = None
+			self._last_read_slave_address = l_sit_reg.slave_address
+		#Setting device class
+		if l_sit_reg.short_description == 'DeviceClass':
+			self._current_read_device_class = l_sit_reg.value
+		elif l_sit_reg.short_description == 'SN':
+			self._last_read_serial_number = l_sit_reg.value
+		super()._post_poll_sit_modbus_register(l_sit_reg)
+
+	def poll_sit_modbus_registers(self):
+		"""
+		REDEFINE
+		Reads each slave of self._slave_addresses_list, a slave with a modbus error is logged and skipped
+			slaves are read concurrently if the device has several TCP connections, see poll_slaves_sit_modbus_registers
+		"""
+		yield from self.poll_slaves_sit_modbus_registers(self._slave_addresses_list)
 
 
 # EVENTS
@@ -191,7 +193,7 @@ class DataManagerInverter(ClusterController):
 		Called by modbus_device.call_sit_modbus_registers_events()
 		"""
 
-		if 'PV inverter' in self._current_read_device_class:
+		if self._current_read_device_class is not None and 'PV inverter' in self._current_read_device_class:
 			super()._W_event(a_sit_modbus_register)
 
 	def _setted_parts(self, a_subject, a_body):
@@ -221,25 +223,7 @@ class DataManagerInverter(ClusterController):
 				assert self.valid_slave_address_list(self._slave_addresses_list), 'Slave addresses list is invalid:{}'.format(self._slave_addresses_list)
 				self._logger.debug('execute_corresponding_args-> _slave_addresses_list:{}'.format(self._slave_addresses_list))
 				# FOR EACH SLAVE
-				for l_slave in self._slave_addresses_list: 
-					self._sit_modbus_registers = OrderedDict()
-					try:
-						self._init_sit_modbus_registers(l_slave)
-						self.read_all_sit_modbus_registers()
-						if self._args.store_values:
-							self.store_values_into_csv(self._sit_modbus_registers, l_slave)
-						if self._args.display_all:
-							print(self.out_human_readable(a_with_description=self._args.long))
-						if self._args.raise_event:
-							assert len(self._sit_modbus_registers) > 0, 'modbus_registers_not_empty'
-							self.call_sit_modbus_registers_events()
-						if self._args.test:
-							self.test()
-					except ModbusException as l_e:
-						self._logger.error('Modbus error on slave {}, msg:{}'.format(l_slave, l_e))
-					except Exception as l_e:
-						self._logger.error('Exception on slave {}, msg:{}'.format(l_slave, l_e))
-						raise l_e
+				self.execute_cycles()
 
 		except Exception as l_e:
 			self._logger.exception("execute_corresponding_args-> Exception occured: %s" % (l_e))
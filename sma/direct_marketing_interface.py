@@ -109,7 +109,7 @@ class DirectMarketerInterface(InverterManager):
 #		l_required_named.add_argument('-l', '--longitude', help='Longitude coordinate (beware timezone is set to Chile)', nargs='?', required=True)
 #		l_required_named.add_argument('-a', '--lattitude', help='Lattitude coordinate (beware timezone is set to Chile)', nargs='?', required=True)
 #		l_required_named.add_argument('-d', '--device_type', help='Device Type:' + ('|'.join(str(l) for l in self.DEVICE_TYPES_ARRAY)), nargs='?', required=True)
-		l_args = self._parser.parse_args()
+		l_args = self._parser.parse_args(self._forced_script_arguments)
 		self._args = l_args
 
 # ACCESS
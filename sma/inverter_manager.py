@@ -46,7 +46,6 @@ try:
 	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib')) #the way to import directories
 	sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/register_types')) #the way to import directories
 	from pymodbus.constants import Endian
-	from pymodbus.exceptions import ModbusException
 	import logging # http://www.onlamp.com/pub/a/python/2005/06/02/logging.html
 	from logging import handlers
 	import argparse
@@ -57,16 +56,8 @@ try:
 	from sit_logger import SitLogger
 	from sit_modbus_device import SitModbusDevice #from file_name import ClassName
 	from sit_modbus_register import SitModbusRegister
-	from sit_modbus_register_event import SitModbusRegisterEvent
-	from register_type_int16_u import RegisterTypeInt16u
-	from register_type_int16_s import RegisterTypeInt16s
-	from register_type_int32_u import RegisterTypeInt32u
-	from register_type_int32_s import RegisterTypeInt32s
-	from register_type_int64_u import RegisterTypeInt64u
-	from register_type_string8 import RegisterTypeString8
-	from register_type_string16 import RegisterTypeString16
-	from register_type_int16_u_scale_factor import RegisterTypeInt16uScaleFactor
-	from register_type_int32_u_scale_factor import RegisterTypeInt32uScaleFactor
+	from sit_modbus_register_map import SitModbusRegisterMap
+	from sit_modbus_unit_scanner import SitModbusUnitScanner
 	from sit_date_time import SitDateTime
 	from sit_json_conf import SitJsonConf
 	from sit_utils import SitUtils
@@ -83,6 +74,8 @@ class InverterManager(SitModbusDevice):
 	DEFAULT_MODBUS_PORT = 502
 	DEFAULT_TARGET_MODE = SitModbusDevice.TARGET_MODE_TCP
 	MIN_W_FOR_RAISE_EVENT_GENERATION = 50
+	COMMON_REGISTER_MAP_FILE_PATH = os.path.join(os.path.dirname(__file__), 'register_maps', 'inverter_manager_common.json')
+	REGISTER_MAP_FILE_PATH = os.path.join(os.path.dirname(__file__), 'register_maps', 'inverter_manager.json')
 	PARSER_DESCRIPTION = 'Actions with sma inverter manager. ' + SitConstants.DEFAULT_HELP_LICENSE_NOTICE
 
 # CLASS ATTRIBUTES
@@ -90,6 +83,10 @@ class InverterManager(SitModbusDevice):
 	_byte_order = Endian.Big
 	_word_order = Endian.Big
 	_substract_one_to_register_index = True
+	_pipeline_window = SitModbusDevice.GATEWAY_PIPELINE_WINDOW # the gateway accepts several outstanding transactions
+	_tcp_connection_pool_size = SitModbusDevice.GATEWAY_TCP_CONNECTION_POOL_SIZE # the gateway accepts several TCP clients
+	_curtailment_setpoint_short_description = 'WMaxLimPct'
+	_curtailment_setpoint_value_per_percent = 1 # in % of WMax, raw value with WMaxLimPct_SF (40367, -2 i.e. 0.01%), WMaxLim_Ena (40353) is read only
 	_slave_addresses_list = None
 
 # FUNCTIONS DEFINITION 
@@ -104,13 +101,15 @@ class InverterManager(SitModbusDevice):
 			l_slave_address = a_slave_address
 			if (hasattr(self._args, 'slave_address') and self._args.slave_address):
 				self._slave_addresses_list = SitUtils.args_to_list(self._args.slave_address)
-			if self._slave_addresses_list is None:
+			else:
+				self._slave_addresses_list = SitModbusUnitScanner.cached_unit_ids(self._args.host_ip, a_port, SitModbusUnitScanner.PROFILE_SUNSPEC)
+			if not self._slave_addresses_list:
 				self._slave_addresses_list = [a_slave_address]
 
 			assert self.valid_slave_address_list(self._slave_addresses_list), 'Given script arguments are not valid, or could not be parsed:{}'.format(self._slave_addresses_list)
 			assert self.valid_ip(self._args.host_ip), 'valid ip address:{}'.format(self._args.host_ip)
 
-			super().__init__(l_slave_address, self.DEFAULT_TARGET_MODE, a_port=self.DEFAULT_MODBUS_PORT, an_ip_address=self._args.host_ip) 
+			super().__init__(l_slave_address, self.DEFAULT_TARGET_MODE, a_port=a_port, an_ip_address=self._args.host_ip) 
 			self._logger = SitLogger().new_logger(self.__class__.__name__, self._args.host_mac)
 
 			self.invariants()
@@ -129,56 +128,21 @@ class InverterManager(SitModbusDevice):
 			Initializes self._sit_modbus_registers
 		"""
 		l_reg_list = OrderedDict()
-		l_slave_address = a_slave_address
-
-		self._add_common_registers(l_reg_list, l_slave_address)
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16u('ID', 'Model ID (ID): 120 = Sunspec nameplate model', 40238, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'uint16', an_is_metadata=True))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('AC_A', 'AC Current sum of all inverters', 40188, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'A', a_scale_factor=40192))
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16u('VArPct_Mod', 'Mode of the percentile reactive power limitation: 1 = in % of WMax', 40365, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'enum16'))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16u('VArPct_Ena', 'Control of the percentile reactive power limitation,(SMA: Qext): 1 = activated', 40365, l_slave_address, SitModbusRegister.ACCESS_MODE_RW, 'enum16'))
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16u('WMaxLim_Ena', 'Limiting (0 Deactivate, 1 activated):', 40353, l_slave_address, SitModbusRegister.ACCESS_MODE_RW, 'enum16'))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('WMaxLimPct', 'Set power to default value, in % of WMax-WMaxLimPct_SF', 40349, l_slave_address, SitModbusRegister.ACCESS_MODE_RW, 'uint16', a_scale_factor=40367))
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('VRef', 'Voltage at the PCC (VRef), in V VRef_SF (40289)', 40269, l_slave_address, SitModbusRegister.ACCESS_MODE_RW, 'uint16', 40289))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('VMax', 'Set value for maximum voltage (VMax), in V VMinMax_SF', 40271, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'uint16', a_scale_factor=40291))
-
+		self._add_common_registers(l_reg_list, a_slave_address)
 		self.append_modbus_registers(l_reg_list)
+		self.append_sit_modbus_registers_from_map(self.REGISTER_MAP_FILE_PATH, a_slave_address)
+		self.set_poll_period(self.DEFAULT_SLOW_POLL_PERIOD, ['WH'])
 
 		self.invariants()
 
 
 	def _add_common_registers(self, a_reg_list, a_slave_address):
 		"""
-		adds to a_reg_list
+		adds to a_reg_list registers of COMMON_REGISTER_MAP_FILE_PATH, shared with SunnyTripower60
 		"""
-		l_reg_list = a_reg_list
-		l_slave_address = a_slave_address
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeString16('Mn', 'Manufacturer', 40005, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'String16', an_is_metadata=True))
-		SitUtils.od_extend(l_reg_list, RegisterTypeString16('Md', 'Model (Md): SMA Inverter Manager', 40021, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'String16', an_is_metadata=True))
-		SitUtils.od_extend(l_reg_list, RegisterTypeString8('Opt', 'Options (Opt): Inverter Manager name', 40037, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'String8', an_is_metadata=True))
-		SitUtils.od_extend(l_reg_list, RegisterTypeString8('Vr', 'Version (Vr): Version number of the installed firmware', 40045, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'String8', an_is_metadata=True))
-		SitUtils.od_extend(l_reg_list, RegisterTypeString16('SN', 'Serial number (SN) of the device that uses the Modbus unit ID', 40053, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'String16', an_is_metadata=True))
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('PPVphAB', 'Voltage, line conductor L1 to L2, in V V_SF (40199) : average value of all inverters', 40193, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'V', a_scale_factor=40199))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('PPVphBC', 'Voltage, line conductor L2 to L3, in V V_SF (40199) : average value of all inverters', 40194, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'V', a_scale_factor=40199))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('PPVphCA', 'Voltage, line conductor L3 to L1, in V V_SF (40199) : average value of all inverters', 40195, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'V', a_scale_factor=40199))
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('PPVphA', 'Voltage, line conductor L1 to N (PPVphA), in V-V_SF (40199): average value of all inverters', 40196, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'V', a_scale_factor=40199))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('PPVphB', 'Voltage, line conductor L1 to N (PPVphB), in V-V_SF (40199): average value of all inverters', 40197, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'V', a_scale_factor=40199))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('PPVphC', 'Voltage, line conductor L1 to N (PPVphC), in V-V_SF (40199): average value of all inverters', 40198, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'V', a_scale_factor=40199))
-
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('W', 'Active power (W), in W-W_SF (40201): sum of all inverters', 40200, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'W', a_scale_factor=40192, an_event=SitModbusRegisterEvent(self._W_event), a_post_set_value_call=self.w_fix))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt32uScaleFactor('WH', 'Total yield (WH), in Wh WH_SF (40212): sum of all inverters', 40210, l_slave_address, SitModbusRegister.ACCESS_MODE_R, 'WH', a_scale_factor=40212))
-		SitUtils.od_extend(l_reg_list, RegisterTypeInt16uScaleFactor('TmpCab', 'Internal temperature, in °C Tmp_SF (40223): average value of all inverters', 40219, l_slave_address, SitModbusRegister.ACCESS_MODE_R, '°C', a_scale_factor=40223))
-
-
-
-
-
+		l_table = SitModbusRegisterMap.new_from_file(self.COMMON_REGISTER_MAP_FILE_PATH).compiled_table(self, a_slave_address)
+		for l_reg in l_table.by_name.values():
+			SitUtils.od_extend(a_reg_list, l_reg)
 
 	def _W_event(self, a_sit_modbus_register):
 		"""
@@ -248,6 +212,17 @@ class InverterManager(SitModbusDevice):
 		return l_res
 
 
+# MODBUS READING
+
+	def poll_sit_modbus_registers(self):
+		"""
+		REDEFINE
+		Reads each slave of self._slave_addresses_list, a slave with a modbus error is logged and skipped
+			slaves are read concurrently if the device has several TCP connections, see poll_slaves_sit_modbus_registers
+		"""
+		yield from self.poll_slaves_sit_modbus_registers(self._slave_addresses_list)
+
+
 # ACCESS
 
 
@@ -269,25 +244,7 @@ class InverterManager(SitModbusDevice):
 			if self._args.store_values or self._args.display_all or self._args.test or self._args.raise_event:
 				assert self.valid_slave_address_list(self._slave_addresses_list), 'Slave addresses list is invalid:{}'.format(self._slave_addresses_list)
 				# FOR EACH SLAVE
-				for l_slave in self._slave_addresses_list: 
-					self._sit_modbus_registers = OrderedDict()
-					try:
-						self._init_sit_modbus_registers(l_slave)
-						self.read_all_sit_modbus_registers()
-						if self._args.store_values:
-							self.store_values_into_csv(self._sit_modbus_registers, l_slave)
-						if self._args.display_all:
-							print(self.out_human_readable(a_with_description=self._args.long))
-						if self._args.raise_event:
-							assert len(self._sit_modbus_registers) > 0, 'modbus_registers_not_empty'
-							self.call_sit_modbus_registers_events()
-						if self._args.test:
-							self.test()
-					except ModbusException as l_e:
-						self._logger.error('Modbus error on slave {}, msg:{}'.format(l_slave, l_e))
-					except Exception as l_e:
-						self._logger.error('Exception on slave {}, msg:{}'.format(l_slave, l_e))
-						raise l_e
+				self.execute_cycles()
 			if self._args.manual_restart:
 				self.manual_restart()
 		except Exception as l_e:
@@ -309,7 +266,7 @@ class InverterManager(SitModbusDevice):
 		self.add_arg_parse_modbus_device()
 		self._parser.add_argument('-e', '--raise_event', help='Raises the corresponding event if setted', action="store_true")
 		self._parser.add_argument('-r', '--manual_restart', help='Sends a manual restart to inverter manager', action="store_true")
-		self._parser.add_argument('-c', '--slave_address', help='Slave address of modbus device', nargs='?')
+		self._parser.add_argument('-c', '--slave_address', help='Slave address of modbus device, units found by sit_modbus_unit_scanner.py if not given', nargs='?')
 
 	def add_required_named(self, a_required_named):
 		pass
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Tests of ClusterControllerInverter against a SitModbusTcpGatewayEmulator, events of the slaves
+#			read over several TCP connections (pool workers) must run on the device as with one connection
+#			run with python3 -m pytest tests
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+import sys
+import os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '../sma'))
+import pytest
+
+pytest.importorskip('pymodbus')
+pytest.importorskip('sunrise_sunset') # lib/third_party/SunriseSunsetCalculator submodule, imported by ClusterController
+
+from sit_modbus_device import SitModbusDevice
+from sit_curtailment_dispatcher_benchmark import SitModbusTcpGatewayEmulator
+from cluster_controller_inverter import ClusterControllerInverter
+
+# CONSTANTS
+UNITS = [3, 4, 5, 6, 7]
+DEVICE_CLASS_PV_INVERTER = 8001
+W = 1500
+
+@pytest.fixture
+def gateway_emulator():
+	l_res = SitModbusTcpGatewayEmulator(UNITS, a_response_delay=0)
+	for l_unit in UNITS:
+		l_res.set_register_values(l_unit, 30005, [0, 1000 + l_unit]) # SN
+		l_res.set_register_values(l_unit, 30051, [0, DEVICE_CLASS_PV_INVERTER]) # DeviceClass
+		l_res.set_register_values(l_unit, 30775, [0, W]) # W, raises _W_event
+	l_res.start()
+	yield l_res
+	l_res.stop()
+
+@pytest.mark.parametrize('a_tcp_connections', [1, 3])
+def test_events_run_on_the_device(conf_dir, gateway_emulator, monkeypatch, a_tcp_connections):
+	l_calls = []
+	def l_record_W_event(self, a_sit_modbus_register):
+		l_calls.append((self, a_sit_modbus_register.slave_address, self._current_read_device_class, self._last_read_serial_number, a_sit_modbus_register.value))
+	monkeypatch.setattr(ClusterControllerInverter, '_W_event', l_record_W_event)
+	monkeypatch.delitem(SitModbusDevice._sit_modbus_register_templates, ClusterControllerInverter, raising=False) # built again with the recording event
+
+	l_device = ClusterControllerInverter.new_with_script_arguments(['-i', gateway_emulator.host, '-m', '00:00:00:00:00:01',
+			'-c', '{}-{}'.format(UNITS[0], UNITS[-1]), '-e', '--tcp_connections', a_tcp_connections], an_ip_address=gateway_emulator.host, a_port=gateway_emulator.port)
+	try:
+		l_device.connect()
+		if a_tcp_connections > 1:
+			assert l_device.tcp_connection_pool() is not None, 'slaves read by pool workers'
+		l_device.execute_cycle()
+	finally:
+		l_device.close_tcp_connection_pool()
+		l_device.disconnect()
+
+	assert [l_call[1] for l_call in l_calls] == UNITS
+	for l_self, l_slave, l_device_class, l_serial_number, l_value in l_calls:
+		assert l_self is l_device, 'event of slave {} bound to {}'.format(l_slave, l_self)
+		assert l_device_class == 'PV inverter'
+		assert l_serial_number == 1000 + l_slave
+		assert l_value == W
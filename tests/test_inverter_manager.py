@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Tests of InverterManager curtailment against a SitModbusTcpGatewayEmulator, the raw WMaxLimPct written
+#			must be the percent without WMaxLimPct_SF (40367), -2 on p.30 of doc/sma INVERTER_MANAGER SunSpec Modbus TI
+#			run with python3 -m pytest tests
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+import sys
+import os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '../sma'))
+from collections import OrderedDict
+import pytest
+
+pytest.importorskip('pymodbus')
+pytest.importorskip('sunrise_sunset') # lib/third_party/SunriseSunsetCalculator submodule, imported by InverterManager
+
+from sit_curtailment_dispatcher import SitCurtailmentDispatcher
+from sit_curtailment_dispatcher_benchmark import SitModbusTcpGatewayEmulator
+from inverter_manager import InverterManager
+
+# CONSTANTS
+UNITS = [3, 4]
+WMAX_LIM_PCT_ADDRESS = 40349 - 1 # InverterManager substracts one to register indexes
+WMAX_LIM_PCT_SF_ADDRESS = 40367 - 1
+WMAX_LIM_PCT_SF = -2
+
+@pytest.fixture
+def gateway_emulator():
+	l_res = SitModbusTcpGatewayEmulator(UNITS, a_response_delay=0)
+	for l_unit in UNITS:
+		l_res.set_register_values(l_unit, WMAX_LIM_PCT_SF_ADDRESS, [WMAX_LIM_PCT_SF & 0xFFFF])
+	l_res.start()
+	yield l_res
+	l_res.stop()
+
+@pytest.mark.parametrize('a_percent', [0, 12.34, 50, 100])
+def test_curtailment_writes_percent_without_scale_factor(conf_dir, gateway_emulator, a_percent):
+	l_device = InverterManager.new_with_script_arguments(['-i', gateway_emulator.host, '-m', '00:00:00:00:00:01', '-c', '{}-{}'.format(UNITS[0], UNITS[-1])],
+			an_ip_address=gateway_emulator.host, a_port=gateway_emulator.port)
+	l_dispatcher = SitCurtailmentDispatcher(OrderedDict([('site', [l_device])]), a_max_attempts=1)
+	try:
+		l_results = l_dispatcher.dispatch({'site': a_percent})
+	finally:
+		l_dispatcher.close()
+
+	assert [(l_result.slave_address, l_result.is_applied, l_result.error) for l_result in l_results] == [(l_unit, True, None) for l_unit in UNITS]
+	for l_unit in UNITS:
+		assert gateway_emulator.register_value(l_unit, WMAX_LIM_PCT_ADDRESS) == round(a_percent / 10 ** WMAX_LIM_PCT_SF)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Tests of SitModbusBlockDecoder, decoding words of a block of every register type with the
+#			precompiled struct layouts must give the same values and sentinel flags as set_value_with_raw
+#			run with python3 -m pytest tests
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+import sys
+import os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/register_types'))
+import random
+import pytest
+
+pytest.importorskip('pymodbus')
+
+from pymodbus.register_read_message import ReadHoldingRegistersResponse
+from sit_modbus_read_block import SitModbusReadBlock
+from sit_modbus_block_decoder import SitModbusBlockDecoder
+from register_type_int8_s import RegisterTypeInt8s
+from register_type_int16_s import RegisterTypeInt16s
+from register_type_int16_u import RegisterTypeInt16u
+from register_type_int16_u_scale_factor import RegisterTypeInt16uScaleFactor
+from register_type_int32_s import RegisterTypeInt32s
+from register_type_int32_u import RegisterTypeInt32u
+from register_type_int32_u_scale_factor import RegisterTypeInt32uScaleFactor
+from register_type_int64_u import RegisterTypeInt64u
+from register_type_sma_cc_device_class import RegisterTypeSmaCCDeviceClass
+from register_type_string8 import RegisterTypeString8
+from register_type_string16 import RegisterTypeString16
+from register_type_string_var import RegisterTypeStringVar
+
+# CONSTANTS
+SLAVE_ADDRESS = 3
+FIRST_REGISTER_INDEX = 30001
+RANDOM_BLOCKS_COUNT = 50
+SMA_CC_DEVICE_CLASS_VALUES = [8000, 8001, 8002, 8007, 8033, 8064, 8065, 8128] # other values raise in set_value_with_unpacked
+
+def new_sit_modbus_registers():
+	"""
+	Returns one register of each type laid out one after the other from FIRST_REGISTER_INDEX
+	"""
+	l_res = []
+	l_register_index = FIRST_REGISTER_INDEX
+	for l_class, some_args in [
+			(RegisterTypeInt8s, ()),
+			(RegisterTypeInt16s, ()),
+			(RegisterTypeInt16u, ()),
+			(RegisterTypeInt16uScaleFactor, ()),
+			(RegisterTypeInt32s, ()),
+			(RegisterTypeInt32u, ()),
+			(RegisterTypeInt32uScaleFactor, ()),
+			(RegisterTypeInt64u, ()),
+			(RegisterTypeSmaCCDeviceClass, ()),
+			(RegisterTypeString8, ()),
+			(RegisterTypeString16, ()),
+			(RegisterTypeStringVar, (6,))]:
+		l_short_description = '{}_{}'.format(l_class.__name__, l_register_index)
+		l_sit_reg = l_class(l_short_description, l_short_description, l_register_index, *some_args, SLAVE_ADDRESS) if some_args else l_class(l_short_description, l_short_description, l_register_index, SLAVE_ADDRESS)
+		l_res.append(l_sit_reg)
+		l_register_index += l_sit_reg.words_count
+
+	return l_res
+
+def new_read_block(some_sit_modbus_registers):
+	l_res = SitModbusReadBlock(some_sit_modbus_registers[0])
+	for l_sit_reg in some_sit_modbus_registers[1:]:
+		l_res.append(l_sit_reg)
+
+	return l_res
+
+def words_samples(a_read_block):
+	"""
+	Yields words of the whole block: constant words, the sentinel of every register, every device class
+		of RegisterTypeSmaCCDeviceClass and random words
+	"""
+	l_words_count = a_read_block.words_count
+	for l_word in [0x0000, 0x0001, 0x7FFF, 0x8000, 0xFFFF, 0x3030, 0x4142]:
+		yield [l_word] * l_words_count
+	l_random = random.Random(20261018)
+	l_sentinel_words = [l_random.randrange(0x10000) for l_i in range(l_words_count)]
+	for l_sit_reg in a_read_block.sit_modbus_registers:
+		if l_sit_reg.sentinel_registers is not None:
+			l_offset = a_read_block.register_offset(l_sit_reg)
+			l_sentinel_words[l_offset:l_offset + l_sit_reg.words_count] = l_sit_reg.sentinel_registers
+	yield l_sentinel_words
+	for l_device_class in SMA_CC_DEVICE_CLASS_VALUES:
+		l_words = [l_random.randrange(0x10000) for l_i in range(l_words_count)]
+		for l_sit_reg in a_read_block.sit_modbus_registers:
+			if isinstance(l_sit_reg, RegisterTypeSmaCCDeviceClass):
+				l_offset = a_read_block.register_offset(l_sit_reg)
+				l_words[l_offset:l_offset + 2] = [l_device_class >> 16, l_device_class & 0xFFFF]
+		yield l_words
+	for l_i in range(RANDOM_BLOCKS_COUNT):
+		yield [l_random.randrange(0x10000) for l_i in range(l_words_count)]
+
+def decoding_outcome(a_sit_modbus_register, a_set_value_call, *some_args):
+	"""
+	('value', value) set by given call on given register, or ('exception', class name, message) if it raised
+	"""
+	try:
+		a_set_value_call(*some_args)
+	except Exception as l_e:
+		return ('exception', l_e.__class__.__name__, str(l_e))
+
+	return ('value', a_sit_modbus_register.value)
+
+def raw_outcome_and_sentinel(a_sit_modbus_register, some_words):
+	"""
+	(outcome, is sentinel) decoded by set_value_with_raw as SitModbusDevice._set_value_with_raw_registers does
+	"""
+	if a_sit_modbus_register.is_sentinel_raw(some_words):
+		return ('value', None), True
+
+	return decoding_outcome(a_sit_modbus_register, a_sit_modbus_register.set_value_with_raw, ReadHoldingRegistersResponse(list(some_words))), False
+
+def test_every_register_type_is_compiled():
+	l_block_decoder = SitModbusBlockDecoder(new_read_block(new_sit_modbus_registers()))
+	assert l_block_decoder.fallback_sit_modbus_registers == []
+
+@pytest.mark.parametrize('an_is_from_payload', [False, True])
+def test_block_decoder_same_as_set_value_with_raw(an_is_from_payload):
+	l_read_block = new_read_block(new_sit_modbus_registers())
+	l_raw_sit_regs = new_sit_modbus_registers()
+	l_block_decoder = SitModbusBlockDecoder(l_read_block)
+	l_device_class_values = set()
+	for l_words in words_samples(l_read_block):
+		if an_is_from_payload:
+			l_unpacked_values = l_block_decoder.unpacked_values_from_payload(b''.join(l_word.to_bytes(2, 'big') for l_word in l_words))
+		else:
+			l_unpacked_values = l_block_decoder.unpacked_values(l_words)
+		assert len(l_unpacked_values) == len(l_raw_sit_regs)
+		for (l_sit_reg, l_unpacked, l_is_sentinel), l_raw_sit_reg in zip(l_unpacked_values, l_raw_sit_regs):
+			assert l_sit_reg.short_description == l_raw_sit_reg.short_description
+			l_offset = l_read_block.register_offset(l_sit_reg)
+			l_raw_outcome, l_is_raw_sentinel = raw_outcome_and_sentinel(l_raw_sit_reg, l_words[l_offset:l_offset + l_sit_reg.words_count])
+			assert l_is_sentinel == l_is_raw_sentinel, '{} words:{}'.format(l_sit_reg.short_description, l_words[l_offset:l_offset + l_sit_reg.words_count])
+			if not l_is_sentinel:
+				l_outcome = decoding_outcome(l_sit_reg, l_sit_reg.set_value_with_unpacked, l_unpacked)
+				assert l_outcome == l_raw_outcome, '{} words:{}'.format(l_sit_reg.short_description, l_words[l_offset:l_offset + l_sit_reg.words_count])
+				if isinstance(l_sit_reg, RegisterTypeSmaCCDeviceClass) and l_outcome[0] == 'value':
+					l_device_class_values.add(l_outcome[1])
+	assert len(l_device_class_values) == len(SMA_CC_DEVICE_CLASS_VALUES), 'every device class decoded:{}'.format(l_device_class_values)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Tests of SitModbusDevice.poll_slaves_sit_modbus_registers against a SitModbusTcpGatewayEmulator,
+#			registers of slaves read by pool workers must call events of the device
+#			run with python3 -m pytest tests
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+import sys
+import os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '../lib/register_types'))
+import pytest
+
+pytest.importorskip('pymodbus')
+
+from sit_modbus_device import SitModbusDevice
+from sit_modbus_register import SitModbusRegister
+from sit_modbus_register_event import SitModbusRegisterEvent
+from sit_curtailment_dispatcher_benchmark import SitModbusTcpGatewayEmulator
+from register_type_int16_u import RegisterTypeInt16u
+
+# CONSTANTS
+UNITS = [3, 4, 5, 6, 7, 8]
+W_REGISTER_INDEX = 30775
+
+class SitPooledTestDevice(SitModbusDevice):
+	"""
+	Driver reading the W register of several slaves, as ClusterControllerInverter does
+	"""
+	_substract_one_to_register_index = False
+	_events = None # list of (device called, slave address, slave of the last _post_poll_sit_modbus_register)
+	_last_polled_slave_address = None
+
+	def __init__(self, some_slave_addresses, an_ip_address, a_port, a_tcp_connection_pool_size):
+		super().__init__(some_slave_addresses[0], self.TARGET_MODE_TCP, a_port, an_ip_address)
+		self._slave_addresses_list = some_slave_addresses
+		self._tcp_connection_pool_size = a_tcp_connection_pool_size
+		self._events = []
+
+	def _init_sit_modbus_registers(self, a_slave_address):
+		self.add_modbus_register(RegisterTypeInt16u('W', 'Active power', W_REGISTER_INDEX, a_slave_address, SitModbusRegister.ACCESS_MODE_R, 'W', an_event=SitModbusRegisterEvent(self._W_event)))
+
+	def poll_sit_modbus_registers(self):
+		yield from self.poll_slaves_sit_modbus_registers(self._slave_addresses_list)
+
+	def _post_poll_sit_modbus_register(self, a_sit_modbus_register):
+		self._last_polled_slave_address = a_sit_modbus_register.slave_address
+
+	def _W_event(self, a_sit_modbus_register):
+		self._events.append((self, a_sit_modbus_register.slave_address, self._last_polled_slave_address))
+
+@pytest.fixture
+def gateway_emulator():
+	l_res = SitModbusTcpGatewayEmulator(UNITS, a_response_delay=0)
+	for l_unit in UNITS:
+		l_res.set_register_values(l_unit, W_REGISTER_INDEX, [100 * l_unit])
+	l_res.start()
+	yield l_res
+	l_res.stop()
+
+@pytest.mark.parametrize('a_tcp_connection_pool_size', [1, 3])
+def test_pooled_slaves_call_events_of_the_device(conf_dir, gateway_emulator, a_tcp_connection_pool_size):
+	l_device = SitPooledTestDevice(UNITS, gateway_emulator.host, gateway_emulator.port, a_tcp_connection_pool_size)
+	try:
+		l_device.connect()
+		assert (l_device.tcp_connection_pool() is not None) == (a_tcp_connection_pool_size > 1)
+		for l_cycle in range(2): # registers are built by the first cycle and reused by the next one
+			l_values = {}
+			for l_slave in l_device.poll_sit_modbus_registers():
+				l_values[l_slave] = l_device.sit_modbus_registers['W'].value
+				l_device.call_sit_modbus_registers_events()
+			assert l_values == {l_unit: 100 * l_unit for l_unit in UNITS}
+	finally:
+		l_device.close_tcp_connection_pool()
+		l_device.disconnect()
+
+	assert [(l_device, l_unit, l_unit) for l_unit in UNITS] * 2 == l_device._events
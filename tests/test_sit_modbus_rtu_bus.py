@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+#       DESCRIPTION: Tests of the static helpers of SitModbusRtuBus against known modbus RTU vectors
+#			run with python3 -m pytest tests
+#
+#		*************************************************************************************************
+#       @author: Philippe Gachoud
+#       @creation: 20261018
+#       @last modification:
+#       @version: 1.0
+#       @URL: $URL
+#		*************************************************************************************************
+#		Copyright (C) 2020 Solarity spa
+#
+#		This library is free software; you can redistribute it and/or
+#		modify it under the terms of the GNU Lesser General Public
+#		License as published by the Free Software Foundation; either
+#		version 2.1 of the License, or (at your option) any later version.
+#
+#		This library is distributed in the hope that it will be useful,
+#		but WITHOUT ANY WARRANTY; without even the implied warranty of
+#		MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#		Lesser General Public License for more details.
+#
+#		You should have received a copy of the GNU Lesser General Public
+#		License along with this library; if not, write to the Free Software
+#		Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#		*************************************************************************************************
+#@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+# INCLUDES
+import sys
+import os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../lib'))
+import pytest
+from sit_modbus_rtu_bus import SitModbusRtuBus
+
+def test_crc_check_value():
+	assert SitModbusRtuBus.crc(b'123456789') == 0x4B37 # CRC-16/MODBUS check value
+	assert SitModbusRtuBus.crc(b'') == 0xFFFF
+
+@pytest.mark.parametrize('a_unit, a_pdu, a_frame', [
+		(0x01, '030000000a', '01030000000ac5cd'), # read 10 holding registers from 0
+		(0x01, '0300000001', '010300000001840a'), # read 1 holding register from 0
+		(0x11, '03006b0003', '1103006b00037687'), # modbus over serial line specification example
+		(0x01, '0600010003', '010600010003980b'), # write single register 1 with 3
+	])
+def test_frame(a_unit, a_pdu, a_frame):
+	l_frame = SitModbusRtuBus.frame(a_unit, bytes.fromhex(a_pdu))
+	assert l_frame.hex() == a_frame
+	assert SitModbusRtuBus.crc(l_frame) == 0 # crc of a frame with its crc appended low byte first
+
+@pytest.mark.parametrize('a_baudrate, a_parity, a_stopbits, a_t15, a_t35', [
+		(9600, 'E', 1, 1.5 * 11 / 9600, 3.5 * 11 / 9600),
+		(9600, 'N', 2, 1.5 * 11 / 9600, 3.5 * 11 / 9600),
+		(9600, 'N', 1, 1.5 * 10 / 9600, 3.5 * 10 / 9600),
+		(19200, 'E', 1, 1.5 * 11 / 19200, 3.5 * 11 / 19200),
+		(38400, 'E', 1, 0.00075, 0.00175), # fixed above 19200 bauds
+		(115200, 'N', 1, 0.00075, 0.00175),
+	])
+def test_silent_intervals(a_baudrate, a_parity, a_stopbits, a_t15, a_t35):
+	l_t15, l_t35 = SitModbusRtuBus.silent_intervals(a_baudrate, a_parity, a_stopbits)
+	assert l_t15 == pytest.approx(a_t15)
+	assert l_t35 == pytest.approx(a_t35)